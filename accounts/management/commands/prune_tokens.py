@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired outstanding and blacklisted JWTs in bounded batches. "
+        "Meant to be run periodically (cron / Render cron job). Workers drop "
+        "the pruned tokens from their blacklist filters at their next rebuild "
+        "(TOKEN_BLACKLIST_REBUILD_SECONDS)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--max-batches", type=int, default=0,
+            help="Stop after this many batches per table (0 = until done).",
+        )
+        parser.add_argument(
+            "--sleep", type=float, default=0.0,
+            help="Seconds to pause between batches to limit lock pressure.",
+        )
+
+    def handle(self, *args, batch_size, max_batches, sleep, **options):
+        cutoff = aware_utcnow()
+
+        # Blacklist rows first so the outstanding-token deletes don't cascade.
+        blacklisted = self._prune(
+            BlacklistedToken.objects.filter(token__expires_at__lte=cutoff),
+            batch_size, max_batches, sleep,
+        )
+        outstanding = self._prune(
+            OutstandingToken.objects.filter(expires_at__lte=cutoff),
+            batch_size, max_batches, sleep,
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Pruned {blacklisted} blacklisted and {outstanding} outstanding tokens."
+        ))
+
+    def _prune(self, qs, batch_size, max_batches, sleep):
+        total = 0
+        batches = 0
+        while not max_batches or batches < max_batches:
+            ids = list(qs.order_by("id").values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+            deleted, _ = qs.model.objects.filter(id__in=ids).delete()
+            total += deleted
+            batches += 1
+            if sleep:
+                time.sleep(sleep)
+        return total
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.utils import deliver_outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver queued outbox emails over a single reused mail connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument(
+            "--loop", action="store_true",
+            help="Keep polling the outbox instead of exiting when it is drained.",
+        )
+        parser.add_argument(
+            "--interval", type=float, default=5.0,
+            help="Seconds to sleep between polls when the outbox is empty (with --loop).",
+        )
+
+    def handle(self, *args, batch_size, loop, interval, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = deliver_outbox(batch_size=batch_size)
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write(f"sent={sent} failed={failed}")
+                continue
+            if not loop:
+                break
+            time.sleep(interval)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Outbox drained: {total_sent} sent, {total_failed} failed attempts."
+        ))
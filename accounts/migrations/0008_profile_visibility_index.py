@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_email_outbox'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['user', 'visibility'], name='profile_user_visibility_idx'),
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 class User(AbstractUser):
     username_validator = RegexValidator(
@@ -58,6 +59,14 @@ class Profile(models.Model):
         default="public"
     )
 
+    class Meta:
+        indexes = [
+            # Post visibility filters (posts.models.visibility_q) join each
+            # author's profile just to read `visibility`; covering it keeps
+            # that lookup index-only.
+            models.Index(fields=["user", "visibility"], name="profile_user_visibility_idx"),
+        ]
+
     def __str__(self):
         return f"{self.user.username}'s Profile"
 
@@ -95,3 +104,42 @@ class Follow(models.Model):
 
     def __str__(self):
         return f"{self.follower.username} → {self.following.username}"
+
+
+# --------------------------
+# EMAIL OUTBOX
+# --------------------------
+
+class EmailOutbox(models.Model):
+    """
+    Outgoing mail queued in the same transaction as the change that caused it.
+    Delivered out of band by `manage.py send_queued_emails`.
+    """
+    STATUS_PENDING = "pending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    to_email = models.EmailField()
+    from_email = models.CharField(max_length=254, blank=True)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.to_email}: {self.subject} [{self.status}]"
@@ -6,7 +6,7 @@ from django.utils.encoding import smart_bytes
 from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from django.db.models import Q
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 from django.conf import settings
 from django.utils.encoding import force_bytes
 
@@ -14,7 +14,8 @@ from django.utils.encoding import force_bytes
 
 from .models import Profile
 from .models import Follow
-from posts.models import Post 
+from .token_cache import CachedRefreshToken
+from posts.models import Post
 
 User = get_user_model()
 
@@ -119,6 +120,11 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         return super().validate(attrs)
 
 
+class CachedTokenRefreshSerializer(TokenRefreshSerializer):
+    """Token refresh that checks the blacklist through the in-process cache."""
+    token_class = CachedRefreshToken
+
+
 
 
 # -------------------------------------------------------------------
@@ -141,13 +147,20 @@ class ProfileSerializer(serializers.ModelSerializer):
 
 
 
+    # *_total annotations come from accounts.views.profiles_with_counts()
     def get_followers_count(self, obj):
-        return obj.followers_count   
+        if hasattr(obj, "followers_total"):
+            return obj.followers_total
+        return obj.followers_count
 
     def get_following_count(self, obj):
-        return obj.following_count   
+        if hasattr(obj, "following_total"):
+            return obj.following_total
+        return obj.following_count
 
     def get_posts_count(self, obj):
+        if hasattr(obj, "posts_total"):
+            return obj.posts_total
         return Post.objects.filter(author=obj.user).count()
     
 
@@ -183,12 +196,18 @@ class UserProfileSerializer(serializers.ModelSerializer):
 
 
     def get_followers_count(self, obj):
+        if hasattr(obj, "followers_total"):
+            return obj.followers_total
         return obj.followers_count
 
     def get_following_count(self, obj):
+        if hasattr(obj, "following_total"):
+            return obj.following_total
         return obj.following_count
 
     def get_posts_count(self, obj):
+        if hasattr(obj, "posts_total"):
+            return obj.posts_total
         return Post.objects.filter(author=obj.user).count()
 
 
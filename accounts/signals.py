@@ -18,3 +18,13 @@ def create_or_update_user_profile(sender, instance, created, **kwargs):
         
         Profile.objects.get_or_create(user=instance)
         instance.profile.save()
+
+
+# Post lists cache author username/avatar (posts.hydration); drop the entry
+# whenever either changes.
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Profile)
+def invalidate_post_author_cache(sender, instance, **kwargs):
+    from posts.hydration import invalidate_author
+
+    invalidate_author(instance.pk if sender is User else instance.user_id)
@@ -1,3 +1,186 @@
-from django.test import TestCase
+import smtplib
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .models import EmailOutbox
+from .token_cache import TokenBlacklistCache, blacklist_cache, CachedRefreshToken
+from .utils import deliver_outbox, queue_email
+
+User = get_user_model()
+
+
+class TokenBlacklistCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("tokens", "tokens@example.com", "pw-12345678", is_active=True)
+
+    def setUp(self):
+        blacklist_cache.reset()
+        self.addCleanup(blacklist_cache.reset)
+
+    def refresh(self, token):
+        return APIClient().post("/api/auth/token/refresh/", {"refresh": str(token)}, format="json")
+
+    def test_blacklisted_refresh_is_rejected(self):
+        token = CachedRefreshToken.for_user(self.user)
+        self.assertEqual(self.refresh(token).status_code, 200)
+        token.blacklist()
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_blacklist_from_another_worker_is_synced(self):
+        token = CachedRefreshToken.for_user(self.user)
+        jti = token["jti"]
+        cache = TokenBlacklistCache()
+        self.assertFalse(cache.is_blacklisted(jti))
+        token.blacklist()  # updates the global cache only
+        with override_settings(TOKEN_BLACKLIST_SYNC_SECONDS=0):
+            self.assertTrue(cache.is_blacklisted(jti))
+
+    def test_false_positive_falls_through_to_database_once(self):
+        cache = TokenBlacklistCache()
+        cache.rebuild()
+        cache._bloom.bits[:] = b"\xff" * len(cache._bloom.bits)  # every lookup is a filter hit
+        with self.assertNumQueries(1):
+            self.assertFalse(cache.is_blacklisted("not-a-blacklisted-jti"))
+        with self.assertNumQueries(0):
+            self.assertFalse(cache.is_blacklisted("not-a-blacklisted-jti"))
+
+    def test_rebuild_drops_pruned_tokens(self):
+        token = CachedRefreshToken.for_user(self.user)
+        token.blacklist()
+        jti = token["jti"]
+        cache = TokenBlacklistCache()
+        self.assertTrue(cache.is_blacklisted(jti))
+
+        BlacklistedToken.objects.all().delete()  # as prune_tokens would, once expired
+        self.assertTrue(cache.is_blacklisted(jti))  # until the next rebuild
+        with override_settings(TOKEN_BLACKLIST_REBUILD_SECONDS=0):
+            self.assertFalse(cache.is_blacklisted(jti))
+        self.assertNotIn(jti, cache._bloom)
+
+    @override_settings(TOKEN_BLACKLIST_BLOOM_CAPACITY=2)
+    def test_saturated_filter_is_rebuilt_larger(self):
+        cache = TokenBlacklistCache()
+        for _ in range(3):
+            token = CachedRefreshToken.for_user(self.user)
+            token.blacklist()
+            cache.add(token["jti"])
+        self.assertTrue(cache.is_blacklisted(token["jti"]))
+        self.assertEqual(cache._capacity, 6)
+
+
+class RejectingBackend(EmailBackend):
+    """locmem backend that refuses mail to addresses starting with "bad"."""
+
+    def send_messages(self, messages):
+        if any(to.startswith("bad") for message in messages for to in message.to):
+            raise smtplib.SMTPRecipientsRefused({})
+        return super().send_messages(messages)
+
+
+class UnreachableBackend(EmailBackend):
+    def open(self):
+        raise ConnectionRefusedError("SMTP server unreachable")
+
+
+@override_settings(
+    EMAIL_OUTBOX_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    EMAIL_OUTBOX_MAX_ATTEMPTS=2,
+    EMAIL_OUTBOX_BACKOFF_SECONDS=30,
+)
+class EmailOutboxTests(TestCase):
+    def make_due(self):
+        EmailOutbox.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+
+    def test_delivers_queued_mail(self):
+        queue_email("Hello", "Body", "someone@example.com")
+        self.assertEqual(deliver_outbox(), (1, 0))
+        self.assertEqual([m.to for m in mail.outbox], [["someone@example.com"]])
+        row = EmailOutbox.objects.get()
+        self.assertEqual((row.status, row.attempts), (EmailOutbox.STATUS_SENT, 1))
+        self.assertEqual(deliver_outbox(), (0, 0))
+
+    def test_failed_row_backs_off_then_gives_up(self):
+        queue_email("Hello", "Body", "good@example.com")
+        bad = queue_email("Hello", "Body", "bad@example.com")
+
+        before = timezone.now()
+        self.assertEqual(deliver_outbox(connection=RejectingBackend()), (1, 1))
+        bad.refresh_from_db()
+        self.assertEqual((bad.status, bad.attempts), (EmailOutbox.STATUS_PENDING, 1))
+        self.assertGreaterEqual(bad.next_attempt_at, before + timedelta(seconds=30))
+        self.assertTrue(bad.last_error)
+        self.assertEqual(deliver_outbox(connection=RejectingBackend()), (0, 0))  # not due yet
+
+        self.make_due()
+        self.assertEqual(deliver_outbox(connection=RejectingBackend()), (0, 1))
+        bad.refresh_from_db()
+        self.assertEqual((bad.status, bad.attempts), (EmailOutbox.STATUS_FAILED, 2))
+
+    def test_unreachable_server_backs_off_whole_batch(self):
+        queue_email("One", "Body", "one@example.com")
+        queue_email("Two", "Body", "two@example.com")
+        self.assertEqual(deliver_outbox(connection=UnreachableBackend()), (0, 2))
+        rows = EmailOutbox.objects.all()
+        self.assertEqual({(r.status, r.attempts) for r in rows}, {(EmailOutbox.STATUS_PENDING, 1)})
+        self.assertTrue(all("unreachable" in r.last_error for r in rows))
+        self.assertGreater(min(r.next_attempt_at for r in rows), timezone.now())
+
+        self.make_due()
+        self.assertEqual(deliver_outbox(), (2, 0))
+
+    def test_claimed_rows_are_hidden_from_other_senders(self):
+        queue_email("Hello", "Body", "someone@example.com")
+
+        class Observer(EmailBackend):
+            def send_messages(inner, messages):
+                # Another sender polling mid-batch finds nothing due.
+                self.assertEqual(deliver_outbox(), (0, 0))
+                return super().send_messages(messages)
+
+        self.assertEqual(deliver_outbox(connection=Observer()), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class ProfileConditionalGetTests(TestCase):
+    def test_profile_etag_revalidates_until_profile_changes(self):
+        user = User.objects.create_user("etag_profile", "ep@example.com", "pw-12345678", is_active=True)
+        client = APIClient()
+        url = f"/api/auth/by-username/{user.username}/"
+        etag = client.get(url)["ETag"]
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        user.profile.bio = "Now with a bio"
+        user.profile.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class AvatarUploadViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            User.objects.create_user("avatar", "avatar@example.com", "pw-12345678", is_active=True)
+        )
+
+    def test_options_returns_drf_metadata(self):
+        response = self.client.options("/api/auth/me/avatar/")
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["name"], "User Avatar Upload")
+        self.assertEqual(body["parses"], ["multipart/form-data", "application/x-www-form-urlencoded"])
+        self.assertIn("POST", response["Allow"])
+
+    def test_unsupported_method_is_drf_405(self):
+        response = self.client.put("/api/auth/me/avatar/")
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response.json(), {"detail": 'Method "PUT" not allowed.'})
+        self.assertEqual(response["Allow"], "POST, OPTIONS")
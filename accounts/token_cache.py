@@ -0,0 +1,232 @@
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Max
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (no false negatives)."""
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(int(capacity), 1)
+        self.num_bits = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.num_hashes = max(int(round(self.num_bits / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, value):
+        for pos in self._positions(value):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+
+class LRUCache:
+    """Small ordered-dict LRU used for jti -> is_blacklisted answers."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            return default
+        return self._data[key]
+
+    def set(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+
+class TokenBlacklistCache:
+    """
+    In-process front for SimpleJWT's blacklist table.
+
+    A Bloom filter answers "definitely not blacklisted" for the common case
+    without touching the database; positives are confirmed against an LRU and
+    then the DB. The filter is built lazily on first lookup (i.e. at worker
+    startup) from unexpired blacklisted tokens, and kept current by pulling
+    rows newer than the last seen id every TOKEN_BLACKLIST_SYNC_SECONDS, so
+    logouts handled by other workers are picked up too.
+
+    Expired tokens are never removed from a Bloom filter, so it is rebuilt
+    from the table every TOKEN_BLACKLIST_REBUILD_SECONDS, which drops what
+    prune_tokens deleted, and as soon as it holds more entries than it was
+    sized for. Its size is TOKEN_BLACKLIST_BLOOM_CAPACITY or twice the live
+    blacklist, whichever is larger. The database work happens outside
+    `_lock`; the lock only guards reading and swapping the filter state.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._bloom = None
+        self._lru = None
+        self._capacity = 0
+        self._count = 0
+        self._last_id = 0
+        self._last_sync = 0.0
+        self._built_at = 0.0
+        # jtis added while a rebuild is reading the table, replayed into the new filter.
+        self._added_during_rebuild = None
+
+    @property
+    def sync_interval(self):
+        return getattr(settings, "TOKEN_BLACKLIST_SYNC_SECONDS", 5)
+
+    @property
+    def rebuild_interval(self):
+        return getattr(settings, "TOKEN_BLACKLIST_REBUILD_SECONDS", 3600)
+
+    def rebuild(self):
+        with self._rebuild_lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        with self._lock:
+            self._added_during_rebuild = []
+        try:
+            # Rows committed after this max id are picked up by the next sync.
+            last_id = BlacklistedToken.objects.aggregate(m=Max("id"))["m"] or 0
+            rows = BlacklistedToken.objects.filter(id__lte=last_id, token__expires_at__gt=aware_utcnow())
+            jtis = list(rows.values_list("token__jti", flat=True).iterator(chunk_size=2000))
+            capacity = max(getattr(settings, "TOKEN_BLACKLIST_BLOOM_CAPACITY", 100_000), 2 * len(jtis))
+            bloom = BloomFilter(capacity)
+            for jti in jtis:
+                bloom.add(jti)
+        except BaseException:
+            with self._lock:
+                self._added_during_rebuild = None
+            raise
+
+        with self._lock:
+            lru = LRUCache(getattr(settings, "TOKEN_BLACKLIST_LRU_SIZE", 10_000))
+            for jti in self._added_during_rebuild:
+                bloom.add(jti)
+                lru.set(jti, True)
+            self._bloom, self._lru = bloom, lru
+            self._capacity = capacity
+            self._count = len(jtis) + len(self._added_during_rebuild)
+            self._last_id = last_id
+            self._last_sync = self._built_at = time.monotonic()
+            self._added_during_rebuild = None
+
+    def _rebuild_due(self, now):
+        return (
+            now - self._built_at >= self.rebuild_interval
+            or self._count > self._capacity
+        )
+
+    def _current(self):
+        """The filter to answer from, after a rebuild or sync if one is due."""
+        with self._lock:
+            bloom, last_id = self._bloom, self._last_id
+            now = time.monotonic()
+            rebuild_due = bloom is None or self._rebuild_due(now)
+            sync_due = now - self._last_sync >= self.sync_interval
+
+        if rebuild_due:
+            if bloom is None:
+                # Nothing to answer from yet: wait for whoever is building it.
+                with self._rebuild_lock:
+                    if self._bloom is None:
+                        self._rebuild()
+                return self._bloom
+            # Otherwise one thread rebuilds and the rest keep using the old filter.
+            if self._rebuild_lock.acquire(blocking=False):
+                try:
+                    self._rebuild()
+                finally:
+                    self._rebuild_lock.release()
+                return self._bloom
+
+        if not sync_due:
+            return bloom
+
+        new_rows = list(
+            BlacklistedToken.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "token__jti")
+        )
+        with self._lock:
+            # A rebuild may have swapped the filter in the meantime; its rows
+            # are already in the new one and anything later is synced next time.
+            if self._bloom is bloom:
+                for row_id, jti in new_rows:
+                    self._bloom.add(jti)
+                    self._lru.set(jti, True)
+                    self._last_id = max(self._last_id, row_id)
+                self._count += len(new_rows)
+                self._last_sync = time.monotonic()
+            return self._bloom
+
+    def add(self, jti):
+        """Record a freshly blacklisted jti (called on logout)."""
+        self._current()
+        with self._lock:
+            self._bloom.add(jti)
+            self._lru.set(jti, True)
+            self._count += 1
+            if self._added_during_rebuild is not None:
+                self._added_during_rebuild.append(jti)
+
+    def is_blacklisted(self, jti):
+        bloom = self._current()
+        if jti not in bloom:
+            return False
+
+        with self._lock:
+            cached = self._lru.get(jti)
+        if cached is not None:
+            return cached
+
+        result = BlacklistedToken.objects.filter(token__jti=jti).exists()
+        with self._lock:
+            self._lru.set(jti, result)
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+            self._lru = None
+            self._capacity = self._count = 0
+            self._last_id = 0
+            self._last_sync = self._built_at = 0.0
+
+
+blacklist_cache = TokenBlacklistCache()
+
+
+class CachedRefreshToken(RefreshToken):
+    """RefreshToken whose blacklist checks go through `blacklist_cache`."""
+
+    def check_blacklist(self):
+        if blacklist_cache.is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError("Token is blacklisted")
+
+    def blacklist(self):
+        result = super().blacklist()
+        blacklist_cache.add(self.payload[api_settings.JTI_CLAIM])
+        return result
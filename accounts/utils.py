@@ -1,9 +1,15 @@
-from django.core.mail import send_mail
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 
+from .models import EmailOutbox
+
 
 
 class EmailVerificationTokenGenerator(PasswordResetTokenGenerator):
@@ -30,13 +36,105 @@ def send_verification_email(user, request=None):
         f"If you didn’t register, just ignore this email."
     )
 
-    send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [user.email], fail_silently=False)
+    queue_email(subject, message, user.email)
 
     print("Email verification link for", user.email, ":", verify_url)
 
 
+# --------------------------
+# EMAIL OUTBOX
+# --------------------------
+
+def queue_email(subject, message, to_email, from_email=None):
+    """
+    Queue an email for background delivery. Call inside the transaction that
+    creates the related row so both commit (or roll back) together.
+    """
+    return EmailOutbox.objects.create(
+        to_email=to_email,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL or "",
+        subject=subject,
+        body=message,
+    )
 
 
-
-
-
+def _claim_outbox(batch_size):
+    """
+    Claim up to `batch_size` due rows in a short transaction and return them.
+    Claiming counts the attempt and pushes next_attempt_at out by
+    EMAIL_OUTBOX_CLAIM_SECONDS, so other workers skip the rows while they are
+    being sent, and a worker that dies mid-batch releases them when that
+    lease runs out.
+    """
+    lease = getattr(settings, "EMAIL_OUTBOX_CLAIM_SECONDS", 300)
+    with transaction.atomic():
+        rows = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status=EmailOutbox.STATUS_PENDING, next_attempt_at__lte=timezone.now())
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        if rows:
+            claimed_until = timezone.now() + timedelta(seconds=lease)
+            for row in rows:
+                row.attempts += 1
+                row.next_attempt_at = claimed_until
+            EmailOutbox.objects.bulk_update(rows, ["attempts", "next_attempt_at"])
+    return rows
+
+
+def _record_failure(row, error):
+    """Back off exponentially, or give up after EMAIL_OUTBOX_MAX_ATTEMPTS."""
+    max_attempts = getattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 5)
+    backoff = getattr(settings, "EMAIL_OUTBOX_BACKOFF_SECONDS", 30)
+    row.last_error = str(error)
+    if row.attempts >= max_attempts:
+        row.status = EmailOutbox.STATUS_FAILED
+    else:
+        row.next_attempt_at = timezone.now() + timedelta(seconds=backoff * 2 ** (row.attempts - 1))
+
+
+def deliver_outbox(batch_size=50, connection=None):
+    """
+    Send one batch of due outbox rows over a single reused connection.
+    Rows are claimed in a short transaction (see _claim_outbox) and sent
+    outside it, so no row locks are held during SMTP I/O. Failed rows are
+    retried with exponential backoff until EMAIL_OUTBOX_MAX_ATTEMPTS, then
+    marked failed; if the connection can't be opened at all, the whole
+    batch counts as failed. Returns (sent, failed).
+    """
+    sent = failed = 0
+    rows = _claim_outbox(batch_size)
+    if not rows:
+        return sent, failed
+
+    connection = connection or get_connection(
+        backend=getattr(settings, "EMAIL_OUTBOX_BACKEND", None) or None,
+        fail_silently=False,
+    )
+    try:
+        connection.open()
+    except Exception as e:
+        for row in rows:
+            _record_failure(row, e)
+        failed = len(rows)
+    else:
+        try:
+            for row in rows:
+                msg = EmailMessage(row.subject, row.body, row.from_email or None, [row.to_email])
+                try:
+                    # One message per call so a bad address only fails its own row;
+                    # the SMTP session itself stays open across the batch.
+                    connection.send_messages([msg])
+                except Exception as e:
+                    _record_failure(row, e)
+                    failed += 1
+                else:
+                    row.status = EmailOutbox.STATUS_SENT
+                    row.sent_at = timezone.now()
+                    row.last_error = ""
+                    sent += 1
+        finally:
+            connection.close()
+
+    EmailOutbox.objects.bulk_update(rows, ["status", "next_attempt_at", "last_error", "sent_at"])
+    return sent, failed
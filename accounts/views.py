@@ -1,22 +1,27 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
-from django.core.mail import send_mail
 from django.utils.encoding import force_str, force_bytes, smart_str
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.conf import settings
+from django.db import transaction
 from django.contrib.sites.shortcuts import get_current_site
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from rest_framework.decorators import api_view, permission_classes
-from django.db.models import Q
+from django.db.models import Q, Count, Exists, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from rest_framework.pagination import PageNumberPagination
 from rest_framework import serializers
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.contrib.auth.tokens import default_token_generator
-from .utils import send_verification_email, email_verification_token
+from .utils import send_verification_email, email_verification_token, queue_email
+from .token_cache import CachedRefreshToken
+from backend.throttling import UserTokenBucketThrottle, IPTokenBucketThrottle
+from backend.conditional import compute_etag, etag_matches, not_modified, set_validators
+from posts.models import Post
 
 
 import logging
@@ -40,13 +45,16 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.exceptions import PermissionDenied,  NotFound
 
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-from supabase import create_client
+from django.http import JsonResponse
 from uuid import uuid4
 import os
 
+from asgiref.sync import sync_to_async
+from backend.async_views import AsyncAPIView
+from posts.supabase_service import aupload
+
 
 
 from .models import Profile
@@ -71,16 +79,17 @@ class RegisterView(generics.CreateAPIView):
     serializer_class = UserRegisterSerializer
     permission_classes = [AllowAny]
     authentication_classes = []
+    throttle_classes = [IPTokenBucketThrottle]
+    throttle_scope = "register"
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)  
 
-        
-        user = serializer.save(is_active=False)
-
-        
-        send_verification_email(user, request)
+        # user row and its verification email commit together
+        with transaction.atomic():
+            user = serializer.save(is_active=False)
+            send_verification_email(user, request)
 
         logger.info("User registered (inactive): %s", user.username)
         return Response(
@@ -119,6 +128,8 @@ class DebugRegisterView(APIView):                #for debugging (prints link in
 class LoginView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
     permission_classes = [AllowAny]
+    throttle_classes = [IPTokenBucketThrottle]
+    throttle_scope = "login"
 
     def post(self, request, *args, **kwargs):
        
@@ -161,43 +172,27 @@ class VerifyEmailView(APIView):
 # --------------------------
 
 
-supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
-bucket = settings.SUPABASE_AVATAR_BUCKET
-
-class UserAvatarUploadView(APIView):
-    permission_classes = [IsAuthenticated]
-    parser_classes = [MultiPartParser, FormParser]
+class UserAvatarUploadView(AsyncAPIView):
+    """Async: the storage upload is awaited instead of holding a worker thread."""
+    parser_classes = (MultiPartParser, FormParser)
 
-    def post(self, request):
+    async def post(self, request):
         file_obj = request.FILES.get("avatar")
         if not file_obj:
-            return Response({"detail": "No file 'avatar' provided."}, status=400)
-
-        supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
-        bucket = settings.SUPABASE_AVATAR_BUCKET
+            return JsonResponse({"detail": "No file 'avatar' provided."}, status=400)
 
-        
         ext = os.path.splitext(file_obj.name)[1].lower()
         key = f"user_{request.user.id}/{uuid4().hex}{ext}"
+        # A large upload is spooled to a temp file; read it off the event loop.
+        data = await sync_to_async(file_obj.read)()
+        public_url = await aupload(settings.SUPABASE_AVATAR_BUCKET, key, data, file_obj.content_type)
 
-        
-        data = file_obj.read()
-        supabase.storage.from_(bucket).upload(
-            path=key,
-            file=data,
-            file_options={"contentType": file_obj.content_type, "upsert": "true"},
-        )
-
-        
-        public_url = supabase.storage.from_(bucket).get_public_url(key)
-
-        
-        profile = request.user.profile
+        profile = await Profile.objects.aget(user_id=request.user.id)
         profile.avatar_url = public_url
-        profile.save(update_fields=["avatar_url"])
+        await profile.asave(update_fields=["avatar_url"])
+
+        return JsonResponse({"avatar_url": public_url}, status=200)
 
-        return Response({"avatar_url": public_url}, status=200)
-    
 
 
 class UserProfileView(generics.RetrieveUpdateAPIView):
@@ -209,31 +204,48 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
         return self.request.user.profile
 
 
+def _count_subquery(qs, field):
+    return Coalesce(
+        Subquery(qs.filter(**{field: OuterRef("user")}).values(field).annotate(c=Count("*")).values("c")),
+        Value(0),
+    )
+
+
+def profiles_with_counts(viewer=None):
+    """
+    Profiles with follower/following/post totals fetched in the same query,
+    plus `viewer_follows` (does `viewer` follow this user?) when a viewer is given.
+    """
+    qs = Profile.objects.select_related("user").annotate(
+        followers_total=_count_subquery(Follow.objects.all(), "following"),
+        following_total=_count_subquery(Follow.objects.all(), "follower"),
+        # Hot posts only, like the post lists (archived ones are reachable by id).
+        posts_total=_count_subquery(Post.objects.all(), "author"),
+    )
+    if viewer is not None and viewer.is_authenticated:
+        qs = qs.annotate(viewer_follows=Exists(Follow.objects.filter(follower=viewer, following=OuterRef("user"))))
+    return qs
+
+
+def enforce_profile_visibility(profile, user):
+    """Raise PermissionDenied unless `user` may view `profile` (from profiles_with_counts(user))."""
+    if user is not None and user.is_authenticated and (user.id == profile.user_id or user.is_staff):
+        return
+    if profile.visibility == Profile.VIS_PRIVATE:
+        raise PermissionDenied("This profile is private.")
+    if profile.visibility == Profile.VIS_FOLLOWERS and not getattr(profile, "viewer_follows", False):
+        raise PermissionDenied("Followers only.")
+
+
 class PublicProfileView(generics.RetrieveAPIView):
-    queryset = Profile.objects.select_related("user")
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.AllowAny]
     lookup_url_kwarg = "user_id"
 
     def get_object(self):
         user_id = self.kwargs.get(self.lookup_url_kwarg)
-        profile = get_object_or_404(self.queryset, user__id=user_id)
-
-        
-        vis = profile.visibility
-        req_user = self.request.user if self.request.user.is_authenticated else None
-
-        if vis == Profile.VIS_PRIVATE:
-            if not req_user or req_user.id != profile.user_id and not req_user.is_staff:
-                raise PermissionDenied("This profile is private.")
-        elif vis == Profile.VIS_FOLLOWERS:
-            if not req_user:
-                raise PermissionDenied("Followers only.")
-            if req_user.id != profile.user_id and not req_user.is_staff:
-                is_follower = Follow.objects.filter(following=profile.user, follower=req_user).exists()
-                if not is_follower:
-                    raise PermissionDenied("Followers only.")
-
+        profile = get_object_or_404(profiles_with_counts(self.request.user), user__id=user_id)
+        enforce_profile_visibility(profile, self.request.user)
         return profile
 
 
@@ -256,6 +268,8 @@ FRONTEND_URL = getattr(settings, "FRONTEND_URL", "http://localhost:5173")
 
 class PasswordResetView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [IPTokenBucketThrottle]
+    throttle_scope = "password_reset"
 
     def post(self, request):
         serializer = PasswordResetSerializer(data=request.data)
@@ -275,11 +289,10 @@ class PasswordResetView(APIView):
         reset_link = f"{FRONTEND_URL}/reset-password/{uidb64}/{token}/"
 
         
-        send_mail(
+        queue_email(
             subject="Password Reset Request",
             message=f"Click the link to reset your password: {reset_link}",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[email],
+            to_email=email,
         )
         print("Password reset link:", reset_link)  
 
@@ -331,7 +344,7 @@ class LogoutView(APIView):
         serializer.is_valid(raise_exception=True)
 
         try:
-            token = RefreshToken(serializer.validated_data["refresh"])
+            token = CachedRefreshToken(serializer.validated_data["refresh"])
             token.blacklist()
             return Response({"message": "Logged out successfully"}, status=205)
         except Exception:
@@ -416,6 +429,8 @@ class SuggestedUsersView(ListAPIView):
 
 class FollowUserView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [UserTokenBucketThrottle]
+    throttle_scope = "follow"
 
     def post(self, request, user_id):
         try:
@@ -513,26 +528,23 @@ class PublicProfileByUsernameView(RetrieveAPIView):
     permission_classes = [AllowAny]
     serializer_class = ProfileSerializer  # public-safe fields
 
+    def retrieve(self, request, *args, **kwargs):
+        profile = self.get_object()
+        etag = compute_etag(
+            profile.pk, profile.bio, profile.avatar_url, profile.website, profile.location,
+            profile.visibility, profile.followers_total, profile.following_total,
+            profile.posts_total,
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        serializer = self.get_serializer(profile)
+        return set_validators(Response(serializer.data), etag)
+
     def get_object(self):
         username = self.kwargs.get("username")
         profile = get_object_or_404(
-            Profile.objects.select_related("user").filter(user__is_active=True),
+            profiles_with_counts(self.request.user).filter(user__is_active=True),
             user__username__iexact=username,
         )
-
-        # Enforce visibility (reuse your logic)
-        vis = profile.visibility
-        req_user = self.request.user if self.request.user.is_authenticated else None
-
-        if vis == Profile.VIS_PRIVATE:
-            if not req_user or (req_user.id != profile.user_id and not req_user.is_staff):
-                raise PermissionDenied("This profile is private.")
-        elif vis == Profile.VIS_FOLLOWERS:
-            if not req_user:
-                raise PermissionDenied("Followers only.")
-            if req_user.id != profile.user_id and not req_user.is_staff:
-                is_follower = Follow.objects.filter(following=profile.user, follower=req_user).exists()
-                if not is_follower:
-                    raise PermissionDenied("Followers only.")
-
+        enforce_profile_visibility(profile, self.request.user)
         return profile
\ No newline at end of file
@@ -0,0 +1,203 @@
+"""
+Chunked deletion of posts and users.
+
+Deleting a busy post or a heavy user through `instance.delete()` makes
+Django's collector load every dependent row into memory and remove them in
+one long transaction. Instead, callers *schedule* a deletion: the target is
+hidden at once and a DeletionJob is queued. `manage.py process_deletions`
+then removes dependents in bounded batches, each batch one SELECT of primary
+keys plus one raw `DELETE ... WHERE pk IN (...)` in its own short
+transaction, and only deletes the (by then childless) target through the ORM
+at the end. Every step re-queries what is left, so an interrupted job simply
+resumes.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts.models import Follow
+from notifications.models import Notification
+from posts.models import ArchivedComment, ArchivedLike, ArchivedPost, Comment, Like, Post
+from .models import DeletionJob
+from .moderation import refresh_comment_counters, refresh_like_counts, set_users_active
+from .stats import batched_bumps, bump, local_day
+
+User = get_user_model()
+
+
+def lease_seconds():
+    return getattr(settings, "DELETION_JOB_LEASE_SECONDS", 300)
+
+
+# ---- Scheduling ----
+
+def schedule_post_deletions(post_ids):
+    """Hide the posts and queue one job each; returns how many were newly scheduled."""
+    with transaction.atomic():
+        ids = list(
+            Post.objects.select_for_update()
+            .filter(id__in=post_ids, pending_deletion=False)
+            .values_list("id", flat=True)
+        )
+        Post.objects.filter(id__in=ids).update(is_active=False, pending_deletion=True, updated_at=timezone.now())
+        DeletionJob.objects.bulk_create([DeletionJob(kind=DeletionJob.KIND_POST, target_id=pk) for pk in ids])
+    return len(ids)
+
+
+def schedule_user_deletion(user_id):
+    """Deactivate the user (hiding their content, revoking tokens) and queue the job."""
+    set_users_active([user_id], active=False, include_staff=True)
+    job, _ = DeletionJob.objects.get_or_create(
+        kind=DeletionJob.KIND_USER, target_id=user_id, status=DeletionJob.STATUS_PENDING,
+    )
+    return job
+
+
+# ---- Batches ----
+
+def _delete_batch(queryset, batch_size, stat=None, order_by=("pk",), fields=()):
+    """
+    Delete up to `batch_size` rows of `queryset` with one raw DELETE, and
+    return the deleted rows as (pk, created_at, *fields) tuples. `stat`
+    names the DailyStat counter to decrement, since raw deletes bypass the
+    post_delete signals.
+    """
+    model = queryset.model
+    rows = list(queryset.order_by(*order_by).values_list("pk", "created_at", *fields)[:batch_size])
+    if not rows:
+        return rows
+
+    qn = connection.ops.quote_name
+    placeholders = ", ".join(["%s"] * len(rows))
+    sql = f"DELETE FROM {qn(model._meta.db_table)} WHERE {qn(model._meta.pk.column)} IN ({placeholders})"
+    with transaction.atomic(), batched_bumps():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [row[0] for row in rows])
+        if stat:
+            for row in rows:
+                bump(stat, local_day(row[1]), delta=-1)
+    return rows
+
+
+def _drain(step, queryset, batch_size, on_batch=None, **kwargs):
+    """Yield (step, count) per batch until `queryset` is empty."""
+    while rows := _delete_batch(queryset, batch_size, **kwargs):
+        if on_batch:
+            on_batch(rows)
+        yield step, len(rows)
+
+
+def _post_batches(post_id, batch_size):
+    yield from _drain("notifications", Notification.objects.filter(post_id=post_id), batch_size)
+    yield from _drain("likes", Like.objects.filter(post_id=post_id), batch_size, stat="likes")
+    # Deepest replies first, so no batch removes a parent whose children remain.
+    yield from _drain(
+        "comments", Comment.objects.filter(post_id=post_id), batch_size,
+        stat="comments", order_by=("-depth", "-pk"),
+    )
+    yield "posts", Post.objects.filter(pk=post_id).delete()[1].get(Post._meta.label, 0)
+
+
+def _archived_post_batches(post_id, batch_size):
+    # Archived rows (posts.archive) have no signals; bump the stats directly.
+    yield from _drain("likes", ArchivedLike.objects.filter(post_id=post_id), batch_size, stat="likes")
+    yield from _drain(
+        "comments", ArchivedComment.objects.filter(post_id=post_id), batch_size,
+        stat="comments", order_by=("-depth", "-pk"),
+    )
+    yield from _drain("posts", ArchivedPost.objects.filter(pk=post_id), batch_size, stat="posts")
+
+
+def _user_batches(user_id, batch_size):
+    own_posts = Post.objects.filter(author_id=user_id).order_by("pk").values_list("pk", flat=True)
+    while (post_id := own_posts.first()) is not None:
+        yield from _post_batches(post_id, batch_size)
+    own_archived = ArchivedPost.objects.filter(author_id=user_id).order_by("pk").values_list("pk", flat=True)
+    while (post_id := own_archived.first()) is not None:
+        yield from _archived_post_batches(post_id, batch_size)
+
+    yield from _drain(
+        "likes", Like.objects.filter(user_id=user_id), batch_size, stat="likes", fields=("post_id",),
+        on_batch=lambda rows: refresh_like_counts({row[2] for row in rows}),
+    )
+    yield from _drain(
+        "likes", ArchivedLike.objects.filter(user_id=user_id), batch_size, stat="likes", fields=("post_id",),
+        on_batch=lambda rows: refresh_like_counts({row[2] for row in rows}, ArchivedPost),
+    )
+
+    # Their comments on other people's posts, each with the replies under it.
+    for posts, comments in ((Post, Comment), (ArchivedPost, ArchivedComment)):
+        own_comments = comments.objects.filter(author_id=user_id).order_by("depth", "pk")
+        while (root := own_comments.values_list("pk", "path", "post_id", "parent_id").first()) is not None:
+            pk, path, post_id, parent_id = root
+            subtree = (
+                comments.objects.filter(post_id=post_id, path__startswith=path) if path
+                else comments.objects.filter(pk=pk)
+            )
+            yield from _drain("comments", subtree, batch_size, stat="comments", order_by=("-depth", "-pk"))
+            refresh_comment_counters({post_id}, {parent_id} if parent_id else set(), posts, comments)
+
+    yield from _drain("follows", Follow.objects.filter(Q(follower_id=user_id) | Q(following_id=user_id)), batch_size)
+    yield from _drain(
+        "notifications", Notification.objects.filter(Q(sender_id=user_id) | Q(recipient_id=user_id)), batch_size,
+    )
+    yield "users", User.objects.filter(pk=user_id).delete()[1].get(User._meta.label, 0)
+
+
+PIPELINES = {
+    DeletionJob.KIND_POST: _post_batches,
+    DeletionJob.KIND_USER: _user_batches,
+}
+
+
+# ---- Worker ----
+
+def claim_deletion_job():
+    """Lease the oldest runnable job, or return None."""
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            DeletionJob.objects.select_for_update(skip_locked=True)
+            .filter(status=DeletionJob.STATUS_PENDING)
+            .filter(Q(locked_until__isnull=True) | Q(locked_until__lte=now))
+            .order_by("created_at", "id")
+            .first()
+        )
+        if job:
+            job.attempts += 1
+            job.locked_until = now + timedelta(seconds=lease_seconds())
+            job.save(update_fields=["attempts", "locked_until", "updated_at"])
+    return job
+
+
+def run_deletion_job(job, batch_size=1000, progress=None):
+    """
+    Run `job` to completion, saving per-step counts after every batch (which
+    also renews the lease). Failures are recorded and the job retried later
+    until DELETION_JOB_MAX_ATTEMPTS.
+    """
+    max_attempts = getattr(settings, "DELETION_JOB_MAX_ATTEMPTS", 5)
+    try:
+        for step, count in PIPELINES[job.kind](job.target_id, batch_size):
+            job.progress[step] = job.progress.get(step, 0) + count
+            job.locked_until = timezone.now() + timedelta(seconds=lease_seconds())
+            job.save(update_fields=["progress", "locked_until", "updated_at"])
+            if progress:
+                progress(job)
+    except Exception as e:
+        job.last_error = str(e)
+        if job.attempts >= max_attempts:
+            job.status = DeletionJob.STATUS_FAILED
+        job.locked_until = timezone.now() + timedelta(seconds=lease_seconds())
+        job.save(update_fields=["last_error", "status", "locked_until", "updated_at"])
+        return False
+
+    job.status = DeletionJob.STATUS_DONE
+    job.locked_until = None
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "locked_until", "finished_at", "updated_at"])
+    return True
@@ -0,0 +1,13 @@
+import django_filters
+
+from posts.models import Post
+
+
+class AdminPostFilter(django_filters.FilterSet):
+    """Moderation list filters; each maps onto an index prefix on posts_post."""
+    created_after = django_filters.IsoDateTimeFilter(field_name="created_at", lookup_expr="gte")
+    created_before = django_filters.IsoDateTimeFilter(field_name="created_at", lookup_expr="lt")
+
+    class Meta:
+        model = Post
+        fields = ["author", "category", "is_active"]
@@ -0,0 +1,126 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+# Runs in a fresh interpreter so nothing is already imported.
+_SCRIPT = """
+import importlib, json, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+timings = {"django.setup()": time.perf_counter() - start}
+for name in sys.argv[1:]:
+    start = time.perf_counter()
+    importlib.import_module(name)
+    timings[name] = time.perf_counter() - start
+print(json.dumps(timings))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Report the import cost of each module loaded by a cold django.setup() "
+        "followed by importing the given modules (default: the URLconf, which "
+        "pulls in every view). Uses `python -X importtime` in a subprocess; "
+        "third-party modules are attributed to the project module that first "
+        "imported them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--module", action="append", default=[], metavar="NAME",
+            help="Import this after setup (repeatable; default ROOT_URLCONF).",
+        )
+        parser.add_argument("--top", type=int, default=25, help="Modules listed (default 25).")
+        parser.add_argument("--by-package", action="store_true", help="Also total self time per top-level package.")
+        parser.add_argument("--json", action="store_true", dest="as_json", help="Print the raw profile as JSON.")
+        parser.add_argument("--output", help="Write the report here instead of stdout.")
+
+    def handle(self, *args, module, top, by_package, as_json, output, **options):
+        modules = module or [settings.ROOT_URLCONF]
+        timings, imports = self.profile(modules)
+        if as_json:
+            report = self.to_json(timings, imports)
+        else:
+            report = self.render(timings, imports, top, by_package)
+        if output:
+            Path(output).write_text(report, encoding="utf-8")
+            self.stdout.write(self.style.SUCCESS(f"Wrote import profile of {len(imports)} modules to {output}."))
+        else:
+            self.stdout.write(report)
+
+    def profile(self, modules):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE}
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(settings.BASE_DIR), env.get("PYTHONPATH")]))
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _SCRIPT, *modules],
+            capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+        )
+        if proc.returncode:
+            raise CommandError(f"Profiling failed:\n{proc.stderr[-2000:]}")
+        # Settings or apps may print on startup; the timings are the last line.
+        timings = json.loads(proc.stdout.strip().splitlines()[-1])
+        return timings, self.parse(proc.stderr)
+
+    def parse(self, stderr):
+        """
+        importtime lines, in completion order (children before parents), to
+        {name: {"self_us", "cumulative_us", "via"}}. `via` is the nearest
+        project module up the import chain, or None.
+        """
+        project = {p.name for p in Path(settings.BASE_DIR).iterdir() if (p / "__init__.py").exists()}
+        entries = []
+        for line in stderr.splitlines():
+            m = _LINE.match(line)
+            if m:
+                entries.append((m[4], int(m[1]), int(m[2]), len(m[3]) // 2))
+
+        # A name can appear twice (e.g. re-imported after a failed import), so
+        # the tree is built over line indexes.
+        children, pending = defaultdict(list), []  # pending: (depth, index) awaiting their parent
+        for i, (_, _, _, depth) in enumerate(entries):
+            while pending and pending[-1][0] > depth:
+                children[i].append(pending.pop()[1])
+            pending.append((depth, i))
+
+        imports = {}
+        stack = [(i, None) for _, i in pending]
+        while stack:
+            i, via = stack.pop()
+            name, self_us, cumulative_us, _ = entries[i]
+            imports.setdefault(name, {"self_us": self_us, "cumulative_us": cumulative_us, "via": via})
+            mine = name if name.split(".")[0] in project else via
+            stack.extend((child, mine) for child in children[i])
+        return imports
+
+    def to_json(self, timings, imports):
+        return json.dumps({"timings_s": timings, "imports": imports}, indent=2) + "\n"
+
+    def render(self, timings, imports, top, by_package):
+        lines = [f"{step}: {seconds * 1000:.1f} ms" for step, seconds in timings.items()]
+        lines.append("")
+        lines.append(f"{'cumulative ms':>13s} {'self ms':>8s}  module (imported via)")
+        ranked = sorted(imports.items(), key=lambda kv: kv[1]["cumulative_us"], reverse=True)
+        for name, entry in ranked[:top]:
+            via = f"  ({entry['via']})" if entry["via"] and entry["via"] != name else ""
+            lines.append(f"{entry['cumulative_us'] / 1000:13.1f} {entry['self_us'] / 1000:8.1f}  {name}{via}")
+        if by_package:
+            packages = defaultdict(lambda: [0, 0])
+            for name, entry in imports.items():
+                packages[name.split(".")[0]][0] += entry["self_us"]
+                packages[name.split(".")[0]][1] += 1
+            lines.append("")
+            lines.append(f"{'self ms':>13s} {'modules':>8s}  package")
+            for package, (us, count) in sorted(packages.items(), key=lambda kv: kv[1][0], reverse=True)[:top]:
+                lines.append(f"{us / 1000:13.1f} {count:8d}  {package}")
+        return "\n".join(lines) + "\n"
+
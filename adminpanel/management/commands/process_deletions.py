@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from adminpanel.deletion import claim_deletion_job, run_deletion_job
+
+
+class Command(BaseCommand):
+    help = "Run queued post/user deletions, removing dependents in bounded batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per DELETE statement.")
+        parser.add_argument(
+            "--loop", action="store_true",
+            help="Keep running, polling for newly scheduled deletions.",
+        )
+        parser.add_argument("--interval", type=float, default=10.0)
+
+    def handle(self, *args, batch_size, loop, interval, **options):
+        done = failed = 0
+
+        def progress(job):
+            if options["verbosity"] > 1:
+                self.stdout.write(f"  {job.kind} {job.target_id}: {job.progress}")
+
+        while True:
+            job = claim_deletion_job()
+            if job is None:
+                if not loop:
+                    break
+                time.sleep(interval)
+                continue
+
+            self.stdout.write(f"Deleting {job.kind} {job.target_id} (attempt {job.attempts})")
+            if run_deletion_job(job, batch_size=batch_size, progress=progress):
+                done += 1
+                self.stdout.write(f"  done: {job.progress}")
+            else:
+                failed += 1
+                self.stderr.write(f"  failed: {job.last_error}")
+
+        self.stdout.write(self.style.SUCCESS(f"Finished {done} deletion jobs, {failed} failed."))
@@ -0,0 +1,101 @@
+import json
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+
+class Command(BaseCommand):
+    help = (
+        "Summarize backend.query_detector findings per view: query counts, "
+        "likely N+1 templates and slow queries. With --probe, first requests "
+        "the given paths with the detector on and reports on those."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", help="Detector log (default QUERY_DETECTOR_REPORT_PATH).")
+        parser.add_argument(
+            "--probe", action="append", default=[], metavar="URL",
+            help="GET this path with detection on before reporting (repeatable).",
+        )
+        parser.add_argument("--user", help="Username to authenticate --probe requests as.")
+        parser.add_argument("--top", type=int, default=5, help="Templates/slow queries listed per view (default 5).")
+        parser.add_argument("--output", help="Write the report here instead of stdout.")
+
+    def handle(self, *args, path, probe, user, top, output, **options):
+        path = path or getattr(settings, "QUERY_DETECTOR_REPORT_PATH", "")
+        if not path:
+            raise CommandError("Set QUERY_DETECTOR_REPORT_PATH or pass --path.")
+        if probe:
+            self.probe(probe, user, path)
+
+        try:
+            with open(path, encoding="utf-8") as fh:
+                entries = [json.loads(line) for line in fh if line.strip()]
+        except FileNotFoundError:
+            raise CommandError(f"No detector log at {path}.")
+
+        report = self.render(self.summarize(entries), top)
+        if output:
+            Path(output).write_text(report, encoding="utf-8")
+            self.stdout.write(self.style.SUCCESS(f"Wrote report for {len(entries)} requests to {output}."))
+        else:
+            self.stdout.write(report)
+
+    def probe(self, urls, username, path):
+        client = APIClient()
+        if username:
+            try:
+                client.force_authenticate(get_user_model().objects.get(username=username))
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"No user {username!r}.")
+        with override_settings(
+            QUERY_DETECTOR_ENABLED=True,
+            QUERY_DETECTOR_REPORT_PATH=path,
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+        ):
+            for url in urls:
+                response = client.get(url)
+                self.stdout.write(f"GET {url} -> {response.status_code}")
+
+    def summarize(self, entries):
+        views = defaultdict(lambda: {
+            "requests": 0, "queries": 0, "max_queries": 0, "db_ms": 0.0,
+            "repeated": {}, "slow": [],
+        })
+        for entry in entries:
+            view = views[f"{entry['method']} {entry['view']}"]
+            view["requests"] += 1
+            view["queries"] += entry["queries"]
+            view["max_queries"] = max(view["max_queries"], entry["queries"])
+            view["db_ms"] += entry["db_ms"]
+            for item in entry["repeated"]:
+                seen = view["repeated"].setdefault(
+                    item["template"], {"requests": 0, "max_count": 0, "stack": item["stack"]},
+                )
+                seen["requests"] += 1
+                seen["max_count"] = max(seen["max_count"], item["count"])
+            view["slow"].extend(entry["slow"])
+        # Worst offenders first.
+        return sorted(views.items(), key=lambda kv: (len(kv[1]["repeated"]), kv[1]["max_queries"]), reverse=True)
+
+    def render(self, views, top):
+        lines = []
+        for name, view in views:
+            n = view["requests"]
+            lines.append(
+                f"{name}: {n} request(s), {view['queries'] / n:.1f} queries avg, "
+                f"{view['max_queries']} max, {view['db_ms'] / n:.1f} ms DB avg"
+            )
+            repeated = sorted(view["repeated"].items(), key=lambda kv: kv[1]["max_count"], reverse=True)
+            for template, seen in repeated[:top]:
+                lines.append(f"  N+1? up to {seen['max_count']}x in {seen['requests']} request(s): {template}")
+                lines.extend(f"      at {frame}" for frame in seen["stack"][-3:])
+            for item in sorted(view["slow"], key=lambda s: s["ms"], reverse=True)[:top]:
+                lines.append(f"  slow {item['ms']:.1f} ms: {item['sql'][:200]}")
+                lines.extend(f"      at {frame}" for frame in item["stack"][-3:])
+        return "\n".join(lines) + "\n" if lines else "No requests recorded.\n"
@@ -0,0 +1,34 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from adminpanel.stats import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute DailyStat rollups from the source tables. Signals keep them "
+        "current; run this periodically (e.g. nightly with --days 2) to repair "
+        "drift, or with --all to backfill."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=2, help="Rebuild the last N days (default 2).")
+        parser.add_argument("--start", type=date.fromisoformat, help="First day (YYYY-MM-DD).")
+        parser.add_argument("--end", type=date.fromisoformat, help="Last day (YYYY-MM-DD), default today.")
+        parser.add_argument("--all", action="store_true", dest="rebuild_all", help="Rebuild from the first signup onwards.")
+
+    def handle(self, *args, days, start, end, rebuild_all, **options):
+        end = end or timezone.localdate()
+        if rebuild_all:
+            first = get_user_model().objects.aggregate(m=Min("date_joined"))["m"]
+            start = timezone.localdate(first) if first else end
+        start = start or end - timedelta(days=days - 1)
+        if start > end:
+            raise CommandError("--start must be on or before --end.")
+
+        rows = rebuild_daily_stats(start, end)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} daily rows for {start}..{end}."))
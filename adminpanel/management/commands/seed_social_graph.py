@@ -0,0 +1,63 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from adminpanel.seeding import generate_social_graph
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic power-law social graph (users, profiles, follows, "
+        "posts, likes, comments, notifications) for load testing. Rows are "
+        "streamed in chunks with COPY on PostgreSQL and multi-row INSERTs "
+        "elsewhere, bypassing model signals; counters and scores are written "
+        "with each post and daily stats rebuilt at the end. Output is "
+        "deterministic for a given --seed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, required=True)
+        parser.add_argument("--follows", type=float, default=30, help="Mean follows per user (default 30).")
+        parser.add_argument("--posts", type=float, default=5, help="Mean posts per user (default 5).")
+        parser.add_argument("--likes", type=float, default=8, help="Mean likes per post (default 8).")
+        parser.add_argument("--comments", type=float, default=2, help="Mean top-level comments per post (default 2).")
+        parser.add_argument("--reply-ratio", type=float, default=0.3, help="Chance of each further reply (default 0.3).")
+        parser.add_argument("--alpha", type=float, default=1.1, help="Zipf exponent of user popularity (default 1.1).")
+        parser.add_argument("--days", type=int, default=90, help="Length of the activity window (default 90).")
+        parser.add_argument("--until", type=date.fromisoformat, help="Last day of the window (YYYY-MM-DD), default today.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--prefix", default="seed", help="Username/email prefix (default 'seed').")
+        parser.add_argument("--password", help="Password for every generated account (default: unusable).")
+        parser.add_argument("--method", choices=["copy", "insert"], help="Default: copy on PostgreSQL, else insert.")
+        parser.add_argument("--no-notifications", action="store_false", dest="notifications")
+        parser.add_argument("--skip-stats", action="store_false", dest="stats", help="Don't rebuild DailyStat rollups.")
+
+    def handle(self, *args, users, chunk_size, method, **options):
+        if users < 1 or chunk_size < 1:
+            raise CommandError("--users and --chunk-size must be positive.")
+        if method == "copy" and connection.vendor != "postgresql":
+            raise CommandError("--method copy needs PostgreSQL.")
+
+        counts = generate_social_graph(
+            users=users,
+            follows=options["follows"],
+            posts=options["posts"],
+            likes=options["likes"],
+            comments=options["comments"],
+            reply_ratio=options["reply_ratio"],
+            alpha=options["alpha"],
+            days=options["days"],
+            until=options["until"],
+            seed=options["seed"],
+            chunk_size=chunk_size,
+            notifications=options["notifications"],
+            method=method,
+            prefix=options["prefix"],
+            password=options["password"],
+            stats=options["stats"],
+            progress=lambda label, count: self.stdout.write(f"  {label}: {count}"),
+        )
+        summary = ", ".join(f"{n} {table}" for table, n in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Created {summary}."))
@@ -0,0 +1,39 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from adminpanel.moderation import set_users_active
+
+
+class Command(BaseCommand):
+    help = (
+        "Deactivate (default) or reactivate many users at once, hiding or "
+        "restoring their posts and comments in chunks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ids", type=int, nargs="+", default=[], help="User ids.")
+        parser.add_argument("--ids-file", type=Path, help="File with one user id per line.")
+        parser.add_argument("--activate", action="store_true", help="Reactivate instead of deactivating.")
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument("--include-staff", action="store_true")
+
+    def handle(self, *args, ids, ids_file, activate, chunk_size, include_staff, **options):
+        user_ids = list(ids)
+        if ids_file:
+            try:
+                user_ids += [int(line) for line in ids_file.read_text().split() if line.strip()]
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Could not read ids from {ids_file}: {exc}")
+        if not user_ids:
+            raise CommandError("Pass --ids and/or --ids-file.")
+
+        def progress(done, total, totals):
+            self.stdout.write(f"{done}/{total} users processed ({dict(totals)})")
+
+        totals = set_users_active(
+            user_ids, active=activate, chunk_size=chunk_size,
+            include_staff=include_staff, progress=progress,
+        )
+        verb = "Activated" if activate else "Deactivated"
+        self.stdout.write(self.style.SUCCESS(f"{verb}: {dict(totals)}"))
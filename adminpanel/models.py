@@ -1,3 +1,66 @@
 from django.db import models
 
-# Create your models here.
+
+class DailyStat(models.Model):
+    """
+    One row per (local) day of site activity, maintained incrementally by
+    adminpanel.signals and repairable with `manage.py rollup_stats`.
+
+    signups/posts/likes/comments count rows created that day that still
+    exist (deletes decrement the creation day), so summing a column over all
+    days gives the current table total. active_users counts distinct users
+    whose first login of the day fell on that date.
+    """
+    date = models.DateField(unique=True)
+    signups = models.PositiveIntegerField(default=0)
+    posts = models.PositiveIntegerField(default=0)
+    likes = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+    active_users = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["date"]
+
+    def __str__(self):
+        return f"Stats for {self.date}"
+
+
+class DeletionJob(models.Model):
+    """
+    A post or user queued for removal. The target is hidden when the job is
+    created; `manage.py process_deletions` then deletes its dependents in
+    bounded batches (see adminpanel.deletion), recording per-table counts in
+    `progress` as it goes.
+    """
+    KIND_POST = "post"
+    KIND_USER = "user"
+    KIND_CHOICES = [(KIND_POST, "Post"), (KIND_USER, "User")]
+
+    STATUS_PENDING = "pending"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    target_id = models.PositiveBigIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    progress = models.JSONField(default=dict, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # Lease held by the worker running the job; expired leases are picked up again.
+    locked_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"Delete {self.kind} {self.target_id} ({self.status})"
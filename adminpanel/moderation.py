@@ -0,0 +1,131 @@
+"""
+Bulk user deactivation/activation.
+
+Deactivating a user also hides what they published: their active posts and
+comments are set is_active=False and flagged `author_suspended`, unread
+notifications they sent are dropped, and their refresh tokens are
+blacklisted. Reactivating restores only the rows flagged here, so content a
+moderator hid for other reasons stays hidden. Archived posts and comments
+(posts.archive) are covered too.
+
+Users are processed in chunks, each chunk in its own transaction with a
+fixed number of UPDATE/DELETE statements regardless of how much content the
+users have.
+"""
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from accounts.token_cache import blacklist_cache
+from notifications.models import Notification
+from posts.hydration import invalidate_authors
+from posts.models import ArchivedComment, ArchivedPost, Comment, Post
+
+User = get_user_model()
+
+
+def _active_count(field, comments=Comment):
+    return Coalesce(
+        Subquery(
+            comments.objects.active().filter(**{field: OuterRef("pk")})
+            .values(field).annotate(c=Count("*")).values("c")
+        ),
+        Value(0),
+    )
+
+
+def refresh_comment_counters(post_ids, parent_ids, posts=Post, comments=Comment):
+    """
+    Recount comment_count/reply_count for rows whose comments changed. Pass
+    posts=ArchivedPost, comments=ArchivedComment for archived rows.
+    """
+    if post_ids:
+        posts.objects.filter(id__in=post_ids).update(comment_count=_active_count("post", comments), score_stale=True)
+    if parent_ids:
+        comments.objects.filter(id__in=parent_ids).update(reply_count=_active_count("parent", comments))
+
+
+def _set_content_visibility(user_ids, active):
+    counts = Counter()
+    # Archived content (posts.archive) is hidden and restored the same way.
+    for post_model, comment_model in ((Post, Comment), (ArchivedPost, ArchivedComment)):
+        if active:
+            posts = post_model.objects.filter(author_id__in=user_ids, author_suspended=True)
+            comments = comment_model.objects.filter(author_id__in=user_ids, author_suspended=True)
+        else:
+            posts = post_model.objects.filter(author_id__in=user_ids, is_active=True)
+            comments = comment_model.objects.filter(author_id__in=user_ids, is_active=True)
+
+        affected = set(comments.values_list("post_id", "parent_id"))
+        counts["posts"] += posts.update(is_active=active, author_suspended=not active, updated_at=timezone.now())
+        counts["comments"] += comments.update(is_active=active, author_suspended=not active)
+        refresh_comment_counters(
+            {post_id for post_id, _ in affected},
+            {parent_id for _, parent_id in affected if parent_id},
+            post_model, comment_model,
+        )
+    return counts
+
+
+def refresh_like_counts(post_ids, posts=Post):
+    if post_ids:
+        likes = posts._meta.get_field("likes").related_model
+        likes = likes.objects.filter(post=OuterRef("pk")).values("post").annotate(c=Count("*")).values("c")
+        posts.objects.filter(id__in=post_ids).update(like_count=Coalesce(Subquery(likes), Value(0)), score_stale=True)
+
+
+def _revoke_refresh_tokens(user_ids):
+    tokens = list(
+        OutstandingToken.objects.filter(
+            user_id__in=user_ids, expires_at__gt=aware_utcnow(), blacklistedtoken__isnull=True,
+        ).values_list("id", "jti")
+    )
+    BlacklistedToken.objects.bulk_create(
+        [BlacklistedToken(token_id=pk) for pk, _ in tokens], ignore_conflicts=True,
+    )
+
+    def update_cache():
+        for _, jti in tokens:
+            blacklist_cache.add(jti)
+
+    transaction.on_commit(update_cache)
+    return len(tokens)
+
+
+def set_users_active(user_ids, active, chunk_size=500, include_staff=False, progress=None):
+    """
+    Activate or deactivate `user_ids` and cascade to their content.
+
+    Staff and superusers are skipped unless `include_staff`. `progress`, if
+    given, is called as progress(done, total, totals) after each chunk.
+    Returns a Counter of affected users/posts/comments/notifications/tokens.
+    """
+    user_ids = sorted(set(user_ids))
+    totals = Counter()
+
+    for start in range(0, len(user_ids), chunk_size):
+        targets = User.objects.filter(id__in=user_ids[start:start + chunk_size])
+        if not include_staff:
+            targets = targets.filter(is_staff=False, is_superuser=False)
+
+        with transaction.atomic():
+            chunk = list(targets.select_for_update().values_list("id", flat=True))
+            totals["users"] += User.objects.filter(id__in=chunk).exclude(is_active=active).update(is_active=active)
+            totals.update(_set_content_visibility(chunk, active))
+            if not active:
+                totals["notifications"] += Notification.objects.filter(
+                    sender_id__in=chunk, is_read=False,
+                ).delete()[0]
+                totals["tokens"] += _revoke_refresh_tokens(chunk)
+
+        invalidate_authors(chunk)
+        if progress:
+            progress(min(start + chunk_size, len(user_ids)), len(user_ids), totals)
+
+    return totals
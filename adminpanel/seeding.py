@@ -0,0 +1,258 @@
+"""
+Synthetic social graph generator (`manage.py seed_social_graph`).
+
+Rows are generated as plain tuples in chunks and written straight to the
+tables: COPY on PostgreSQL, multi-row INSERTs elsewhere. Model save(),
+bulk_create() and post_save handlers are bypassed, so per-row profile
+creation, notifications, stat rollups and comment path bookkeeping do not
+run. Their rows are generated here instead: a profile per user,
+notifications for follows, likes and comments, materialized comment paths.
+Primary keys are allocated up front, after the current maximum, so children
+can point at parents within the same chunk without a round trip. Sequences
+are reset at the end.
+
+The graph is power-law shaped. Who gets followed and who likes is drawn from
+Zipf weights over users, and per-user/per-post counts are exponential around
+the requested means. Denormalized counters (like_count, comment_count,
+reply_count) and ranking scores are filled in from the generated children,
+and DailyStat rollups are rebuilt once everything is written.
+
+The output is deterministic for a given seed, `until` date and starting
+primary keys.
+"""
+import csv
+import io
+import itertools
+import random
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import DateTimeField, Max
+from django.utils import timezone
+
+from accounts.models import Follow, Profile
+from notifications.models import Notification
+from posts.models import Comment, Like, Post
+from posts.ranking import top_score, trending_score
+from .stats import rebuild_daily_stats
+
+User = get_user_model()
+
+CATEGORIES = ("general", "general", "general", "question", "announcement")
+VISIBILITIES = [Profile.VIS_PUBLIC] * 16 + [Profile.VIS_FOLLOWERS] * 3 + [Profile.VIS_PRIVATE]
+WORDS = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor".split()
+
+
+class TableWriter:
+    """Writes dicts keyed by field attname to one model's table, filling defaults."""
+
+    def __init__(self, model, method):
+        self.model = model
+        self.method = method
+        self.fields = [
+            (f.attname, f.get_default(), isinstance(f, DateTimeField))
+            for f in model._meta.concrete_fields
+        ]
+        qn = connection.ops.quote_name
+        self.table = qn(model._meta.db_table)
+        self.columns = ", ".join(qn(f.column) for f in model._meta.concrete_fields)
+        self.adapt = connection.ops.adapt_datetimefield_value
+        self.written = 0
+
+    def _tuple(self, row):
+        adapt = self.adapt
+        return tuple(
+            adapt(row.get(name, default)) if is_dt else row.get(name, default)
+            for name, default, is_dt in self.fields
+        )
+
+    def write(self, rows):
+        if not rows:
+            return
+        values = [self._tuple(row) for row in rows]
+        with connection.cursor() as cursor:
+            if self.method == "copy":
+                self._copy(cursor.cursor, values)
+            else:
+                placeholders = ", ".join(["%s"] * len(self.fields))
+                cursor.executemany(f"INSERT INTO {self.table} ({self.columns}) VALUES ({placeholders})", values)
+        self.written += len(values)
+
+    def _copy(self, raw, values):
+        sql = f"COPY {self.table} ({self.columns}) FROM STDIN"
+        if hasattr(raw, "copy"):  # psycopg 3
+            with raw.copy(sql) as copy:
+                for row in values:
+                    copy.write_row(row)
+        else:  # psycopg2
+            buf = io.StringIO()
+            csv.writer(buf).writerows(["\\N" if v is None else v for v in row] for row in values)
+            buf.seek(0)
+            raw.copy_expert(f"{sql} WITH (FORMAT csv, NULL '\\N')", buf)
+
+
+def zipf_cum_weights(n, alpha, rng):
+    """Cumulative popularity weights 1/rank**alpha, ranks shuffled over n users."""
+    ranks = list(range(1, n + 1))
+    rng.shuffle(ranks)
+    return list(itertools.accumulate(1 / r ** alpha for r in ranks))
+
+
+def _next_id(model):
+    return (model.objects.aggregate(m=Max("pk"))["m"] or 0) + 1
+
+
+def _chunks(start, stop, size):
+    for lo in range(start, stop, size):
+        yield range(lo, min(lo + size, stop))
+
+
+def _between(rng, start, end):
+    return start + (end - start) * rng.random()
+
+
+def generate_social_graph(
+    *, users, follows=30, posts=5, likes=8, comments=2, reply_ratio=0.3, alpha=1.1,
+    days=90, until=None, seed=0, chunk_size=5000, notifications=True, method=None,
+    prefix="seed", password=None, stats=True, progress=None,
+):
+    """
+    Create `users` users and their graph. follows/posts/likes/comments are
+    means: follows and posts per user, likes and top-level comments per post.
+    `until` (a date, default today) ends the `days`-long activity window.
+    Accounts get `password`, or an unusable one when it is None. With
+    `stats`, DailyStat rollups for the window are rebuilt afterwards.
+    Returns a dict of rows written per table.
+    """
+    rng = random.Random(seed)
+    method = method or ("copy" if connection.vendor == "postgresql" else "insert")
+    writers = {m: TableWriter(m, method) for m in (User, Profile, Follow, Post, Like, Comment, Notification)}
+    report = progress or (lambda label, count: None)
+
+    end = timezone.make_aware(datetime.combine((until or timezone.localdate()) + timedelta(days=1), time.min))
+    end = end.astimezone(dt_timezone.utc)  # cheap to adapt for the database
+    start = end - timedelta(days=days)
+    ids = {m: itertools.count(_next_id(m)) for m in writers}
+    first_user = next(ids[User])
+    user_ids = range(first_user, first_user + users)
+    password = make_password(password)  # hashed once, shared by every account
+    joined = {}
+
+    # Users and profiles.
+    for chunk in _chunks(user_ids.start, user_ids.stop, chunk_size):
+        user_rows, profile_rows = [], []
+        for uid in chunk:
+            joined[uid] = _between(rng, start, end - (end - start) / 4)
+            user_rows.append({
+                "id": uid, "username": f"{prefix}{uid}", "email": f"{prefix}{uid}@example.com",
+                "password": password, "is_active": True, "date_joined": joined[uid],
+            })
+            profile_rows.append({"id": next(ids[Profile]), "user_id": uid, "visibility": rng.choice(VISIBILITIES)})
+        with transaction.atomic():
+            writers[User].write(user_rows)
+            writers[Profile].write(profile_rows)
+        report("users", writers[User].written)
+
+    cum = zipf_cum_weights(users, alpha, rng)
+
+    def popular(k):
+        return rng.choices(user_ids, cum_weights=cum, k=k)
+
+    # Follows: in-degree follows popularity.
+    for chunk in _chunks(user_ids.start, user_ids.stop, chunk_size):
+        follow_rows, note_rows = [], []
+        for uid in chunk:
+            for target in sorted(set(popular(int(rng.expovariate(1 / follows)) + 1)) - {uid}) if follows else ():
+                at = _between(rng, max(joined[uid], joined[target]), end)
+                follow_rows.append({"id": next(ids[Follow]), "follower_id": uid, "following_id": target, "created_at": at})
+                if notifications:
+                    note_rows.append({
+                        "id": next(ids[Notification]), "recipient_id": target, "sender_id": uid,
+                        "notification_type": "follow", "message": f"{prefix}{uid} started following you",
+                        "is_read": rng.random() < 0.7, "created_at": at,
+                    })
+        with transaction.atomic():
+            writers[Follow].write(follow_rows)
+            writers[Notification].write(note_rows)
+        report("follows", writers[Follow].written)
+
+    # Posts, with their likes, comment threads and notifications. Counters
+    # and ranking scores are computed from the rows generated alongside each
+    # post, so they are exact without a recount pass.
+    for chunk in _chunks(user_ids.start, user_ids.stop, max(1, chunk_size // max(1, int(posts)))):
+        post_rows, like_rows, comment_rows, note_rows = [], [], [], []
+        for author in chunk:
+            for _ in range(int(rng.expovariate(1 / posts)) if posts else 0):
+                post_id = next(ids[Post])
+                created = _between(rng, joined[author], end)
+                post = {
+                    "id": post_id, "author_id": author, "created_at": created, "updated_at": created,
+                    "content": " ".join(rng.choices(WORDS, k=rng.randint(3, 40))),
+                    "category": rng.choice(CATEGORIES),
+                }
+                activity = []
+                for liker in sorted(set(popular(int(rng.expovariate(1 / likes)))) if likes else ()):
+                    at = _between(rng, created, end)
+                    like_rows.append({"id": next(ids[Like]), "post_id": post_id, "user_id": liker, "created_at": at})
+                    activity.append(("like", liker, at, "liked your post"))
+                threads = []
+                for _ in range(int(rng.expovariate(1 / comments)) if comments else 0):
+                    cid, commenter = next(ids[Comment]), rng.choice(user_ids)
+                    at = _between(rng, created, end)
+                    thread = {
+                        "id": cid, "post_id": post_id, "author_id": commenter, "path": f"{cid:010d}/",
+                        "content": " ".join(rng.choices(WORDS, k=rng.randint(2, 20))), "created_at": at,
+                    }
+                    threads.append(thread)
+                    comment_rows.append(thread)
+                    activity.append(("comment", commenter, at, "commented on your post"))
+                for parent in threads:
+                    replies = 0
+                    while rng.random() < reply_ratio:
+                        cid, commenter = next(ids[Comment]), rng.choice(user_ids)
+                        at = _between(rng, parent["created_at"], end)
+                        comment_rows.append({
+                            "id": cid, "post_id": post_id, "author_id": commenter, "parent_id": parent["id"],
+                            "path": f"{parent['path']}{cid:010d}/", "depth": 1,
+                            "content": " ".join(rng.choices(WORDS, k=rng.randint(2, 20))), "created_at": at,
+                        })
+                        activity.append(("comment", commenter, at, "commented on your post"))
+                        replies += 1
+                    parent["reply_count"] = replies
+
+                like_count = sum(kind == "like" for kind, *_ in activity)
+                comment_count = len(activity) - like_count
+                post.update(
+                    like_count=like_count, comment_count=comment_count,
+                    top_score=top_score(like_count, comment_count),
+                    trending_score=trending_score(like_count, comment_count, created),
+                    score_stale=False,
+                )
+                post_rows.append(post)
+                if notifications:
+                    note_rows.extend(
+                        {
+                            "id": next(ids[Notification]), "recipient_id": author, "sender_id": sender,
+                            "notification_type": kind, "post_id": post_id, "message": f"{prefix}{sender} {text}",
+                            "is_read": rng.random() < 0.7, "created_at": at,
+                        }
+                        for kind, sender, at, text in activity if sender != author
+                    )
+        with transaction.atomic():
+            writers[Post].write(post_rows)
+            writers[Like].write(like_rows)
+            writers[Comment].write(comment_rows)
+            writers[Notification].write(note_rows)
+        report("posts", writers[Post].written)
+
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), list(writers)):
+            cursor.execute(sql)
+
+    if stats:
+        # Signals were bypassed, so the rollups never saw these rows.
+        rebuild_daily_stats(timezone.localdate(start), timezone.localdate(end - timedelta(days=1)))
+    return {m._meta.model_name: w.written for m, w in writers.items()}
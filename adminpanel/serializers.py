@@ -1,8 +1,12 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 
 from posts.models import Post
 from notifications.models import Notification
+from .models import DailyStat, DeletionJob
 
 User = get_user_model()
 
@@ -14,13 +18,80 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ["id", "username", "email", "first_name", "last_name", "is_active", "is_staff"]
 
 
+class UserBulkActionSerializer(serializers.Serializer):
+    MAX_IDS = 1000
+
+    action = serializers.ChoiceField(choices=["deactivate", "activate"])
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=MAX_IDS,
+    )
+
+
 # -------------------- POST SERIALIZER --------------------
 class PostSerializer(serializers.ModelSerializer):
     author = serializers.StringRelatedField(read_only=True)
 
     class Meta:
         model = Post
-        fields = ["id", "author", "content", "created_at", "updated_at"]
+        fields = ["id", "author", "content", "category", "is_active", "created_at", "updated_at"]
+
+
+_datetime_field = serializers.DateTimeField()
+
+
+def post_row_to_representation(row):
+    """PostSerializer output from a posts.hydration row."""
+    return {
+        "id": row["id"],
+        "author": row["author__username"],
+        "content": row["content"],
+        "category": row["category"],
+        "is_active": row["is_active"],
+        "created_at": _datetime_field.to_representation(row["created_at"]),
+        "updated_at": _datetime_field.to_representation(row["updated_at"]),
+    }
+
+
+class PostBulkActionSerializer(serializers.Serializer):
+    MAX_IDS = 500
+
+    action = serializers.ChoiceField(choices=["deactivate", "activate", "delete"])
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=MAX_IDS,
+    )
+
+
+class DeletionJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DeletionJob
+        fields = [
+            "id", "kind", "target_id", "status", "progress", "attempts",
+            "last_error", "created_at", "updated_at", "finished_at",
+        ]
+
+
+# -------------------- STATS SERIALIZERS --------------------
+class DailyStatSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DailyStat
+        fields = ["date", "signups", "posts", "likes", "comments", "active_users"]
+
+
+class StatsRangeSerializer(serializers.Serializer):
+    """?start=&end= for the daily stats endpoint (defaults: last 30 days)."""
+    MAX_DAYS = 366
+
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        end = attrs.get("end") or timezone.localdate()
+        start = attrs.get("start") or end - timedelta(days=29)
+        if start > end:
+            raise serializers.ValidationError("start must be on or before end.")
+        if (end - start).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(f"Range is limited to {self.MAX_DAYS} days.")
+        return {"start": start, "end": end}
 
 
 # -------------------- NOTIFICATION SERIALIZER --------------------
@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from posts.models import Comment, Like, Post
+from .stats import bump, local_day
+
+User = get_user_model()
+
+# model -> (DailyStat counter, timestamp field that decides the day)
+COUNTED_MODELS = {
+    User: ("signups", "date_joined"),
+    Post: ("posts", "created_at"),
+    Like: ("likes", "created_at"),
+    Comment: ("comments", "created_at"),
+}
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Like)
+@receiver(post_save, sender=Comment)
+def count_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        field, stamp = COUNTED_MODELS[sender]
+        bump(field, local_day(getattr(instance, stamp)))
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Like)
+@receiver(post_delete, sender=Comment)
+def count_deleted(sender, instance, **kwargs):
+    field, stamp = COUNTED_MODELS[sender]
+    bump(field, local_day(getattr(instance, stamp)), delta=-1)
+
+
+_UNKNOWN = object()
+
+
+@receiver(post_init, sender=User)
+def remember_last_login(sender, instance, **kwargs):
+    # The loaded value, so a login can be compared with the previous one
+    # without querying it again. Missing when the field was deferred.
+    instance._stats_last_login = instance.__dict__.get("last_login", _UNKNOWN)
+
+
+@receiver(pre_save, sender=User)
+def count_daily_active(sender, instance, update_fields=None, raw=False, **kwargs):
+    """
+    A login (SimpleJWT's update_last_login saves only `last_login`) counts
+    the user as active today unless their previous login was already today.
+    """
+    if raw or not update_fields or "last_login" not in update_fields or instance.last_login is None:
+        return
+    previous = getattr(instance, "_stats_last_login", _UNKNOWN)
+    if previous is _UNKNOWN:
+        previous = User.objects.filter(pk=instance.pk).values_list("last_login", flat=True).first()
+    instance._stats_last_login = instance.last_login
+    today = local_day(instance.last_login)
+    if previous is None or local_day(previous) != today:
+        bump("active_users", today)
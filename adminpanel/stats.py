@@ -0,0 +1,259 @@
+"""
+Daily activity rollups backing the admin dashboard.
+
+Counters are bumped by signals as rows are created/deleted (`bump`), and
+can be recomputed from the source tables for any date range
+(`rebuild_daily_stats`) to backfill or repair drift.
+
+Every signup, post, like and comment of the day lands on the same DailyStat
+row, so updating it per event would serialize all writes behind one row
+lock. With DAILY_STATS_FLUSH_SECONDS set (the default when REDIS_URL is),
+bumps for today and yesterday are buffered as cache counters with `incr`
+instead, and `flush_daily_stats` moves them to the table in one UPDATE per
+day. A flush runs at most once per interval, from whichever worker bumps
+next after it elapses, and before the stats endpoints read. Bumps for older
+days (deletes of old content) are rare and go straight to the table.
+Buffered counts that are never flushed expire with the cache; rollup_stats
+repairs them.
+"""
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from time import monotonic
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, router, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Greatest, TruncDate
+from django.utils import timezone
+
+from posts.models import ArchivedComment, ArchivedLike, ArchivedPost, Comment, Like, Post
+from .models import DailyStat
+
+STAT_FIELDS = ("signups", "posts", "likes", "comments", "active_users")
+
+BUFFER_KEY = "daily_stat:%s:%s"  # (date, field)
+BUFFER_TIMEOUT = 3 * 86400
+FLUSH_LOCK_KEY = "daily_stat:flush"
+
+_batch = threading.local()
+_last_flush = 0.0
+
+
+def local_day(value):
+    return timezone.localdate(value) if value is not None else timezone.localdate()
+
+
+def flush_interval():
+    return getattr(settings, "DAILY_STATS_FLUSH_SECONDS", 0)
+
+
+def _buffered_days():
+    today = timezone.localdate()
+    return (today - timedelta(days=1), today)
+
+
+def _apply(day, deltas):
+    """Add {field: delta} to the day's row (floored at 0), creating it if needed."""
+    rows = DailyStat.objects.filter(date=day)
+    changes = {field: Greatest(F(field) + delta, 0) for field, delta in deltas.items()}
+    if rows.update(**changes):
+        return
+    initial = {field: delta for field, delta in deltas.items() if delta > 0}
+    if not initial:
+        return  # nothing recorded for that day yet; rebuild_daily_stats fixes it
+    try:
+        with transaction.atomic():
+            DailyStat.objects.create(date=day, **initial)
+    except IntegrityError:
+        # Another writer created the row between our update and insert.
+        rows.update(**changes)
+
+
+def _buffer(day, deltas):
+    for field, delta in deltas.items():
+        key = BUFFER_KEY % (day.isoformat(), field)
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            cache.add(key, 0, BUFFER_TIMEOUT)
+            cache.incr(key, delta)
+
+
+def _record(day, deltas):
+    if flush_interval() and day in _buffered_days():
+        _buffer(day, deltas)
+        _maybe_flush()
+    else:
+        _apply(day, deltas)
+
+
+def _maybe_flush():
+    global _last_flush
+    now = monotonic()
+    if now - _last_flush >= flush_interval():
+        _last_flush = now
+        flush_daily_stats()
+
+
+def flush_daily_stats():
+    """
+    Move buffered counters to DailyStat rows; returns the number of days
+    updated. One flush runs at a time (a cache lock); counts bumped while it
+    runs stay buffered for the next one, since each counter is only
+    decremented by what was read.
+    """
+    if not cache.add(FLUSH_LOCK_KEY, 1, 60):
+        return 0
+    try:
+        keys = {BUFFER_KEY % (day.isoformat(), field): (day, field)
+                for day in _buffered_days() for field in STAT_FIELDS}
+        by_day = defaultdict(dict)
+        for key, value in cache.get_many(keys).items():
+            if value:
+                cache.decr(key, value)
+                day, field = keys[key]
+                by_day[day][field] = value
+        for day, deltas in by_day.items():
+            try:
+                _apply(day, deltas)
+            except Exception:
+                _buffer(day, deltas)  # put them back for the next flush
+                raise
+        return len(by_day)
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+
+
+def bump(field, day=None, delta=1):
+    """Add `delta` to one counter of the day's row."""
+    day = day or timezone.localdate()
+    pending = getattr(_batch, "pending", None)
+    if pending is not None:
+        pending[day, field] += delta
+    else:
+        _record(day, {field: delta})
+
+
+@contextmanager
+def batched_bumps():
+    """
+    Collect bump() calls made inside the block (e.g. post_delete signals
+    from a bulk delete) and apply them together on exit: one UPDATE per
+    day, or one incr per counter when buffered.
+    """
+    if getattr(_batch, "pending", None) is not None:
+        yield
+        return
+    _batch.pending = Counter()
+    try:
+        yield
+        pending = _batch.pending
+    finally:
+        _batch.pending = None
+
+    by_day = defaultdict(dict)
+    for (day, field), delta in pending.items():
+        if delta:
+            by_day[day][field] = delta
+    for day, deltas in by_day.items():
+        _record(day, deltas)
+
+
+def _day_bounds(start, end):
+    tz = timezone.get_current_timezone()
+    return (
+        datetime.combine(start, time.min, tzinfo=tz),
+        datetime.combine(end + timedelta(days=1), time.min, tzinfo=tz),
+    )
+
+
+def _counts_by_day(queryset, field, lower, upper):
+    return Counter(dict(
+        queryset.filter(**{f"{field}__gte": lower, f"{field}__lt": upper})
+        .annotate(day=TruncDate(field))
+        .values("day")
+        .annotate(n=Count("pk"))
+        .values_list("day", "n")
+    ))
+
+
+def rebuild_daily_stats(start, end):
+    """
+    Recompute rows for start..end (inclusive) from the source tables.
+
+    Login history isn't stored, so for past days active_users is rebuilt
+    from users whose *latest* login fell on that day (a lower bound); today's
+    value is exact.
+    """
+    User = get_user_model()
+    lower, upper = _day_bounds(start, end)
+    sources = {
+        "signups": _counts_by_day(User.objects.all(), "date_joined", lower, upper),
+        # Archived rows (posts.archive) still count for the day they were created.
+        "posts": _counts_by_day(Post.objects.all(), "created_at", lower, upper)
+        + _counts_by_day(ArchivedPost.objects.all(), "created_at", lower, upper),
+        "likes": _counts_by_day(Like.objects.all(), "created_at", lower, upper)
+        + _counts_by_day(ArchivedLike.objects.all(), "created_at", lower, upper),
+        "comments": _counts_by_day(Comment.objects.all(), "created_at", lower, upper)
+        + _counts_by_day(ArchivedComment.objects.all(), "created_at", lower, upper),
+        "active_users": _counts_by_day(User.objects.all(), "last_login", lower, upper),
+    }
+    existing = {row.date: row for row in DailyStat.objects.filter(date__range=(start, end))}
+
+    to_create, to_update = [], []
+    day = start
+    while day <= end:
+        values = {name: counts.get(day, 0) for name, counts in sources.items()}
+        row = existing.get(day)
+        if row is None:
+            if any(values.values()):
+                to_create.append(DailyStat(date=day, **values))
+        else:
+            # Keep the incrementally tracked DAU if it saw more than the rebuild can.
+            values["active_users"] = max(values["active_users"], row.active_users)
+            for name, value in values.items():
+                setattr(row, name, value)
+            to_update.append(row)
+        day += timedelta(days=1)
+
+    with transaction.atomic():
+        DailyStat.objects.bulk_create(to_create, batch_size=500)
+        DailyStat.objects.bulk_update(to_update, STAT_FIELDS, batch_size=500)
+    return len(to_create) + len(to_update)
+
+
+def _flushed_rows():
+    """
+    DailyStat rows read from the database flushes write to. Replica reads
+    could lag behind a flush that has already drained the cache counters.
+    """
+    return DailyStat.objects.using(router.db_for_write(DailyStat))
+
+
+def daily_series(start, end):
+    """Rows for start..end (inclusive), with zero rows for days without activity."""
+    rows = {
+        row["date"]: row
+        for row in _flushed_rows().filter(date__range=(start, end)).values("date", *STAT_FIELDS)
+    }
+    series = []
+    day = start
+    while day <= end:
+        series.append(rows.get(day) or {"date": day, **dict.fromkeys(STAT_FIELDS, 0)})
+        day += timedelta(days=1)
+    return series
+
+
+def totals():
+    return _flushed_rows().aggregate(
+        total_users=Sum("signups", default=0),
+        total_posts=Sum("posts", default=0),
+    )
+
+
+def active_today():
+    return _flushed_rows().filter(date=timezone.localdate()).values_list("active_users", flat=True).first() or 0
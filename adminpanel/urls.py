@@ -1,15 +1,19 @@
 from django.urls import path
 from .views import (
-    UserListView, UserDetailView, DeactivateUserView, ActivateUserView,
-    PostListView, PostDeleteView, StatsView
+    UserListView, UserDetailView, DeactivateUserView, ActivateUserView, UserBulkActionView,
+    PostListView, PostBulkActionView, PostDeleteView, DeletionJobListView, StatsView, DailyStatsView
 )
 
 urlpatterns = [
     path('users/', UserListView.as_view(), name='admin-users'),
+    path('users/bulk/', UserBulkActionView.as_view(), name='admin-users-bulk'),
     path('users/<int:pk>/', UserDetailView.as_view(), name='admin-user-detail'),
     path('users/<int:user_id>/deactivate/', DeactivateUserView.as_view(), name='admin-user-deactivate'),
     path("users/<int:user_id>/activate/", ActivateUserView.as_view(), name="admin-activate-user"),
     path('posts/', PostListView.as_view(), name='admin-posts'),
+    path('posts/bulk/', PostBulkActionView.as_view(), name='admin-posts-bulk'),
     path('posts/<int:post_id>/', PostDeleteView.as_view(), name='admin-post-delete'),
+    path('deletions/', DeletionJobListView.as_view(), name='admin-deletions'),
     path('stats/', StatsView.as_view(), name='admin-stats'),
+    path('stats/daily/', DailyStatsView.as_view(), name='admin-stats-daily'),
 ]
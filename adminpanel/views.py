@@ -1,12 +1,22 @@
 from django.contrib.auth import get_user_model
-from django.utils.timezone import now
+from django.utils import timezone
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from django_filters.rest_framework import DjangoFilterBackend
 
 from posts.models import Post
-from .serializers import UserSerializer, PostSerializer
+from posts.hydration import hydrate_post_rows
+from .filters import AdminPostFilter
+from .deletion import schedule_post_deletions, schedule_user_deletion
+from .models import DeletionJob
+from .moderation import set_users_active
+from .serializers import (
+    UserSerializer, UserBulkActionSerializer, PostSerializer, post_row_to_representation, PostBulkActionSerializer,
+    DailyStatSerializer, StatsRangeSerializer, DeletionJobSerializer,
+)
+from .stats import active_today, daily_series, flush_daily_stats, totals
 
 User = get_user_model()
 
@@ -35,23 +45,27 @@ class UserListView(generics.ListAPIView):
     pagination_class = AdminPageNumberPagination
 
 
-class UserDetailView(generics.RetrieveAPIView):
+class UserDetailView(generics.RetrieveDestroyAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAdminUser]
 
+    def destroy(self, request, *args, **kwargs):
+        # 202 with the DeletionJob (not 204): the user is hidden now and
+        # removed by process_deletions; poll deletions/ for progress.
+        user = self.get_object()
+        job = schedule_user_deletion(user.pk)
+        return Response(DeletionJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
 
 class DeactivateUserView(APIView):
     permission_classes = [IsAdminUser]
 
     def post(self, request, user_id):
-        try:
-            user = User.objects.get(pk=user_id)
-            user.is_active = False
-            user.save()
-            return Response({"detail": "User deactivated successfully."}, status=status.HTTP_200_OK)
-        except User.DoesNotExist:
+        if not User.objects.filter(pk=user_id).exists():
             return Response({"error": "User not found."}, status=status.HTTP_404_NOT_FOUND)
+        set_users_active([user_id], active=False, include_staff=True)
+        return Response({"detail": "User deactivated successfully."}, status=status.HTTP_200_OK)
 
 
 
@@ -59,46 +73,125 @@ class ActivateUserView(APIView):
     permission_classes = [IsAdminUser]
 
     def post(self, request, user_id):
-        try:
-            user = User.objects.get(pk=user_id)
-            user.is_active = True
-            user.save()
-            return Response({"detail": "User activated successfully."}, status=status.HTTP_200_OK)
-        except User.DoesNotExist:
+        if not User.objects.filter(pk=user_id).exists():
             return Response({"error": "User not found."}, status=status.HTTP_404_NOT_FOUND)
+        set_users_active([user_id], active=True, include_staff=True)
+        return Response({"detail": "User activated successfully."}, status=status.HTTP_200_OK)
+
+
+class UserBulkActionView(APIView):
+    """
+    POST {"action": "deactivate" | "activate", "ids": [...]}. Staff accounts
+    are skipped; the response reports how many users/posts/comments/
+    notifications/tokens were affected.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = UserBulkActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        action = serializer.validated_data["action"]
+        totals = set_users_active(serializer.validated_data["ids"], active=action == "activate")
+        return Response({"action": action, **totals})
 
 
 
 # ---- Post Management ----
+class AdminPostCursorPagination(CursorPagination):
+    ordering = ("-created_at", "-id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
 class PostListView(generics.ListAPIView):
+    """
+    Moderation list over all posts (active or not), filterable by author,
+    category, is_active and created_after/created_before.
+    """
     queryset = Post.objects.all()
     serializer_class = PostSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = AdminPostCursorPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = AdminPostFilter
+
+    def list(self, request, *args, **kwargs):
+        # Page over (id, created_at) only, then hydrate the page in one batch.
+        # No viewer: the moderation list never shows the admin's own likes.
+        keys = self.filter_queryset(self.get_queryset()).values("id", "created_at")
+        page = self.paginate_queryset(keys)
+        rows = hydrate_post_rows([key["id"] for key in page], None)
+        return self.get_paginated_response([post_row_to_representation(row) for row in rows])
+
+
+class PostBulkActionView(APIView):
+    """
+    POST {"action": "deactivate" | "activate" | "delete", "ids": [...]}.
+    Each call is one UPDATE; deletes hide the posts and queue DeletionJobs.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = PostBulkActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        action = serializer.validated_data["action"]
+        posts = Post.objects.filter(id__in=serializer.validated_data["ids"])
+
+        if action == "delete":
+            scheduled = schedule_post_deletions(serializer.validated_data["ids"])
+            return Response({"action": action, "scheduled": scheduled}, status=status.HTTP_202_ACCEPTED)
+
+        active = action == "activate"
+        if active:
+            # Posts queued for deletion or hidden with a suspended author stay
+            # hidden; the deletion job or author reactivation owns those rows.
+            posts = posts.filter(pending_deletion=False, author_suspended=False)
+        updated = posts.exclude(is_active=active).update(is_active=active, updated_at=timezone.now())
+        return Response({"action": action, "updated": updated})
 
 
 class PostDeleteView(APIView):
     permission_classes = [IsAdminUser]
 
     def delete(self, request, post_id):
-        try:
-            post = Post.objects.get(pk=post_id)
-            post.delete()
-            return Response({"detail": "Post deleted successfully."}, status=status.HTTP_204_NO_CONTENT)
-        except Post.DoesNotExist:
+        if not Post.objects.filter(pk=post_id).exists():
             return Response({"error": "Post not found."}, status=status.HTTP_404_NOT_FOUND)
+        schedule_post_deletions([post_id])
+        return Response({"detail": "Post deleted successfully."}, status=status.HTTP_204_NO_CONTENT)
+
+
+class DeletionJobListView(generics.ListAPIView):
+    """Queued/finished deletions with per-table progress; filter by ?status=&kind=."""
+    queryset = DeletionJob.objects.order_by("-created_at", "-id")
+    serializer_class = DeletionJobSerializer
+    permission_classes = [IsAdminUser]
+    pagination_class = AdminPageNumberPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ["status", "kind"]
 
 
 # ---- Stats ----
 class StatsView(APIView):
+    """Headline numbers, read from the DailyStat rollups rather than counting tables."""
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        total_users = User.objects.count()
-        total_posts = Post.objects.count()
-        active_today = User.objects.filter(last_login__date=now().date()).count()
+        flush_daily_stats()
+        return Response({**totals(), "active_today": active_today()})
+
 
+class DailyStatsView(APIView):
+    """Per-day series for ?start=YYYY-MM-DD&end=YYYY-MM-DD (inclusive)."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        params = StatsRangeSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        start, end = params.validated_data["start"], params.validated_data["end"]
+        flush_daily_stats()
         return Response({
-            "total_users": total_users,
-            "total_posts": total_posts,
-            "active_today": active_today,
+            "start": start,
+            "end": end,
+            "results": DailyStatSerializer(daily_series(start, end), many=True).data,
         })
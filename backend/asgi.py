@@ -12,5 +12,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+# Persistent connections are per thread, and async views run their ORM calls
+# on throwaway executor threads, so under ASGI each one would leak an open
+# connection. Close after every request unless DB_NATIVE_POOL is used instead.
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
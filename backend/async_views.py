@@ -0,0 +1,116 @@
+"""
+Async counterpart of DRF's APIView for I/O-bound endpoints.
+
+DRF views are sync only. AsyncAPIView is a Django async class-based view
+that still uses DRF for the request side: parsers, the project's
+DEFAULT_AUTHENTICATION_CLASSES (session with DRF's CSRF check, basic, JWT)
+and permission classes. Handlers are `async def get/post(...)`. They receive a
+DRF Request and return a Django HttpResponse, usually a JsonResponse.
+
+Authentication and body parsing run in a worker thread via sync_to_async,
+because they can hit the database or spool a large upload. Handlers should
+do their own waiting with the async ORM and async HTTP clients. That way an
+ASGI worker (gunicorn -k uvicorn.workers.UvicornWorker backend.asgi) keeps
+serving other requests while an upload or a long poll is in flight. Under
+WSGI these views still work; Django runs each one in its own event loop.
+
+Methods listed in `sync_views` are handed to an existing sync view
+unchanged. That lets one URL mix an async POST with a DRF-generic GET.
+OPTIONS returns DRF's metadata, and unknown methods get DRF's
+MethodNotAllowed, both with an Allow header, as APIView does.
+"""
+from asgiref.sync import sync_to_async
+from django.http import Http404, JsonResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, views
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+
+class AsyncAPIView(View):
+    # Same as DRF views; the view is csrf_exempt and SessionAuthentication
+    # enforces CSRF itself, exactly as APIView does.
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    permission_classes = (IsAuthenticated,)
+    throttle_classes = ()
+    parser_classes = (JSONParser, FormParser, MultiPartParser)
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    metadata_class = api_settings.DEFAULT_METADATA_CLASS
+    sync_views = {}
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        method = request.method.lower()
+        if method == "head" and "head" not in self.sync_views and hasattr(self, "get"):
+            method = "get"
+        if method in self.sync_views:
+            return await sync_to_async(self.sync_views[method])(request, *args, **kwargs)
+
+        drf_request = Request(
+            request,
+            parsers=[parser() for parser in self.parser_classes],
+            authenticators=[auth() for auth in self.authentication_classes],
+        )
+        try:
+            await sync_to_async(self.initial)(drf_request)
+            handler = getattr(self, method, None) if method in self.http_method_names else None
+            if handler is None:
+                raise exceptions.MethodNotAllowed(request.method)
+            response = await handler(drf_request, *args, **kwargs)
+        except Http404:
+            response = JsonResponse({"detail": "Not found."}, status=404)
+        except exceptions.APIException as exc:
+            response = self.exception_response(drf_request, exc)
+        response.headers.setdefault("Allow", ", ".join(self.allowed_methods))
+        return response
+
+    async def options(self, request, *args, **kwargs):
+        """DRF's OPTIONS metadata (name, description, renders, parses), as APIView returns it."""
+        if self.metadata_class is None:
+            raise exceptions.MethodNotAllowed(request.method)
+        return JsonResponse(self.metadata_class().determine_metadata(request, self))
+
+    @property
+    def allowed_methods(self):
+        return [m.upper() for m in self.http_method_names if hasattr(self, m) or m in self.sync_views]
+
+    # Used by the metadata class.
+    def get_view_name(self):
+        return views.get_view_name(self)
+
+    def get_view_description(self, html=False):
+        return views.get_view_description(self, html)
+
+    def initial(self, request):
+        """Authenticate, check permissions and throttles, parse the body (sync, in a worker thread)."""
+        for permission in (p() for p in self.permission_classes):
+            if not permission.has_permission(request, self):
+                if request.authenticators and not request.successful_authenticator:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, "message", None))
+        for throttle in (t() for t in self.throttle_classes):
+            if not throttle.allow_request(request, self):
+                raise exceptions.Throttled(throttle.wait())
+        if request.method not in ("GET", "HEAD"):
+            request.data  # noqa: B018 -- parse (and spool files) off the event loop
+
+    def exception_response(self, request, exc):
+        detail = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+        response = JsonResponse(detail, status=exc.status_code, safe=False)
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            # As APIView: 401 only when the first authenticator names a scheme.
+            header = request.authenticators[0].authenticate_header(request) if request.authenticators else None
+            if header:
+                response["WWW-Authenticate"] = header
+            else:
+                response.status_code = 403
+        if getattr(exc, "wait", None):
+            response["Retry-After"] = "%d" % exc.wait
+        return response
@@ -0,0 +1,139 @@
+"""
+Primary/replica routing.
+
+Reads made while serving a safe (GET/HEAD/OPTIONS) request go to one of
+settings.DATABASE_REPLICAS, picked once per request. Everything else stays
+on `default`:
+
+  * writes, and all reads in unsafe requests (read-modify-write);
+  * reads inside transaction.atomic();
+  * reads outside a request (management commands, workers, shell);
+  * reads by a user who wrote something in the last REPLICA_STICKY_SECONDS,
+    so e.g. a post list fetched right after creating a post or liking one
+    doesn't come from a replica that hasn't caught up yet.
+
+With no replicas configured every read goes to `default`.
+"""
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import SimpleLazyObject, empty
+
+PIN_KEY = "db_primary_pin:%s"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_state = ContextVar("db_routing_state", default=None)
+
+
+def sticky_seconds():
+    return getattr(settings, "REPLICA_STICKY_SECONDS", 5)
+
+
+def pin_user_to_primary(user_id):
+    cache.set(PIN_KEY % user_id, 1, sticky_seconds())
+
+
+async def apin_user_to_primary(user_id):
+    await cache.aset(PIN_KEY % user_id, 1, sticky_seconds())
+
+
+class _RoutingState:
+    def __init__(self, request, replica):
+        self.request = request
+        self.replica = replica
+        self.primary = request.method not in SAFE_METHODS
+        self.checked_user = None
+        # Atomic blocks opened by the view (not ones already open around the
+        # request) send reads to the primary.
+        self.atomic_depth = len(connections[DEFAULT_DB_ALIAS].atomic_blocks)
+
+    def _authenticated_user(self):
+        # Don't force AuthenticationMiddleware's lazy user: evaluating it
+        # reads the session, which would route back into this check. DRF
+        # replaces it with the concrete user once the view authenticates.
+        user = getattr(self.request, "user", None)
+        if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+            return None
+        if user is None or not user.is_authenticated:
+            return None
+        return user
+
+    def use_primary(self):
+        if self.primary or self.replica is None:
+            return True
+        if len(connections[DEFAULT_DB_ALIAS].atomic_blocks) > self.atomic_depth:
+            return True
+        user = self._authenticated_user()
+        if user is not None and self.checked_user != user.pk:
+            self.checked_user = user.pk
+            self.primary = cache.get(PIN_KEY % user.pk) is not None
+        return self.primary
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.use_primary():
+            return DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive schema changes through replication.
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """Scopes routing state to each request; pins the user after a successful write."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def _start(self, request):
+        replicas = getattr(settings, "DATABASE_REPLICAS", [])
+        state = _RoutingState(request, random.choice(replicas) if replicas else None)
+        return state, _state.set(state)
+
+    def _user_to_pin(self, request, response, state):
+        if state.replica is not None and request.method not in SAFE_METHODS and response.status_code < 400:
+            return state._authenticated_user()
+        return None
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state, token = self._start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if (user := self._user_to_pin(request, response, state)) is not None:
+            pin_user_to_primary(user.pk)
+        return response
+
+    async def __acall__(self, request):
+        # The state is shared with the async ORM's worker threads through
+        # the copied context.
+        state, token = self._start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        if (user := self._user_to_pin(request, response, state)) is not None:
+            await apin_user_to_primary(user.pk)
+        return response
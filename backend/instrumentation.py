@@ -0,0 +1,324 @@
+"""
+Per-request performance instrumentation.
+
+InstrumentationMiddleware counts every request and its wall time into an
+in-process MetricsRegistry, exposed in Prometheus text format by
+`metrics_view`. A sampled fraction of requests (INSTRUMENTATION_SAMPLE_RATE)
+additionally records:
+
+  * DB query count and time, via an execute wrapper on every connection;
+  * cache hits/misses, from the Instrumented*Cache backends;
+  * serializer time, from code wrapped in `timed_serialization()`;
+
+and emits one JSON log line on the "backend.instrumentation" logger.
+
+The registry is per process: under gunicorn each worker exposes its own
+counters, so scrape them individually or aggregate in Prometheus.
+"""
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+logger = logging.getLogger(__name__)
+
+
+class ConsoleHandler(logging.StreamHandler):
+    """
+    StreamHandler bound to whatever sys.stderr is at emit time, so test
+    runners that swap the stream (`manage.py test --buffer`) capture the
+    sampled request lines instead of them going to the real terminal.
+    """
+
+    def __init__(self, level=logging.NOTSET):
+        logging.Handler.__init__(self, level)
+
+    @property
+    def stream(self):
+        return sys.stderr
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms keyed by (name, labels)."""
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._histograms = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, labels, value=1):
+        with self._lock:
+            self._counters[self._key(name, labels)] += value
+
+    def observe(self, name, labels, value):
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    hist[0][i] += 1
+            hist[1] += value
+            hist[2] += 1
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    @staticmethod
+    def _labels(pairs):
+        if not pairs:
+            return ""
+        parts = []
+        for k, v in pairs:
+            v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            parts.append(f'{k}="{v}"')
+        return "{" + ",".join(parts) + "}"
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((k, (list(b), s, c)) for k, (b, s, c) in self._histograms.items())
+
+        lines = []
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{self._labels(labels)} {value:g}")
+        for (name, labels), (bucket_counts, total, count) in histograms:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            for bound, n in zip(self.buckets, bucket_counts):
+                lines.append(f"{name}_bucket{self._labels(labels + (('le', f'{bound:g}'),))} {n}")
+            lines.append(f"{name}_bucket{self._labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{self._labels(labels)} {total:g}")
+            lines.append(f"{name}_count{self._labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_time", "cache_hits", "cache_misses", "serializer_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.serializer_time = 0.0
+
+
+_current = ContextVar("request_stats", default=None)
+
+
+def current_stats():
+    """Stats of the sampled request being served, or None."""
+    return _current.get()
+
+
+def record_cache(hits, misses):
+    stats = _current.get()
+    if stats is not None:
+        stats.cache_hits += hits
+        stats.cache_misses += misses
+
+
+@contextmanager
+def timed_serialization():
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serializer_time += time.perf_counter() - start
+
+
+def install_execute_wrapper(wrapper):
+    """
+    Attach `wrapper` to every database connection, open now or opened later.
+    Wrappers stay installed and check a ContextVar, which (unlike a
+    per-request `with connection.execute_wrapper()`) also follows queries
+    the async ORM runs on worker threads.
+    """
+    def attach(connection, **kwargs):
+        if wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wrapper)
+
+    connection_created.connect(attach, weak=False, dispatch_uid=f"execute_wrapper:{id(wrapper)}")
+    for conn in connections.all(initialized_only=True):
+        attach(conn)
+
+
+def _query_wrapper(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats = _current.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += time.perf_counter() - start
+
+
+# ---- Cache backends ----
+
+class CacheStatsMixin:
+    """Counts get/get_many hits and misses toward the current request."""
+
+    def get(self, key, default=None, version=None):
+        if default is self._missing_key:
+            # Called from BaseCache.get_many, which does its own counting.
+            return super().get(key, default, version)
+        value = super().get(key, self._missing_key, version)
+        if value is self._missing_key:
+            record_cache(0, 1)
+            return default
+        record_cache(1, 0)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version)
+        record_cache(len(found), len(keys) - len(found))
+        return found
+
+
+class InstrumentedLocMemCache(CacheStatsMixin, LocMemCache):
+    pass
+
+
+class InstrumentedRedisCache(CacheStatsMixin, RedisCache):
+    pass
+
+
+# ---- Middleware ----
+
+def view_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.view_name or match._func_path
+
+
+def sample_rate():
+    return getattr(settings, "INSTRUMENTATION_SAMPLE_RATE", 1.0)
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        install_execute_wrapper(_query_wrapper)
+
+    def _start(self):
+        rate = sample_rate()
+        stats = RequestStats() if rate >= 1 or (rate > 0 and random.random() < rate) else None
+        return stats, (_current.set(stats) if stats is not None else None), time.perf_counter()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats, token, start = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                _current.reset(token)
+        self._finish(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        stats, token, start = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token is not None:
+                _current.reset(token)
+        self._finish(request, response, stats, time.perf_counter() - start)
+        return response
+
+    def _finish(self, request, response, stats, duration):
+        view = view_name(request)
+        registry.inc("http_requests_total", {"view": view, "method": request.method, "status": response.status_code})
+        registry.observe("http_request_duration_seconds", {"view": view, "method": request.method}, duration)
+        if stats is not None:
+            self._record_sample(request, response, view, duration, stats)
+
+    def _record_sample(self, request, response, view, duration, stats):
+        labels = {"view": view}
+        registry.inc("http_sampled_requests_total", labels)
+        registry.inc("db_queries_total", labels, stats.queries)
+        registry.inc("db_query_seconds_total", labels, stats.db_time)
+        registry.inc("cache_hits_total", labels, stats.cache_hits)
+        registry.inc("cache_misses_total", labels, stats.cache_misses)
+        registry.inc("serializer_seconds_total", labels, stats.serializer_time)
+
+        user = getattr(request, "user", None)
+        logger.info(json.dumps({
+            "event": "request",
+            "view": view,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "user_id": user.pk if user is not None and user.is_authenticated else None,
+            "duration_ms": round(duration * 1000, 2),
+            "db_queries": stats.queries,
+            "db_ms": round(stats.db_time * 1000, 2),
+            "cache_hits": stats.cache_hits,
+            "cache_misses": stats.cache_misses,
+            "serializer_ms": round(stats.serializer_time * 1000, 2),
+        }))
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. Requires `Authorization: Bearer <METRICS_TOKEN>`
+    when METRICS_TOKEN is set; otherwise only staff sessions may read it.
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    auth = request.META.get("HTTP_AUTHORIZATION", "")
+    if token:
+        allowed = constant_time_compare(auth, f"Bearer {token}")
+    else:
+        user = getattr(request, "user", None)
+        allowed = user is not None and user.is_authenticated and user.is_staff
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,32 @@
+"""
+Deferred imports and clients for heavy dependencies.
+
+The supabase SDK (with httpx/httpcore and, when installed, trio) and Pillow
+cost a few hundred milliseconds to import, and building a storage client
+adds more. Modules that only need them inside a request or a validator hold
+a proxy instead. Worker boot, `manage.py` commands and the URLconf import
+then skip the cost. The first attribute access imports or builds the real
+object, and later accesses go straight to it.
+
+    Image = lazy_import("PIL.Image")
+    supabase = lazy_client(lambda: create_client(url, key))
+
+`manage.py import_profile` shows what is still imported eagerly.
+"""
+import importlib
+
+from django.utils.functional import SimpleLazyObject
+
+
+def lazy_import(name):
+    """Proxy for module `name`, imported on first attribute access."""
+    return SimpleLazyObject(lambda: importlib.import_module(name))
+
+
+def lazy_client(factory):
+    """
+    Proxy for `factory()`, called on first use and kept for the process.
+    Two threads racing on first use may both call the factory; one result
+    is dropped, which is harmless for stateless HTTP clients.
+    """
+    return SimpleLazyObject(factory)
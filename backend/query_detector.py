@@ -0,0 +1,212 @@
+"""
+Slow-query and N+1 detection.
+
+When active for a request, QueryDetectorMiddleware records every SQL
+statement, normalizes it to a template (literals and placeholders become
+`?`, IN lists collapse to `IN (...)`) and, once the response is ready:
+
+  * flags templates executed QUERY_DETECTOR_REPEAT_THRESHOLD or more times
+    as likely N+1s;
+  * flags statements slower than QUERY_DETECTOR_SLOW_MS, with the project
+    frames of the stack that issued them;
+
+logs a warning for each finding on the "backend.query_detector" logger and
+appends one JSON line per request to QUERY_DETECTOR_REPORT_PATH, which
+`manage.py query_report` summarizes per view.
+
+Detection is on for every request with QUERY_DETECTOR_ENABLED, or per
+request with an `X-Query-Detector: 1` header when
+QUERY_DETECTOR_ALLOW_HEADER is set. Header-enabled responses carry the
+totals back in X-Query-Count / X-Query-Repeated / X-Query-Slow.
+"""
+import json
+import logging
+import re
+import threading
+import time
+import traceback
+from collections import Counter
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .instrumentation import install_execute_wrapper, view_name
+
+logger = logging.getLogger(__name__)
+
+HEADER = "HTTP_X_QUERY_DETECTOR"
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w\"])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\$\d+")
+_IN_LIST = re.compile(r"\bIN \(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+_write_lock = threading.Lock()
+_current = ContextVar("query_log", default=None)
+
+
+def normalize_sql(sql):
+    """Reduce a statement to a template shared by all its executions."""
+    sql = _STRING.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def detection_requested(request):
+    if _setting("QUERY_DETECTOR_ENABLED", False):
+        return True
+    return _setting("QUERY_DETECTOR_ALLOW_HEADER", False) and request.META.get(HEADER) == "1"
+
+
+# Middleware and query wrappers sit on every stack; they say nothing about
+# where a query came from.
+_SKIP_MODULES = ("instrumentation.py", "query_detector.py", "db_router.py", "manage.py")
+
+
+def _frame_label(frame, base):
+    path = Path(frame.filename)
+    path = path.relative_to(base) if path.is_relative_to(base) else Path(*path.parts[-3:])
+    return f"{path}:{frame.lineno} in {frame.name}"
+
+
+def call_site(limit=6):
+    """
+    The innermost project frames of the current stack, outermost first. When
+    the query comes entirely from library code (e.g. a serializer field
+    following a relation during rendering), the innermost non-ORM frames.
+    """
+    base = Path(settings.BASE_DIR)
+    stack = [f for f in traceback.extract_stack() if not f.filename.endswith(_SKIP_MODULES)]
+    frames = [
+        f for f in stack
+        if f.filename.startswith(str(base))
+        and "site-packages" not in f.filename
+        and "/management/commands/" not in f.filename
+    ]
+    if not frames:
+        frames = [f for f in stack if "/django/db/" not in f.filename]
+    return [_frame_label(f, base) for f in frames[-limit:]]
+
+
+class QueryLog:
+    def __init__(self, slow_ms):
+        self.slow_ms = slow_ms
+        self.templates = Counter()
+        self.samples = {}
+        self.slow = []
+        self.count = 0
+        self.total_ms = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            template = normalize_sql(sql)
+            self.count += 1
+            self.total_ms += ms
+            self.templates[template] += 1
+            if template not in self.samples:
+                self.samples[template] = call_site()
+            if ms >= self.slow_ms:
+                self.slow.append({"sql": sql, "ms": round(ms, 2), "stack": call_site()})
+
+    def repeated(self, threshold):
+        return [
+            {"template": t, "count": n, "stack": self.samples[t]}
+            for t, n in self.templates.most_common() if n >= threshold
+        ]
+
+
+def _detect_wrapper(execute, sql, params, many, context):
+    log = _current.get()
+    if log is None:
+        return execute(sql, params, many, context)
+    return log(execute, sql, params, many, context)
+
+
+def write_report_line(entry):
+    path = _setting("QUERY_DETECTOR_REPORT_PATH", "")
+    if not path:
+        return
+    line = json.dumps(entry) + "\n"
+    with _write_lock, open(path, "a", encoding="utf-8") as fh:
+        fh.write(line)
+
+
+class QueryDetectorMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        install_execute_wrapper(_detect_wrapper)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not detection_requested(request):
+            return self.get_response(request)
+        log = QueryLog(_setting("QUERY_DETECTOR_SLOW_MS", 100))
+        token = _current.set(log)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._report(request, response, log)
+
+    async def __acall__(self, request):
+        if not detection_requested(request):
+            return await self.get_response(request)
+        log = QueryLog(_setting("QUERY_DETECTOR_SLOW_MS", 100))
+        token = _current.set(log)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._report(request, response, log)
+
+    def _report(self, request, response, log):
+        view = view_name(request)
+        repeated = log.repeated(_setting("QUERY_DETECTOR_REPEAT_THRESHOLD", 5))
+        for item in repeated:
+            logger.warning(
+                "Possible N+1 in %s: %d x %s\n  at %s",
+                view, item["count"], item["template"], "\n  at ".join(item["stack"]),
+            )
+        for item in log.slow:
+            logger.warning(
+                "Slow query in %s (%.1f ms): %s\n  at %s",
+                view, item["ms"], item["sql"], "\n  at ".join(item["stack"]),
+            )
+
+        write_report_line({
+            "view": view,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": log.count,
+            "db_ms": round(log.total_ms, 2),
+            "templates": len(log.templates),
+            "repeated": repeated,
+            "slow": log.slow,
+        })
+
+        if request.META.get(HEADER) == "1":
+            response["X-Query-Count"] = str(log.count)
+            response["X-Query-Repeated"] = str(len(repeated))
+            response["X-Query-Slow"] = str(len(log.slow))
+        return response
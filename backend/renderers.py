@@ -0,0 +1,53 @@
+"""
+Faster drop-in for DRF's JSONRenderer, selected with the JSON_RENDERER
+setting (see backend/settings.py).
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .instrumentation import timed_serialization
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+_fallback_encoder = JSONEncoder()
+
+# Non-str dict keys are stringified like the stdlib does, and datetimes go
+# through DRF's encoder (UTC as "Z", milliseconds) instead of orjson's own format.
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Renders with orjson when it is installed. Anything orjson can't encode
+    natively (lazy strings, Decimal, querysets...), and every date, time and
+    datetime, goes through DRF's own encoder. Indented output (browsable
+    API, `; indent=` media type params) uses the stdlib path, so responses
+    match JSONRenderer's byte for byte apart from whitespace.
+
+    orjson only produces compact, UTF-8 output, so a project that turns off
+    COMPACT_JSON or UNICODE_JSON (or STRICT_JSON) also gets the stdlib path.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed_serialization():
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type, renderer_context):
+        if data is None:
+            return b""
+        if (
+            orjson is None
+            or not (self.compact and self.strict) or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_fallback_encoder.default, option=_OPTIONS)
+        # Same JS-subset escaping as JSONRenderer.
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
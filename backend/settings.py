@@ -10,11 +10,14 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import importlib.util
 from pathlib import Path
 import os
+import sys
 from datetime import timedelta
 from dotenv import load_dotenv
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 
 
 load_dotenv()
@@ -67,12 +70,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "backend.instrumentation.InstrumentationMiddleware",
+    "backend.query_detector.QueryDetectorMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     "corsheaders.middleware.CorsMiddleware",
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    "backend.db_router.ReplicaRoutingMiddleware",
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -100,6 +106,39 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+DB_PORT = os.getenv("DB_PORT", "6543")
+
+# Port 6543 is Supabase's transaction-mode pooler: each transaction may run on
+# a different server connection, so nothing session-scoped survives between
+# them. Server-side cursors (.iterator()) and psycopg 3 prepared statements
+# both rely on session state and are switched off under it.
+DB_TRANSACTION_POOLER = config("DB_TRANSACTION_POOLER", cast=bool, default=DB_PORT == "6543")
+
+# Keep connections (and their TLS session) open across requests; health
+# checks drop ones the pooler closed before they are reused. WSGI only:
+# backend.asgi defaults this to 0 (use DB_NATIVE_POOL for pooling there).
+DB_CONN_MAX_AGE = config("DB_CONN_MAX_AGE", cast=int, default=60)
+
+# Optional in-process pool (Django 5.1+, needs `psycopg[pool]` installed
+# instead of psycopg2). Replaces persistent connections when enabled.
+DB_NATIVE_POOL = config("DB_NATIVE_POOL", cast=bool, default=False)
+
+_db_options = {"sslmode": "require"}
+if DB_NATIVE_POOL:
+    # requirements.txt ships psycopg2, which Django's pool does not support;
+    # fail here rather than on the first query.
+    if importlib.util.find_spec("psycopg_pool") is None:
+        raise ImproperlyConfigured(
+            "DB_NATIVE_POOL requires psycopg 3 with its pool: pip install 'psycopg[binary,pool]'."
+        )
+    _db_options["pool"] = {
+        "min_size": config("DB_POOL_MIN_SIZE", cast=int, default=2),
+        "max_size": config("DB_POOL_MAX_SIZE", cast=int, default=10),
+        "timeout": config("DB_POOL_TIMEOUT", cast=int, default=10),
+    }
+if DB_TRANSACTION_POOLER and importlib.util.find_spec("psycopg") is not None:
+    _db_options["prepare_threshold"] = None
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -107,11 +146,30 @@ DATABASES = {
         "USER": os.getenv("DB_USER"),
         "PASSWORD": os.getenv("DB_PASSWORD"),
         "HOST": os.getenv("DB_HOST"),          
-        "PORT": os.getenv("DB_PORT", "6543"),  
-        "OPTIONS": {"sslmode": "require"},
+        "PORT": DB_PORT,  
+        "OPTIONS": _db_options,
+        "CONN_MAX_AGE": 0 if DB_NATIVE_POOL else DB_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": True,
+        "DISABLE_SERVER_SIDE_CURSORS": DB_TRANSACTION_POOLER,
     }
 }
 
+# Read replicas (backend.db_router): comma-separated hosts that share the
+# primary's database name and credentials. Safe requests read from one of
+# them; a user's own writes pin their reads to the primary for
+# REPLICA_STICKY_SECONDS.
+DB_REPLICA_HOSTS = [h.strip() for h in os.getenv("DB_REPLICA_HOSTS", "").split(",") if h.strip()]
+for _i, _host in enumerate(DB_REPLICA_HOSTS):
+    DATABASES[f"replica_{_i}"] = {
+        **DATABASES["default"],
+        "HOST": _host,
+        "PORT": os.getenv("DB_REPLICA_PORT", DB_PORT),
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias.startswith("replica_")]
+DATABASE_ROUTERS = ["backend.db_router.PrimaryReplicaRouter"]
+REPLICA_STICKY_SECONDS = config("REPLICA_STICKY_SECONDS", cast=int, default=5)
+
 
 
 AUTH_USER_MODEL = "accounts.User"
@@ -165,7 +223,16 @@ MEDIA_ROOT = BASE_DIR / "media"
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# "orjson" -> backend.renderers.ORJSONRenderer (falls back to stdlib json if
+# orjson isn't installed), "json" -> DRF's stock JSONRenderer.
+JSON_RENDERER = config("JSON_RENDERER", default="orjson")
+
 REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": [
+        "backend.renderers.ORJSONRenderer" if JSON_RENDERER == "orjson"
+        else "rest_framework.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.SessionAuthentication",
         "rest_framework.authentication.BasicAuthentication",
@@ -181,9 +248,48 @@ REST_FRAMEWORK = {
         "rest_framework.filters.OrderingFilter",
         "rest_framework.filters.SearchFilter",
     ],
+    # Token-bucket rates for backend.throttling (`<scope>` per user, `<scope>_ip` per IP)
+    "DEFAULT_THROTTLE_RATES": {
+        "like": config("THROTTLE_LIKE", default="60/min"),
+        "comment": config("THROTTLE_COMMENT", default="20/min"),
+        "follow": config("THROTTLE_FOLLOW", default="30/min"),
+        "login_ip": config("THROTTLE_LOGIN_IP", default="10/min"),
+        "register_ip": config("THROTTLE_REGISTER_IP", default="5/hour"),
+        "password_reset_ip": config("THROTTLE_PASSWORD_RESET_IP", default="5/hour"),
+    },
 }
 
 
+# Caches: local memory by default (dev/tests); set REDIS_URL in production so
+# throttle buckets are shared between workers. The Instrumented* backends are
+# the stock ones plus hit/miss counting for backend.instrumentation.
+REDIS_URL = config("REDIS_URL", default="")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "backend.instrumentation.InstrumentedRedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "backend.instrumentation.InstrumentedLocMemCache",
+        }
+    }
+THROTTLE_CACHE_ALIAS = "default"
+
+# adminpanel.stats buffers DailyStat counters in the cache and flushes them
+# at most this often (seconds); 0 writes each bump straight to the table.
+# Needs a shared cache, so it is off unless REDIS_URL is set.
+DAILY_STATS_FLUSH_SECONDS = config("DAILY_STATS_FLUSH_SECONDS", cast=float, default=10 if REDIS_URL else 0)
+
+# posts.hydration caches (username, avatar_url) per post author. Profile
+# saves invalidate the entry, which only reaches other workers through a
+# shared cache, so it is off (0) unless REDIS_URL is set.
+POST_AUTHOR_CACHE_TIMEOUT = config("POST_AUTHOR_CACHE_TIMEOUT", cast=int, default=300 if REDIS_URL else 0)
+
+
 
 # SIMPLE_JWT = {
 # "ACCESS_TOKEN_LIFETIME": timedelta(minutes=15),
@@ -273,8 +379,16 @@ SIMPLE_JWT = {
     "UPDATE_LAST_LOGIN": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
     "SIGNING_KEY": config("JWT_SECRET", default=SECRET_KEY),   
+    "TOKEN_REFRESH_SERIALIZER": "accounts.serializers.CachedTokenRefreshSerializer",
 }
 
+# In-process blacklist cache (accounts.token_cache) in front of token_blacklist
+TOKEN_BLACKLIST_BLOOM_CAPACITY = config("TOKEN_BLACKLIST_BLOOM_CAPACITY", cast=int, default=100_000)
+TOKEN_BLACKLIST_LRU_SIZE = config("TOKEN_BLACKLIST_LRU_SIZE", cast=int, default=10_000)
+TOKEN_BLACKLIST_SYNC_SECONDS = config("TOKEN_BLACKLIST_SYNC_SECONDS", cast=float, default=5)
+# Full rebuild interval; drops tokens removed by `manage.py prune_tokens`.
+TOKEN_BLACKLIST_REBUILD_SECONDS = config("TOKEN_BLACKLIST_REBUILD_SECONDS", cast=float, default=3600)
+
 
 import logging
 # logging.getLogger("django.server").setLevel(logging.DEBUG)
@@ -282,6 +396,66 @@ import logging
 if DEBUG:
     logging.getLogger("django.server").setLevel(logging.DEBUG)
 
+# Request metrics (backend.instrumentation). Every request is counted and
+# timed; INSTRUMENTATION_SAMPLE_RATE of them also get DB/cache/serializer
+# breakdowns and a JSON log line. /metrics/ serves the Prometheus text format
+# to staff, or to `Authorization: Bearer <METRICS_TOKEN>` when that is set.
+# Sampling is off by default under DEBUG and `manage.py test`, so dev and
+# test output stays deterministic; set the rate explicitly to turn it on.
+_RUNNING_TESTS = sys.argv[1:2] == ["test"]
+INSTRUMENTATION_SAMPLE_RATE = config(
+    "INSTRUMENTATION_SAMPLE_RATE", cast=float, default=0.0 if DEBUG or _RUNNING_TESTS else 0.1,
+)
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
+# Slow-query / N+1 detector (backend.query_detector, manage.py query_report).
+# Always on with QUERY_DETECTOR_ENABLED; per request via `X-Query-Detector: 1`
+# only when QUERY_DETECTOR_ALLOW_HEADER is set explicitly: reports expose SQL
+# and call sites to whoever sends the header, so it is off even under DEBUG.
+QUERY_DETECTOR_ENABLED = config("QUERY_DETECTOR_ENABLED", cast=bool, default=False)
+QUERY_DETECTOR_ALLOW_HEADER = config("QUERY_DETECTOR_ALLOW_HEADER", cast=bool, default=False)
+QUERY_DETECTOR_REPEAT_THRESHOLD = config("QUERY_DETECTOR_REPEAT_THRESHOLD", cast=int, default=5)
+QUERY_DETECTOR_SLOW_MS = config("QUERY_DETECTOR_SLOW_MS", cast=float, default=100)
+QUERY_DETECTOR_REPORT_PATH = config("QUERY_DETECTOR_REPORT_PATH", default=str(BASE_DIR / "query_detector.jsonl"))
+
+# Long-poll for new notifications (/api/notifications/poll/). An async view:
+# serve it with an ASGI worker (backend.asgi), otherwise each waiting client
+# holds a sync worker for up to NOTIFICATION_POLL_TIMEOUT seconds.
+NOTIFICATION_POLL_TIMEOUT = config("NOTIFICATION_POLL_TIMEOUT", cast=float, default=25)
+NOTIFICATION_POLL_INTERVAL = config("NOTIFICATION_POLL_INTERVAL", cast=float, default=1)
+
+# Posts not created, edited, liked or commented on for this long move to the
+# archive tables (posts.archive, `manage.py archive_posts`); reads by id still
+# find them.
+POST_ARCHIVE_AFTER_DAYS = config("POST_ARCHIVE_AFTER_DAYS", cast=int, default=365)
+# A write to an archived post restores it inside the request; posts with more
+# likes + comments than this are refused (409) and restored with
+# `manage.py archive_posts --restore <id>` instead.
+POST_RESTORE_MAX_ROWS = config("POST_RESTORE_MAX_ROWS", cast=int, default=5000)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "message": {"format": "%(message)s"},
+    },
+    "handlers": {
+        "instrumentation": {"class": "backend.instrumentation.ConsoleHandler", "formatter": "message"},
+    },
+    "loggers": {
+        "backend.instrumentation": {
+            "handlers": ["instrumentation"],
+            "level": config("INSTRUMENTATION_LOG_LEVEL", default="INFO"),
+            "propagate": False,
+        },
+        "backend.query_detector": {
+            "handlers": ["instrumentation"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+    },
+}
+
 
 # https://social-connect-0b92.onrender.com
 
@@ -299,4 +473,15 @@ EMAIL_HOST_USER = config("EMAIL_HOST_USER", default="")
 EMAIL_HOST_PASSWORD = config("EMAIL_HOST_PASSWORD", default="")  
 DEFAULT_FROM_EMAIL = config("DEFAULT_FROM_EMAIL", default=EMAIL_HOST_USER)
 
-
+# Outbox delivery (accounts.utils.deliver_outbox / manage.py send_queued_emails).
+# Point EMAIL_BACKEND at the locmem or filebased backend for tests/local runs.
+EMAIL_FILE_PATH = config("EMAIL_FILE_PATH", default=str(BASE_DIR / "sent_emails"))
+EMAIL_OUTBOX_BACKEND = config("EMAIL_OUTBOX_BACKEND", default="")
+EMAIL_OUTBOX_MAX_ATTEMPTS = config("EMAIL_OUTBOX_MAX_ATTEMPTS", cast=int, default=5)
+EMAIL_OUTBOX_BACKOFF_SECONDS = config("EMAIL_OUTBOX_BACKOFF_SECONDS", cast=int, default=30)
+# How long a claimed batch is hidden from other senders before it is retried.
+EMAIL_OUTBOX_CLAIM_SECONDS = config("EMAIL_OUTBOX_CLAIM_SECONDS", cast=int, default=300)
+
+# Chunked post/user deletion (adminpanel.deletion / manage.py process_deletions).
+DELETION_JOB_MAX_ATTEMPTS = config("DELETION_JOB_MAX_ATTEMPTS", cast=int, default=5)
+DELETION_JOB_LEASE_SECONDS = config("DELETION_JOB_LEASE_SECONDS", cast=int, default=300)
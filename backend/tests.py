@@ -0,0 +1,260 @@
+import datetime
+import io
+import json
+import logging
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import path
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from posts.models import Post
+from .db_router import PrimaryReplicaRouter, ReplicaRoutingMiddleware
+from .instrumentation import ConsoleHandler, registry
+from .query_detector import QueryLog, normalize_sql
+from .renderers import ORJSONRenderer
+from .throttling import IPTokenBucketThrottle, TokenBucketThrottle, UserTokenBucketThrottle
+
+User = get_user_model()
+
+
+class ThrottledView(APIView):
+    permission_classes = []
+    throttle_classes = [UserTokenBucketThrottle, IPTokenBucketThrottle]
+    throttle_scope = "test"
+
+    def post(self, request):
+        return Response({"ok": True})
+
+
+class OtherScopeView(ThrottledView):
+    throttle_scope = "other"
+
+
+urlpatterns = [
+    path("throttled/", ThrottledView.as_view()),
+    path("other/", OtherScopeView.as_view()),
+]
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {"test": "2/min", "test_ip": "10/min", "other": "1/min"},
+    },
+)
+class TokenBucketThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = 1_000_000.0
+        patcher = mock.patch.object(TokenBucketThrottle, "timer", staticmethod(lambda: self.now))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("t", "t@example.com", "pw-12345678", is_active=True))
+
+    def post(self, url="/throttled/"):
+        return self.client.post(url)
+
+    def test_exhausted_bucket_returns_429_with_retry_after(self):
+        self.assertEqual([self.post().status_code for _ in range(2)], [200, 200])
+        response = self.post()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "30")  # one token refills in 60 s / 2
+
+    def test_bucket_refills_over_time(self):
+        self.post(), self.post()
+        self.now += 29
+        self.assertEqual(self.post().status_code, 429)
+        self.now += 1
+        self.assertEqual(self.post().status_code, 200)
+        self.now += 3600  # refills to capacity, no further
+        self.assertEqual([self.post().status_code for _ in range(3)], [200, 200, 429])
+
+    def test_scopes_have_separate_buckets(self):
+        self.post(), self.post()
+        self.assertEqual(self.post("/other/").status_code, 200)
+        self.assertEqual(self.post("/other/").status_code, 429)
+        self.assertEqual(self.post().status_code, 429)
+
+    def test_safe_methods_are_not_throttled(self):
+        self.post(), self.post()
+        self.assertEqual(self.client.get("/throttled/").status_code, 405)  # reached the view
+
+
+class ORJSONRendererTests(TestCase):
+    def test_output_matches_drf_json_renderer(self):
+        data = {
+            "aware": datetime.datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+            "naive": datetime.datetime(2024, 5, 1, 12, 30, 15),
+            "date": datetime.date(2024, 5, 1),
+            "time": datetime.time(9, 5, 1, 250000),
+            "decimal": Decimal("1.50"),
+            "lazy": gettext_lazy("General"),
+            "nested": [{1: "int key", 2.5: "float key", True: "bool key", None: "null key"}],
+            "text": "caf\u00e9 \u2028",
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_non_default_json_settings_are_honoured(self):
+        data = {"text": "caf\u00e9", "items": [1, 2]}
+        for attr, value in (("compact", False), ("ensure_ascii", True)):
+            with self.subTest(attr), mock.patch.object(JSONRenderer, attr, value):
+                self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0"])
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user(username="reader", email="reader@example.com", password="x")
+
+    def read_alias(self, method, user=None, status=200):
+        request = getattr(self.factory, method)("/")
+        request.user = user or AnonymousUser()
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(Post))
+            return HttpResponse(status=status)
+
+        ReplicaRoutingMiddleware(view)(request)
+        return seen[0]
+
+    def test_safe_requests_read_from_replica(self):
+        self.assertEqual(self.read_alias("get"), "replica_0")
+        self.assertEqual(self.read_alias("get", self.user), "replica_0")
+
+    def test_writes_and_non_request_reads_use_primary(self):
+        self.assertEqual(self.read_alias("post", self.user), "default")
+        self.assertEqual(self.router.db_for_read(Post), "default")
+        self.assertEqual(self.router.db_for_write(Post), "default")
+
+    def test_successful_write_pins_user_reads_to_primary(self):
+        other = User.objects.create_user(username="other", email="other@example.com", password="x")
+        self.read_alias("post", self.user, status=400)
+        self.assertEqual(self.read_alias("get", self.user), "replica_0")
+
+        self.read_alias("post", self.user)
+        self.assertEqual(self.read_alias("get", self.user), "default")
+        self.assertEqual(self.read_alias("get", other), "replica_0")
+
+
+@override_settings(INSTRUMENTATION_SAMPLE_RATE=1.0, METRICS_TOKEN="scrape")
+class InstrumentationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("metrics", "metrics@example.com", "pw-12345678", is_active=True)
+        Post.objects.create(author=cls.user, content="hello")
+
+    def setUp(self):
+        registry.reset()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_sampled_request_records_breakdown(self):
+        with self.assertLogs("backend.instrumentation") as logs:
+            self.assertEqual(self.client.get("/api/posts/").status_code, 200)
+        line = logs.records[0].getMessage()
+        self.assertIn('"view": "post-list-create"', line)
+        self.assertNotIn('"db_queries": 0,', line)
+
+        body = registry.render()
+        self.assertIn('http_requests_total{method="GET",status="200",view="post-list-create"} 1', body)
+        self.assertIn('http_request_duration_seconds_count{method="GET",view="post-list-create"} 1', body)
+        self.assertIn('db_queries_total{view="post-list-create"}', body)
+
+    def test_log_lines_follow_the_current_stderr(self):
+        handler = ConsoleHandler()
+        with mock.patch("sys.stderr", io.StringIO()) as stderr:
+            handler.emit(logging.makeLogRecord({"msg": '{"event": "request"}'}))
+        self.assertEqual(stderr.getvalue(), '{"event": "request"}\n')
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_unsampled_request_is_only_counted(self):
+        self.client.get("/api/posts/")
+        body = registry.render()
+        self.assertIn("http_requests_total", body)
+        self.assertNotIn("db_queries_total", body)
+
+    def test_metrics_endpoint_requires_token(self):
+        with self.assertLogs("backend.instrumentation"):  # sampled, keep the lines out of test output
+            self.assertEqual(self.client.get("/metrics/").status_code, 403)
+            response = self.client.get("/metrics/", HTTP_AUTHORIZATION="Bearer scrape")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+
+
+class QueryDetectorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("detect", "detect@example.com", "pw-12345678", is_active=True)
+        for i in range(3):
+            Post.objects.create(author=cls.user, content=f"post {i}")
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.report = str(Path(self.tmp.name) / "detector.jsonl")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_normalize_collapses_literals_and_in_lists(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM t WHERE a = 'x''y' AND b IN (%s, %s,  %s) LIMIT 20"),
+            "SELECT * FROM t WHERE a = ? AND b IN (...) LIMIT ?",
+        )
+        self.assertEqual(normalize_sql('SELECT "t1"."id" FROM "t1"'), 'SELECT "t1"."id" FROM "t1"')
+
+    def test_header_is_ignored_by_default(self):
+        response = self.client.get("/api/posts/", HTTP_X_QUERY_DETECTOR="1")
+        self.assertNotIn("X-Query-Count", response)
+
+    def test_header_enables_detection_and_report(self):
+        with override_settings(QUERY_DETECTOR_ALLOW_HEADER=True, QUERY_DETECTOR_REPORT_PATH=self.report):
+            plain = self.client.get("/api/posts/")
+            detected = self.client.get("/api/posts/", HTTP_X_QUERY_DETECTOR="1")
+        self.assertNotIn("X-Query-Count", plain)
+        self.assertGreater(int(detected["X-Query-Count"]), 0)
+
+        entry = json.loads(Path(self.report).read_text().strip())
+        self.assertEqual(entry["view"], "post-list-create")
+        self.assertEqual(entry["queries"], int(detected["X-Query-Count"]))
+
+    def test_repeated_template_is_flagged_with_call_site(self):
+        log = QueryLog(slow_ms=10_000)
+        with connection.execute_wrapper(log):
+            for post in Post.objects.all():
+                User.objects.get(pk=post.author_id)
+        (item,) = log.repeated(threshold=3)
+        self.assertEqual(item["count"], 3)
+        self.assertIn('WHERE "accounts_user"."id" = ?', item["template"])
+        self.assertTrue(any(frame.startswith("backend/tests.py:") for frame in item["stack"]))
+
+    def test_report_summarizes_per_view(self):
+        with override_settings(QUERY_DETECTOR_ENABLED=True, QUERY_DETECTOR_REPORT_PATH=self.report):
+            self.client.get("/api/posts/")
+            for post in Post.objects.all():
+                self.client.get(f"/api/posts/{post.pk}/")
+        out = io.StringIO()
+        call_command("query_report", path=self.report, stdout=out)
+        report = out.getvalue()
+        self.assertIn("GET post-list-create: 1 request(s)", report)
+        self.assertIn("GET post-detail: 3 request(s)", report)
@@ -0,0 +1,136 @@
+"""
+Token-bucket throttles for write and auth endpoints.
+
+Views set `throttle_classes` and `throttle_scope`; rates come from
+REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"] (`<scope>` per user, `<scope>_ip`
+per client IP). Buckets live in the THROTTLE_CACHE_ALIAS cache.
+
+Spending a token must be atomic, or concurrent requests from one client all
+read the same count and get through. On Redis the whole read-refill-spend
+step is one Lua script. Other backends fall back to get/set under a process
+lock, which is only atomic within a worker: fine for the per-process locmem
+cache, but limits shared between workers need Redis.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+# KEYS[1] = bucket; ARGV = capacity, refill per second, now, ttl.
+# Returns {allowed, tokens left}; tokens as a string since Lua numbers
+# are truncated to integers on the way out.
+_SPEND_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1]) or capacity
+local last = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - last) * refill)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", tostring(now))
+redis.call("EXPIRE", KEYS[1], ARGV[4])
+return {allowed, tostring(tokens)}
+"""
+
+_local_lock = threading.Lock()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Each key holds a bucket of `num_requests` tokens refilled continuously
+    over `duration` seconds; a request spends one token. Only one small
+    (tokens, timestamp) pair is stored per key, unlike DRF's
+    SimpleRateThrottle which keeps a full request history list.
+    Safe (read-only) methods are never throttled.
+    """
+    timer = time.time
+    rate_suffix = ""
+    cache_format = "throttle_tb_%(scope)s_%(ident)s"
+
+    def __init__(self):
+        self._wait = None
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, "THROTTLE_CACHE_ALIAS", "default")]
+
+    def get_rate(self, view):
+        scope = getattr(view, "throttle_scope", None)
+        if not scope:
+            return None, None
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(f"{scope}{self.rate_suffix}")
+        if not rate:
+            return None, None
+        num, period = rate.split("/")
+        return int(num), {"s": 1, "m": 60, "h": 3600, "d": 86400}[period[0]]
+
+    def get_ident_for(self, request):
+        raise NotImplementedError(".get_ident_for() must be overridden")
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+
+        capacity, duration = self.get_rate(view)
+        if capacity is None:
+            return True
+
+        key = self.cache_format % {
+            "scope": f"{view.throttle_scope}{self.rate_suffix}",
+            "ident": self.get_ident_for(request),
+        }
+        refill_per_sec = capacity / duration
+        allowed, tokens = self.spend(key, capacity, refill_per_sec, self.timer(), duration)
+        if not allowed:
+            self._wait = (1 - tokens) / refill_per_sec
+        return allowed
+
+    def spend(self, key, capacity, refill_per_sec, now, ttl):
+        """Refill the bucket at `key`, then take a token if one is left; returns (allowed, tokens)."""
+        cache = self.cache
+        if isinstance(cache, RedisCache):
+            key = cache.make_and_validate_key(key)
+            client = cache._cache.get_client(key, write=True)
+            allowed, tokens = client.eval(
+                _SPEND_SCRIPT, 1, key, capacity, repr(refill_per_sec), repr(now), int(ttl),
+            )
+            return bool(allowed), float(tokens)
+
+        with _local_lock:
+            tokens, last = cache.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0, now - last) * refill_per_sec)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            cache.set(key, (tokens, now), ttl)
+        return allowed, tokens
+
+    def wait(self):
+        return self._wait
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """Per-user bucket (per-IP for anonymous requests)."""
+
+    def get_ident_for(self, request):
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """Per-IP bucket, rate taken from `<scope>_ip`."""
+    rate_suffix = "_ip"
+
+    def get_ident_for(self, request):
+        return f"ip:{self.get_ident(request)}"
@@ -1,11 +1,14 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from .instrumentation import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path("api/auth/", include("accounts.urls")),
     path("api/posts/", include("posts.urls")),
     path('api/notifications/', include('notifications.urls')),
     path('api/admin/', include('adminpanel.urls')),
+    path("metrics/", metrics_view, name="metrics"),
 
 ]
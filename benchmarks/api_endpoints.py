@@ -0,0 +1,257 @@
+"""
+End-to-end API latency on a synthetic social graph.
+
+    python benchmarks/api_endpoints.py [--users 2000] [--requests 200] [--seed 1]
+                                       [--output results.json] [--compare old.json]
+
+Creates a throwaway test database (like `manage.py test`), seeds it with a
+power-law social graph (adminpanel.seeding, as `manage.py seed_social_graph`),
+then drives the real URLconf and middleware through
+DRF's test client: feed, post list/create, like toggle, comment list/create,
+follow/unfollow and notifications, each as a randomly chosen active user.
+Throttle rates are lifted and request instrumentation is off so only the
+endpoints themselves are measured.
+
+Per scenario it reports p50/p95/p99/mean latency, queries per request and
+single-client throughput, and writes everything (plus git revision, scale
+and environment) to a JSON file, by default benchmarks/results/api-<rev>.json.
+Pass an earlier file with --compare to print the deltas.
+
+Query counting wraps every request in CaptureQueriesContext, which adds a
+little constant overhead to each.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "bench")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext, override_settings  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from accounts.models import Follow, Profile, User  # noqa: E402
+from adminpanel.seeding import generate_social_graph  # noqa: E402
+from posts.models import Post  # noqa: E402
+
+# ---- Scenarios ----
+
+class Bench:
+    def __init__(self, rng):
+        self.rng = rng
+        self.client = APIClient()
+        self.users = list(User.objects.filter(is_active=True))
+        self.public_posts = list(
+            Post.objects.filter(is_active=True, author__profile__visibility=Profile.VIS_PUBLIC)
+            .values_list("id", flat=True)
+        )
+        self.results = {}
+        self.measuring = False
+
+    def actor(self):
+        user = self.rng.choice(self.users)
+        self.client.force_authenticate(user)
+        return user
+
+    def timed(self, name, method, url, data=None):
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data, format="json")
+        elapsed = time.perf_counter() - start
+        if not self.measuring:
+            return response
+        stats = self.results.setdefault(name, {"latencies": [], "queries": [], "errors": 0})
+        stats["latencies"].append(elapsed)
+        stats["queries"].append(len(queries))
+        if response.status_code >= 400:
+            stats["errors"] += 1
+        return response
+
+    def feed(self):
+        self.actor()
+        self.timed("feed", "get", "/api/posts/feed/")
+
+    def post_list(self):
+        self.actor()
+        self.timed("post_list", "get", "/api/posts/")
+
+    def post_create(self):
+        self.actor()
+        self.timed("post_create", "post", "/api/posts/", {"content": "benchmark post", "category": "general"})
+
+    def like_toggle(self):
+        self.actor()
+        self.timed("like_toggle", "post", f"/api/posts/{self.rng.choice(self.public_posts)}/like/")
+
+    def comment_list(self):
+        self.actor()
+        self.timed("comment_list", "get", f"/api/posts/{self.rng.choice(self.public_posts)}/comments/")
+
+    def comment_create(self):
+        self.actor()
+        post_id = self.rng.choice(self.public_posts)
+        self.timed("comment_create", "post", f"/api/posts/{post_id}/comments/", {"content": "benchmark comment"})
+
+    def follow_unfollow(self):
+        user = self.actor()
+        target = self.rng.choice(self.users)
+        while target.pk == user.pk:
+            target = self.rng.choice(self.users)
+        Follow.objects.filter(follower=user, following=target).delete()
+        self.timed("follow", "post", f"/api/auth/follow/{target.pk}/")
+        self.timed("unfollow", "post", f"/api/auth/unfollow/{target.pk}/")
+
+    def notifications(self):
+        self.actor()
+        self.timed("notifications", "get", "/api/notifications/")
+
+    SCENARIOS = (
+        "feed", "post_list", "post_create", "like_toggle", "comment_list",
+        "comment_create", "follow_unfollow", "notifications",
+    )
+
+    def run(self, requests, warmup):
+        for name in self.SCENARIOS:
+            step = getattr(self, name)
+            self.measuring = False
+            for _ in range(warmup):
+                step()
+            self.measuring = True
+            for _ in range(requests):
+                step()
+        return {name: summarize(stats) for name, stats in self.results.items()}
+
+
+def percentile(sorted_values, p):
+    k = (len(sorted_values) - 1) * p
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(stats):
+    lat = sorted(stats["latencies"])
+    ms = lambda s: round(s * 1000, 3)  # noqa: E731
+    return {
+        "requests": len(lat),
+        "errors": stats["errors"],
+        "p50_ms": ms(percentile(lat, 0.50)),
+        "p95_ms": ms(percentile(lat, 0.95)),
+        "p99_ms": ms(percentile(lat, 0.99)),
+        "mean_ms": ms(statistics.fmean(lat)),
+        "queries_mean": round(statistics.fmean(stats["queries"]), 2),
+        "queries_max": max(stats["queries"]),
+        "rps": round(len(lat) / sum(lat), 1),
+    }
+
+
+# ---- Reporting ----
+
+def git_revision():
+    try:
+        rev = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        return rev + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_table(results, baseline=None):
+    print(f"{'scenario':16s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'queries':>8s} {'req/s':>8s} {'err':>4s}")
+    for name, r in results.items():
+        line = (f"{name:16s} {r['p50_ms']:8.2f} {r['p95_ms']:8.2f} {r['p99_ms']:8.2f} "
+                f"{r['queries_mean']:8.1f} {r['rps']:8.1f} {r['errors']:4d}")
+        old = (baseline or {}).get(name)
+        if old:
+            line += (f"   p50 {(r['p50_ms'] / old['p50_ms'] - 1) * 100:+5.0f}%"
+                     f"  p95 {(r['p95_ms'] / old['p95_ms'] - 1) * 100:+5.0f}%"
+                     f"  queries {r['queries_mean'] - old['queries_mean']:+.1f}")
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--follows", type=float, default=30, help="Mean follows per user.")
+    parser.add_argument("--posts", type=float, default=5, help="Mean posts per user.")
+    parser.add_argument("--likes", type=float, default=8, help="Mean likes per post.")
+    parser.add_argument("--comments", type=float, default=2, help="Mean top-level comments per post.")
+    parser.add_argument("--alpha", type=float, default=1.1, help="Zipf exponent of user popularity.")
+    parser.add_argument("--days", type=int, default=60, help="Spread posts over this many days.")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario.")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--keepdb", action="store_true", help="Reuse/keep the test database (skips seeding if populated).")
+    parser.add_argument("--output", help="Results file (default benchmarks/results/api-<rev>.json).")
+    parser.add_argument("--compare", help="Earlier results file to diff against.")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=args.keepdb)
+    try:
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {}},
+            INSTRUMENTATION_SAMPLE_RATE=0,
+            QUERY_DETECTOR_ENABLED=False,
+        ):
+            start = time.perf_counter()
+            if args.keepdb and User.objects.exists():
+                dataset = {"reused": True, "users": User.objects.count(), "posts": Post.objects.count()}
+            else:
+                dataset = generate_social_graph(
+                    users=args.users, follows=args.follows, posts=args.posts, likes=args.likes,
+                    comments=args.comments, alpha=args.alpha, days=args.days, seed=args.seed,
+                )
+            dataset["seed_seconds"] = round(time.perf_counter() - start, 1)
+            print("dataset:", ", ".join(f"{k}={v}" for k, v in dataset.items()))
+            results = Bench(rng).run(args.requests, args.warmup)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())["scenarios"]
+    print_table(results, baseline)
+
+    revision = git_revision()
+    output = Path(args.output) if args.output else ROOT / "benchmarks" / "results" / f"api-{revision}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "revision": revision,
+        "timestamp": timezone.now().isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "cache": settings.CACHES["default"]["BACKEND"],
+        },
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "dataset": dataset,
+        "scenarios": results,
+    }, indent=2) + "\n")
+    print(f"saved {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Upload throughput per worker under a slow storage backend: WSGI vs ASGI.
+
+    python benchmarks/async_concurrency.py [--delay 0.2] [--threads 8]
+                                           [--concurrency 1,8,32,64] [--requests 64]
+                                           [--output results.json]
+
+A local stub server stands in for Supabase Storage. It accepts every upload
+and answers after --delay seconds. SUPABASE_URL points at it for the run.
+The avatar upload and post-with-image endpoints are then driven in process
+at each concurrency level, two ways:
+
+  wsgi  the WSGI handler behind a --threads thread pool, like one
+        `gunicorn --threads N` worker. A request holds its thread for the
+        whole upload.
+  asgi  the ASGI handler on one event loop, like one
+        `gunicorn -k uvicorn.workers.UvicornWorker` worker. Waiting requests
+        only hold a coroutine.
+
+Each level reports requests/s and p50/p95 latency. The gap between the two
+widens with concurrency, up to the point where the ASGI worker's single
+thread for sync code (auth, validation, ORM) becomes the limit. Requests go
+through the real URLconf and middleware with JWT auth, against a throwaway
+test database.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+class SlowStorage(BaseHTTPRequestHandler):
+    delay = 0.2
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.delay)
+        body = json.dumps({"Key": self.path.rsplit("/object/", 1)[-1]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_POST = do_PUT = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+ThreadingHTTPServer.daemon_threads = True
+STUB = ThreadingHTTPServer(("127.0.0.1", 0), SlowStorage)
+STUB.request_queue_size = 1024
+os.environ["SUPABASE_URL"] = f"http://127.0.0.1:{STUB.server_port}"
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "bench")
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import httpx  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.core.asgi import get_asgi_application  # noqa: E402
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from PIL import Image  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+
+from accounts.models import User  # noqa: E402
+
+
+def png_bytes():
+    buf = io.BytesIO()
+    Image.new("RGB", (64, 64), (200, 80, 40)).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def scenarios(image):
+    return {
+        "avatar_upload": ("/api/auth/me/avatar/", {}, {"avatar": ("a.png", image, "image/png")}),
+        "post_with_image": ("/api/posts/", {"content": "bench"}, {"upload_image": ("p.png", image, "image/png")}),
+    }
+
+
+def run_wsgi(url, data, files, tokens, concurrency, requests, threads):
+    app = get_wsgi_application()
+    local = threading.local()
+
+    def one(i):
+        if not hasattr(local, "client"):
+            local.client = httpx.Client(transport=httpx.WSGITransport(app=app), base_url="http://testserver")
+        start = time.perf_counter()
+        response = local.client.post(url, data=data, files=files, headers={"Authorization": f"Bearer {tokens[i % len(tokens)]}"})
+        return time.perf_counter() - start, response.status_code
+
+    # `concurrency` clients, but only `threads` requests in the worker at once.
+    with ThreadPoolExecutor(min(concurrency, threads)) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(one, range(requests)))
+    return results, time.perf_counter() - start
+
+
+async def run_asgi(url, data, files, tokens, concurrency, requests):
+    app = get_asgi_application()
+    transport = httpx.ASGITransport(app=app)
+    queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(i)
+    results = []
+
+    async def client():
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as http:
+            while not queue.empty():
+                i = queue.get_nowait()
+                start = time.perf_counter()
+                response = await http.post(url, data=data, files=files, headers={"Authorization": f"Bearer {tokens[i % len(tokens)]}"})
+                results.append((time.perf_counter() - start, response.status_code))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return results, time.perf_counter() - start
+
+
+def summarize(results, elapsed):
+    lat = sorted(r[0] for r in results)
+    return {
+        "requests": len(lat),
+        "errors": sum(status >= 400 for _, status in results),
+        "rps": round(len(lat) / elapsed, 1),
+        "p50_ms": round(statistics.median(lat) * 1000, 1),
+        "p95_ms": round(lat[int(0.95 * (len(lat) - 1))] * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--delay", type=float, default=0.2, help="Stub storage latency in seconds.")
+    parser.add_argument("--threads", type=int, default=8, help="WSGI worker threads.")
+    parser.add_argument("--concurrency", default="1,8,32,64", help="Comma-separated client counts.")
+    parser.add_argument("--requests", type=int, default=64, help="Requests per level (at least the concurrency).")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--output", help="Write results as JSON here.")
+    args = parser.parse_args()
+
+    SlowStorage.delay = args.delay
+    threading.Thread(target=STUB.serve_forever, daemon=True).start()
+
+    old_name = connection.settings_dict["NAME"]
+    tmp = tempfile.TemporaryDirectory()
+    if connection.vendor == "sqlite":
+        # A file, not :memory:, so WSGI threads share one database.
+        connection.settings_dict["TEST"]["NAME"] = str(Path(tmp.name) / "bench.sqlite3")
+        connection.settings_dict.setdefault("OPTIONS", {})["timeout"] = 30
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    results = {}
+    try:
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            INSTRUMENTATION_SAMPLE_RATE=0,
+            QUERY_DETECTOR_ENABLED=False,
+        ):
+            users = [
+                User.objects.create_user(f"bench{i}", f"bench{i}@example.com", is_active=True)
+                for i in range(args.users)
+            ]
+            tokens = [str(AccessToken.for_user(u)) for u in users]
+            connection.close()  # the servers below open their own
+
+            image = png_bytes()
+            print(f"storage delay {args.delay * 1000:.0f} ms, {args.threads} WSGI threads")
+            print(f"{'scenario':16s} {'clients':>7s}  {'wsgi r/s':>8s} {'p95':>7s}  {'asgi r/s':>8s} {'p95':>7s} {'err':>4s}")
+            for name, (url, data, files) in scenarios(image).items():
+                for concurrency in (int(c) for c in args.concurrency.split(",")):
+                    n = max(args.requests, concurrency)
+                    wsgi = summarize(*run_wsgi(url, data, files, tokens, concurrency, n, args.threads))
+                    asgi = summarize(*asyncio.run(run_asgi(url, data, files, tokens, concurrency, n)))
+                    results.setdefault(name, {})[concurrency] = {"wsgi": wsgi, "asgi": asgi}
+                    print(f"{name:16s} {concurrency:7d}  {wsgi['rps']:8.1f} {wsgi['p95_ms']:7.0f}  "
+                          f"{asgi['rps']:8.1f} {asgi['p95_ms']:7.0f} {wsgi['errors'] + asgi['errors']:4d}")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        tmp.cleanup()
+        STUB.shutdown()
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"params": vars(args), "scenarios": results}, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
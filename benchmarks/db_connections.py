@@ -0,0 +1,89 @@
+"""
+Requests/sec with and without persistent database connections.
+
+    python benchmarks/db_connections.py [--requests 500] [--threads 4] [--query "SELECT 1"]
+
+Each simulated request fires request_started / request_finished around one
+query, which is exactly where Django opens and (for CONN_MAX_AGE=0) closes
+connections, so the numbers include connect + TLS + auth cost against the
+configured DATABASES["default"]. Compares CONN_MAX_AGE=0 ("per-request")
+with the configured persistent setting ("persistent"); if DB_NATIVE_POOL is
+on, the configured mode is the pool instead.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.signals import request_finished, request_started  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+
+
+def fake_request(query):
+    request_started.send(sender=None)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(query)
+            cursor.fetchall()
+    finally:
+        request_finished.send(sender=None)
+
+
+def worker(n, query):
+    for _ in range(n):
+        fake_request(query)
+    connections.close_all()
+
+
+def run(label, conn_max_age, requests, threads, query):
+    settings_dict = connections["default"].settings_dict
+    original = settings_dict["CONN_MAX_AGE"]
+    settings_dict["CONN_MAX_AGE"] = conn_max_age
+    connections.close_all()
+    try:
+        fake_request(query)  # warm-up (and pool creation, if any)
+        per_thread = requests // threads
+        start = time.perf_counter()
+        with ThreadPoolExecutor(threads) as pool:
+            for future in [pool.submit(worker, per_thread, query) for _ in range(threads)]:
+                future.result()
+        elapsed = time.perf_counter() - start
+    finally:
+        settings_dict["CONN_MAX_AGE"] = original
+        connections.close_all()
+
+    total = per_thread * threads
+    print(f"{label:<12} {total / elapsed:10.1f} req/s  ({elapsed * 1000 / total:.2f} ms/request)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--query", default="SELECT 1")
+    args = parser.parse_args()
+
+    db = settings.DATABASES["default"]
+    pooled = "pool" in db.get("OPTIONS", {})
+    print(
+        f"engine={db['ENGINE']} host={db.get('HOST') or '-'} port={db.get('PORT') or '-'} "
+        f"pool={pooled} server_side_cursors={not db.get('DISABLE_SERVER_SIDE_CURSORS')}"
+    )
+    if not pooled:
+        run("per-request", 0, args.requests, args.threads, args.query)
+    configured = db["CONN_MAX_AGE"]
+    run("pool" if pooled else "persistent", configured if configured else None, args.requests, args.threads, args.query)
+
+
+if __name__ == "__main__":
+    main()
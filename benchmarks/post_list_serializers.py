@@ -0,0 +1,98 @@
+"""
+PostSerializer + JSONRenderer vs. the .values() row path + ORJSONRenderer on
+a 50-item page.
+
+    python benchmarks/post_list_serializers.py [--items 50] [--rounds 500]
+
+Both paths are fed equivalent in-memory data (model instances vs. dict rows),
+so this measures serialization and rendering only; no database is needed.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "bench")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.utils import timezone  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from accounts.models import Profile, User  # noqa: E402
+from backend.renderers import ORJSONRenderer  # noqa: E402
+from posts.models import Post  # noqa: E402
+from posts.serializers import PostSerializer, post_row_to_representation  # noqa: E402
+
+
+def make_page(n):
+    now = timezone.now()
+    instances, rows = [], []
+    for i in range(n):
+        user = User(id=i % 7 + 1, username=f"user{i % 7}")
+        user.profile = Profile(user=user, avatar_url=f"https://cdn.example.com/a/{i % 7}.png")
+        created = now - timedelta(minutes=i)
+        post = Post(
+            id=1000 - i, author=user, content="lorem ipsum dolor sit amet " * 6,
+            created_at=created, updated_at=created, category="general",
+            is_active=True, like_count=i * 3, comment_count=i,
+        )
+        post.liked_by_me = i % 2 == 0
+        instances.append(post)
+        rows.append({
+            "id": post.id, "content": post.content, "author": user.id,
+            "author__username": user.username,
+            "author__profile__avatar_url": user.profile.avatar_url,
+            "created_at": created, "updated_at": created, "image_url": None,
+            "category": "general", "is_active": True, "like_count": post.like_count,
+            "comment_count": post.comment_count, "liked_by_me": post.liked_by_me,
+        })
+    return instances, rows
+
+
+def timeit(fn, rounds):
+    fn()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args()
+
+    instances, rows = make_page(args.items)
+    std, fast = JSONRenderer(), ORJSONRenderer()
+
+    def wrap(results):
+        return {"count": len(results), "next": None, "previous": None, "results": results}
+
+    model_ser = lambda: PostSerializer(instances, many=True).data  # noqa: E731
+    row_ser = lambda: [post_row_to_representation(r) for r in rows]  # noqa: E731
+    assert [dict(d) for d in model_ser()] == row_ser()
+
+    cases = [
+        ("ModelSerializer + JSONRenderer", lambda: std.render(wrap(model_ser()))),
+        ("ModelSerializer + ORJSONRenderer", lambda: fast.render(wrap(model_ser()))),
+        ("row dicts + JSONRenderer", lambda: std.render(wrap(row_ser()))),
+        ("row dicts + ORJSONRenderer", lambda: fast.render(wrap(row_ser()))),
+    ]
+    baseline = None
+    for name, fn in cases:
+        ms = timeit(fn, args.rounds)
+        baseline = baseline or ms
+        print(f"{name:34s} {ms:7.3f} ms/page  ({baseline / ms:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Cold start: django.setup(), WSGI app load and the first requests.
+
+    python benchmarks/startup.py [--runs 10] [--path /api/posts/]
+                                 [--output results.json] [--compare old.json]
+
+Each run is a fresh interpreter, like a newly booted worker. It times:
+
+  interpreter     `python -c pass`, as a floor
+  setup           django.setup(): settings, app registry, models, admin
+  app             get_wsgi_application(), which loads the middleware
+  first_request   the first request through the WSGI handler; it imports
+                  the URLconf and every view module
+  second_request  the same request again, warm
+  manage_check    wall time of `manage.py check`, a typical short command
+
+The request is anonymous (a 401/403 from most API paths), so no database is
+needed. Medians and minimums are printed and saved, by default to
+benchmarks/results/startup-<rev>.json. Pass an earlier file with --compare
+to print the deltas. `manage.py import_profile` breaks the same cost down
+per module.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CHILD = """
+import json, sys, time
+from io import BytesIO
+start = time.perf_counter()
+import django
+django.setup()
+from django.conf import settings
+settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+timings = {"setup": time.perf_counter() - start}
+
+start = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+app = get_wsgi_application()
+timings["app"] = time.perf_counter() - start
+
+status = []
+def request(name):
+    environ = {
+        "REQUEST_METHOD": "GET", "PATH_INFO": sys.argv[1], "QUERY_STRING": "",
+        "SERVER_NAME": "testserver", "SERVER_PORT": "80", "HTTP_HOST": "testserver",
+        "wsgi.url_scheme": "http", "wsgi.input": BytesIO(), "wsgi.errors": sys.stderr,
+    }
+    start = time.perf_counter()
+    response = app(environ, lambda s, h, exc_info=None: status.append(s))
+    b"".join(response)
+    response.close()
+    timings[name] = time.perf_counter() - start
+
+request("first_request")
+request("second_request")
+print(json.dumps({"timings": timings, "status": status[0]}))
+"""
+
+PHASES = ("interpreter", "setup", "app", "first_request", "second_request", "manage_check")
+
+
+def child_env():
+    env = dict(os.environ)
+    env.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    env["INSTRUMENTATION_SAMPLE_RATE"] = "0"
+    return env
+
+
+def wall(cmd, env):
+    start = time.perf_counter()
+    subprocess.run(cmd, cwd=ROOT, env=env, check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def run_once(path, env):
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD, path], cwd=ROOT, env=env, check=True, capture_output=True, text=True,
+    )
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    timings = result["timings"]
+    timings["interpreter"] = wall([sys.executable, "-c", "pass"], env)
+    timings["manage_check"] = wall([sys.executable, "manage.py", "check"], env)
+    return timings, result["status"]
+
+
+def git_revision():
+    try:
+        rev = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        return rev + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--path", default="/api/posts/", help="Path of the timed requests.")
+    parser.add_argument("--output", help="Results file (default benchmarks/results/startup-<rev>.json).")
+    parser.add_argument("--compare", help="Earlier results file to diff against.")
+    args = parser.parse_args()
+
+    env = child_env()
+    runs = []
+    for _ in range(args.runs):
+        timings, status = run_once(args.path, env)
+        runs.append(timings)
+    results = {
+        phase: {
+            "median_ms": round(statistics.median(r[phase] for r in runs) * 1000, 1),
+            "min_ms": round(min(r[phase] for r in runs) * 1000, 1),
+        }
+        for phase in PHASES
+    }
+
+    baseline = json.loads(Path(args.compare).read_text())["phases"] if args.compare else {}
+    print(f"GET {args.path} -> {status}, {args.runs} runs")
+    print(f"{'phase':16s} {'median':>9s} {'min':>9s}")
+    for phase, r in results.items():
+        line = f"{phase:16s} {r['median_ms']:9.1f} {r['min_ms']:9.1f}"
+        old = baseline.get(phase)
+        if old:
+            line += f"   {(r['median_ms'] / old['median_ms'] - 1) * 100:+5.0f}%"
+        print(line)
+
+    revision = git_revision()
+    output = Path(args.output) if args.output else ROOT / "benchmarks" / "results" / f"startup-{revision}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "revision": revision,
+        "environment": {"python": platform.python_version(), "settings": env["DJANGO_SETTINGS_MODULE"]},
+        "params": {"runs": args.runs, "path": args.path},
+        "status": status,
+        "phases": results,
+    }, indent=2) + "\n")
+    print(f"saved {output}")
+
+
+if __name__ == "__main__":
+    main()
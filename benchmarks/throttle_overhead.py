@@ -0,0 +1,84 @@
+"""
+Per-request overhead of backend.throttling on a trivial POST view.
+
+    python benchmarks/throttle_overhead.py [--requests 20000]
+
+Runs against whatever cache THROTTLE_CACHE_ALIAS points at (locmem unless
+REDIS_URL is set), so it can be used to compare local vs shared backends.
+No database is touched.
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from rest_framework.permissions import AllowAny  # noqa: E402
+from rest_framework.response import Response  # noqa: E402
+from rest_framework.settings import api_settings  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+from rest_framework.views import APIView  # noqa: E402
+
+from backend.throttling import IPTokenBucketThrottle, UserTokenBucketThrottle  # noqa: E402
+
+
+class PlainView(APIView):
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    throttle_classes = []
+
+    def post(self, request):
+        return Response({"ok": True})
+
+
+class UserThrottledView(PlainView):
+    throttle_classes = [UserTokenBucketThrottle]
+    throttle_scope = "bench"
+
+
+class UserAndIPThrottledView(PlainView):
+    throttle_classes = [UserTokenBucketThrottle, IPTokenBucketThrottle]
+    throttle_scope = "bench"
+
+
+def run(view_cls, n):
+    view = view_cls.as_view()
+    factory = APIRequestFactory()
+    requests = [
+        factory.post("/bench/", {}, format="json", REMOTE_ADDR=f"10.0.{i % 250}.{i % 200}")
+        for i in range(n)
+    ]
+    start = time.perf_counter()
+    for req in requests:
+        view(req)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    api_settings.DEFAULT_THROTTLE_RATES["bench"] = "100000000/s"
+    api_settings.DEFAULT_THROTTLE_RATES["bench_ip"] = "100000000/s"
+
+    results = []
+    for view_cls in (PlainView, UserThrottledView, UserAndIPThrottledView):
+        run(view_cls, 500)  # warm-up
+        results.append(run(view_cls, args.requests))
+    base, user, both = results
+
+    print(f"no throttle        {base:8.1f} us/req")
+    print(f"user bucket        {user:8.1f} us/req  (+{user - base:.1f} us)")
+    print(f"user + ip buckets  {both:8.1f} us/req  (+{both - base:.1f} us)")
+
+
+if __name__ == "__main__":
+    main()
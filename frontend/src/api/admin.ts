@@ -21,6 +21,13 @@ export interface AdminPagedResponse<T> {
   previous?: string | null;
 }
 
+// Cursor-paginated lists (admin posts) have no count; follow next/previous.
+export interface AdminCursorResponse<T> {
+  results: T[];
+  next: string | null;
+  previous: string | null;
+}
+
 export interface AdminUser {
   id: number;
   username: string;
@@ -40,6 +47,21 @@ export interface AdminPost {
   updated_at?: string;  // ISO
 }
 
+// Returned (202) by DELETE /admin/users/:id/: the user is hidden at once and
+// removed in the background; poll /admin/deletions/ for progress.
+export interface AdminDeletionJob {
+  id: number;
+  kind: "post" | "user";
+  target_id: number;
+  status: "pending" | "done" | "failed";
+  progress: Record<string, number>;
+  attempts: number;
+  last_error: string;
+  created_at: string;   // ISO
+  updated_at: string;   // ISO
+  finished_at: string | null;
+}
+
 export interface AdminStats {
   total_users: number;
   total_posts: number;
@@ -53,6 +75,17 @@ export type ListParams = {
   q?: string;
 };
 
+export type CursorParams = {
+  cursor?: string | null;
+  page_size?: number;
+};
+
+// Pull the opaque `cursor` query param out of a next/previous link.
+export function cursorFrom(link: string | null): string | null {
+  if (!link) return null;
+  return new URL(link, window.location.origin).searchParams.get("cursor");
+}
+
 export async function listUsers(params: ListParams = {}) {
   const { data } = await api.get<AdminPagedResponse<AdminUser>>("/admin/users/", { params });
   return data;
@@ -68,8 +101,15 @@ export async function deactivateUser(userId: number) {
   return data;
 }
 
-export async function listPosts(params: ListParams = {}) {
-  const { data } = await api.get<AdminPagedResponse<AdminPost>>("/admin/posts/", { params });
+export async function deleteUser(userId: number) {
+  const { data } = await api.delete<AdminDeletionJob>(`/admin/users/${userId}/`);
+  return data;
+}
+
+export async function listPosts({ cursor, ...params }: CursorParams = {}) {
+  const { data } = await api.get<AdminCursorResponse<AdminPost>>("/admin/posts/", {
+    params: cursor ? { ...params, cursor } : params,
+  });
   return data;
 }
 
@@ -1,29 +1,30 @@
 // src/pages/admin/Posts.tsx
-import { useEffect, useMemo, useState } from "react";
-import { listPosts, deletePost, type AdminPost } from "../../api/admin";
+import { useEffect, useState } from "react";
+import { listPosts, deletePost, cursorFrom, type AdminPost } from "../../api/admin";
 
 export default function AdminPostsPage() {
-  const [page, setPage] = useState(1);
+  // The admin post list is cursor-paginated: no page numbers or total count.
+  const [cursor, setCursor] = useState<string | null>(null);
   const pageSize = 20;
 
-  const [data, setData] = useState<{ results: AdminPost[]; count: number }>({
+  const [data, setData] = useState<{
+    results: AdminPost[];
+    next: string | null;
+    previous: string | null;
+  }>({
     results: [],
-    count: 0,
+    next: null,
+    previous: null,
   });
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
 
-  const totalPages = useMemo(
-    () => Math.max(1, Math.ceil((data?.count ?? 0) / pageSize)),
-    [data?.count]
-  );
-
   async function fetchPosts() {
     setLoading(true);
     setError(null);
     try {
-      const res = await listPosts({ page, page_size: pageSize });
-      setData({ results: res.results, count: res.count });
+      const res = await listPosts({ cursor, page_size: pageSize });
+      setData({ results: res.results, next: res.next, previous: res.previous });
     } catch (e: any) {
       setError(e?.message ?? "Failed to load posts");
     } finally {
@@ -34,7 +35,7 @@ export default function AdminPostsPage() {
   useEffect(() => {
     fetchPosts();
     // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [page]);
+  }, [cursor]);
 
   async function onDelete(p: AdminPost) {
     const ok = window.confirm(`Delete post ${p.id}?`);
@@ -109,20 +110,20 @@ export default function AdminPostsPage() {
 
       <div className="mt-4 flex items-center justify-between">
         <p className="text-sm text-gray-600">
-          Page {page} of {totalPages} — {data.count} total
+          Showing {data.results.length} posts
         </p>
         <div className="flex gap-2">
           <button
             className="rounded-md border px-3 py-1.5 text-sm hover:bg-gray-50 disabled:opacity-50"
-            onClick={() => setPage((p) => Math.max(1, p - 1))}
-            disabled={page <= 1 || loading}
+            onClick={() => setCursor(cursorFrom(data.previous))}
+            disabled={!data.previous || loading}
           >
             Previous
           </button>
           <button
             className="rounded-md border px-3 py-1.5 text-sm hover:bg-gray-50 disabled:opacity-50"
-            onClick={() => setPage((p) => Math.min(totalPages, p + 1))}
-            disabled={page >= totalPages || loading}
+            onClick={() => setCursor(cursorFrom(data.next))}
+            disabled={!data.next || loading}
           >
             Next
           </button>
@@ -1,3 +1,31 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from .models import Notification
+
+User = get_user_model()
+
+
+class NotificationPollTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("poller", "poller@example.com", "pw-12345678", is_active=True)
+        cls.other = User.objects.create_user("other", "other@example.com", "pw-12345678", is_active=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    @override_settings(NOTIFICATION_POLL_INTERVAL=0.01)
+    def test_poll_returns_new_notifications_or_times_out(self):
+        first = Notification.objects.create(
+            recipient=self.user, sender=self.other, notification_type="follow", message="hi",
+        )
+        response = self.client.get("/api/notifications/poll/")
+        self.assertEqual([n["id"] for n in response.json()], [first.id])
+        self.assertEqual(response.json()[0]["sender_username"], "other")
+
+        response = self.client.get(f"/api/notifications/poll/?after={first.id}&timeout=0.05")
+        self.assertEqual(response.json(), [])
+        self.assertEqual(self.client.get("/api/notifications/poll/?after=x").status_code, 400)
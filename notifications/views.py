@@ -1,4 +1,10 @@
+import asyncio
+import time
+
+from django.conf import settings
+from django.http import JsonResponse
 from rest_framework import generics, permissions
+from backend.async_views import AsyncAPIView
 from notifications.models import Notification
 from notifications.serializers import NotificationSerializer
 from rest_framework.response import Response
@@ -32,3 +38,32 @@ def mark_as_read(request, notification_id):
 def mark_all_read(request):
     Notification.objects.filter(recipient=request.user, is_read=False).update(is_read=True)
     return Response({"message": "All notifications marked as read"})
+
+
+class NotificationPollView(AsyncAPIView):
+    """
+    GET ?after=<id>&timeout=<seconds>: waits until the user has notifications
+    newer than `after`, then returns them (oldest first); an empty list on
+    timeout. Without `after` it returns the unread ones immediately.
+    """
+
+    async def get(self, request):
+        after = request.query_params.get("after")
+        try:
+            after = int(after) if after is not None else None
+            timeout = float(request.query_params.get("timeout", settings.NOTIFICATION_POLL_TIMEOUT))
+        except ValueError:
+            return JsonResponse({"detail": "after and timeout must be numbers."}, status=400)
+        timeout = min(max(timeout, 0), settings.NOTIFICATION_POLL_TIMEOUT)
+
+        queryset = Notification.objects.filter(recipient_id=request.user.id).select_related("sender")
+        queryset = queryset.filter(id__gt=after) if after is not None else queryset.filter(is_read=False)
+        queryset = queryset.order_by("id")
+        deadline = time.monotonic() + timeout
+        while True:
+            notifications = [n async for n in queryset.all()]
+            if notifications or after is None or time.monotonic() >= deadline:
+                break
+            await asyncio.sleep(min(settings.NOTIFICATION_POLL_INTERVAL, deadline - time.monotonic()))
+        return JsonResponse(NotificationSerializer(notifications, many=True).data, safe=False)
+
@@ -0,0 +1,189 @@
+"""
+Cold-post archival.
+
+Posts with no activity for POST_ARCHIVE_AFTER_DAYS (not created, edited,
+liked or commented on since) move, with their likes and comments, from the hot tables to ArchivedPost / ArchivedLike /
+ArchivedComment, keeping their ids. The hot tables then hold only recent
+posts, so their listing, ranking and partial indexes stay small, and
+VACUUM has less to scan. The archive tables carry only primary key and
+foreign key indexes.
+
+`manage.py archive_posts` moves posts in batches, oldest id first. Each
+batch is one short transaction: three INSERT ... SELECT statements into the
+archive, one UPDATE that unlinks notifications, and three DELETEs. Nothing
+passes through Python and no model signals fire, because archiving changes
+no counts. An interrupted run resumes from whatever is still hot.
+
+Reads by id fall back to the archive: post detail, like status, comment
+lists, replies and threads (see posts.views). Lists (feeds, author and
+category lists) show hot posts only, and so do profile post counts, so a
+profile's count matches the list it links to. The first write to an
+archived post (edit, delete, like, comment) restores it to the hot tables
+with restore_posts(). That also bumps updated_at, so the post stays hot
+for another full period. A request restores at most POST_RESTORE_MAX_ROWS
+likes and comments; bigger posts raise RestoreTooLarge and are restored
+with `manage.py archive_posts --restore`. Both directions lock the source
+post rows first, so a restore and an archive run never interleave on the
+same post. Notifications about an archived post lose their
+link to it, and restoring the post does not bring the link back.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from notifications.models import Notification
+from .models import ArchivedComment, ArchivedLike, ArchivedPost, Comment, Like, Post
+
+# (hot, archive) pairs, parents first.
+TABLES = ((Post, ArchivedPost), (Like, ArchivedLike), (Comment, ArchivedComment))
+
+
+def archive_after_days():
+    return getattr(settings, "POST_ARCHIVE_AFTER_DAYS", 365)
+
+
+def restore_max_rows():
+    return getattr(settings, "POST_RESTORE_MAX_ROWS", 5000)
+
+
+class RestoreTooLarge(Exception):
+    """The archived post has more likes and comments than one request may restore."""
+
+
+def archive_cutoff(now=None):
+    return (now or timezone.now()) - timedelta(days=archive_after_days())
+
+
+def archivable_posts(cutoff):
+    """
+    Hot posts with no activity since `cutoff`. Likes and comments don't touch
+    Post.updated_at, so they are checked directly; otherwise a post still
+    being liked would be archived and restored by the next like.
+    Posts queued for deletion are left to process_deletions.
+    """
+    recent_likes = Like.objects.filter(post=OuterRef("pk"), created_at__gte=cutoff)
+    recent_comments = Comment.objects.filter(post=OuterRef("pk"), created_at__gte=cutoff)
+    return Post.objects.filter(
+        ~Exists(recent_likes), ~Exists(recent_comments),
+        created_at__lt=cutoff, updated_at__lt=cutoff, pending_deletion=False,
+    )
+
+
+def _post_column(model):
+    return "id" if model in (Post, ArchivedPost) else "post_id"
+
+
+def _in(model, count):
+    qn = connection.ops.quote_name
+    return f"{qn(_post_column(model))} IN ({', '.join(['%s'] * count)})"
+
+
+def _move(post_ids, to_archive, cutoff=None):
+    """
+    Copy the posts and their likes/comments across, then delete the source
+    rows, in one transaction. Foreign keys are deferred until commit, so
+    the statement order within the transaction doesn't matter to the
+    database.
+
+    The source post rows are locked (SELECT ... FOR UPDATE) first. A
+    concurrent move of the same post waits and then skips it, and new
+    likes/comments on a post being archived wait on the lock. With
+    `cutoff`, posts that became active since they were picked are skipped.
+    """
+    qn = connection.ops.quote_name
+    now = timezone.now()
+    counts = Counter()
+    with transaction.atomic(), connection.cursor() as cursor:
+        if to_archive:
+            locked = archivable_posts(cutoff) if cutoff is not None else Post.objects.all()
+        else:
+            locked = ArchivedPost.objects.all()
+        post_ids = list(locked.select_for_update().filter(id__in=post_ids).values_list("id", flat=True))
+        if not post_ids:
+            return counts
+        for hot, cold in TABLES:
+            source, target = (hot, cold) if to_archive else (cold, hot)
+            columns = [qn(f.column) for f in hot._meta.concrete_fields]
+            values = list(columns)
+            params = []
+            if target is ArchivedPost:
+                columns.append(qn("archived_at"))
+                values.append("%s")
+                params.append(connection.ops.adapt_datetimefield_value(now))
+            cursor.execute(
+                f"INSERT INTO {qn(target._meta.db_table)} ({', '.join(columns)}) "
+                f"SELECT {', '.join(values)} FROM {qn(source._meta.db_table)} "
+                f"WHERE {_in(source, len(post_ids))}",
+                [*params, *post_ids],
+            )
+            counts[f"{hot._meta.model_name}s"] += cursor.rowcount
+
+        if to_archive:
+            # Notification.post is a real foreign key, so it can't point into the archive.
+            Notification.objects.filter(post_id__in=post_ids).update(post=None)
+        else:
+            # Keep restored posts hot for another full period.
+            Post.objects.filter(id__in=post_ids).update(updated_at=now, score_stale=True)
+
+        for hot, cold in reversed(TABLES):
+            source = hot if to_archive else cold
+            cursor.execute(
+                f"DELETE FROM {qn(source._meta.db_table)} WHERE {_in(source, len(post_ids))}", post_ids,
+            )
+    return counts
+
+
+def archive_batch(post_ids, cutoff=None):
+    """
+    Move `post_ids` and their likes and comments to the archive, skipping any
+    no longer archivable at `cutoff` if given; returns rows moved per table.
+    """
+    return _move(list(post_ids), to_archive=True, cutoff=cutoff) if post_ids else Counter()
+
+
+def restore_posts(post_ids):
+    """Move archived `post_ids` back to the hot tables; returns rows moved per table."""
+    return _move(list(post_ids), to_archive=False) if post_ids else Counter()
+
+
+def restore_if_archived(post_id, viewer):
+    """
+    Restore `post_id` when it is archived and `viewer` may see it; True if it
+    was restored. Raises RestoreTooLarge when its like and comment counters
+    exceed restore_max_rows().
+    """
+    post = ArchivedPost.objects.visible_to(viewer).filter(pk=post_id).values("like_count", "comment_count").first()
+    if post is None:
+        return False
+    if post["like_count"] + post["comment_count"] > restore_max_rows():
+        raise RestoreTooLarge(post_id)
+    # False only if a concurrent request restored it first; it is hot either way.
+    restore_posts([post_id])
+    return True
+
+
+def archive_posts(cutoff=None, batch_size=500, limit=None, progress=None):
+    """
+    Archive every post untouched since `cutoff` (default archive_cutoff()),
+    `batch_size` posts per transaction, at most `limit` posts. `progress`,
+    if given, is called with the running totals after each batch.
+    Returns a Counter of rows moved per table.
+    """
+    cutoff = cutoff or archive_cutoff()
+    candidates = archivable_posts(cutoff).order_by("id").values_list("id", flat=True)
+    totals = Counter()
+    while limit is None or totals["posts"] < limit:
+        size = batch_size if limit is None else min(batch_size, limit - totals["posts"])
+        ids = list(candidates[:size])
+        if not ids:
+            break
+        # Posts that became active since the pick are skipped and stay hot,
+        # so the next pick moves past them.
+        totals.update(archive_batch(ids, cutoff))
+        if progress:
+            progress(totals)
+    return totals
@@ -0,0 +1,114 @@
+"""
+Bulk hydration of post lists.
+
+Views work out *which* post ids to show (one cheap, index-only query) and
+hand them here; this module turns them into PostSerializer-shaped rows in a
+fixed number of batched queries, whatever the page size:
+
+  1. the posts themselves              (Post, WHERE id IN ...)
+  2. their authors + avatars           (User/Profile, skipped when cached)
+  3. the viewer's likes among them     (Like, WHERE user = ... AND post_id IN ...)
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from backend.instrumentation import timed_serialization
+
+from .models import Post
+
+User = get_user_model()
+
+POST_FIELDS = (
+    "id", "content", "author", "created_at", "updated_at", "image_url",
+    "category", "is_active", "like_count", "comment_count",
+)
+AUTHOR_CACHE_KEY = "post_author:%s"
+
+
+def author_cache_timeout():
+    return getattr(settings, "POST_AUTHOR_CACHE_TIMEOUT", 0)
+
+
+def invalidate_author(user_id):
+    cache.delete(AUTHOR_CACHE_KEY % user_id)
+
+
+def invalidate_authors(user_ids):
+    cache.delete_many([AUTHOR_CACHE_KEY % pk for pk in user_ids])
+
+
+def load_authors(author_ids):
+    """
+    {user_id: (username, avatar_url)}, from cache where possible.
+
+    Entries are dropped on every User/Profile save (accounts.signals), but
+    cache.delete only reaches other workers through a shared cache. With a
+    per-process cache such as locmem they would keep serving the old values
+    until the timeout, so POST_AUTHOR_CACHE_TIMEOUT defaults to 0 (no
+    caching) unless REDIS_URL is set.
+    """
+    timeout = author_cache_timeout()
+    found = {}
+    if timeout:
+        keys = {AUTHOR_CACHE_KEY % pk: pk for pk in author_ids}
+        found = {keys[k]: v for k, v in cache.get_many(keys).items()}
+
+    missing = [pk for pk in author_ids if pk not in found]
+    if missing:
+        fetched = {
+            row["id"]: (row["username"], row["profile__avatar_url"])
+            for row in User.objects.filter(id__in=missing).values("id", "username", "profile__avatar_url")
+        }
+        if timeout:
+            cache.set_many({AUTHOR_CACHE_KEY % pk: v for pk, v in fetched.items()}, timeout)
+        found.update(fetched)
+    return found
+
+
+def hydrate_post_rows(post_ids, viewer, queryset=None):
+    """
+    Rows shaped like `.values(*POST_ROW_FIELDS)` for `post_ids`, in that order.
+    Ids missing from `queryset` (default: all posts) are dropped, so callers
+    can pass e.g. Post.objects.visible_to(user) to enforce visibility. An
+    ArchivedPost queryset works too.
+    """
+    post_ids = list(post_ids)
+    if not post_ids:
+        return []
+
+    queryset = Post.objects.all() if queryset is None else queryset
+    posts = {row["id"]: row for row in queryset.filter(id__in=post_ids).values(*POST_FIELDS)}
+    if not posts:
+        return []
+
+    authors = load_authors({row["author"] for row in posts.values()})
+    liked = set()
+    if viewer is not None and viewer.is_authenticated:
+        likes = queryset.model._meta.get_field("likes").related_model  # ArchivedLike for archived posts
+        liked = set(
+            likes.objects.filter(user=viewer, post_id__in=list(posts)).values_list("post_id", flat=True)
+        )
+
+    rows = []
+    for pk in post_ids:
+        row = posts.get(pk)
+        if row is None:
+            continue
+        username, avatar = authors.get(row["author"], (None, None))
+        row["author__username"] = username
+        row["author__profile__avatar_url"] = avatar
+        row["liked_by_me"] = pk in liked
+        rows.append(row)
+    return rows
+
+
+def hydrate_posts(post_ids, viewer, queryset=None):
+    """Same as hydrate_post_rows(), rendered to PostSerializer's output shape."""
+    # Imported here so model signals can use this module without pulling in
+    # the serializers' storage client.
+    from .serializers import post_row_to_representation
+
+    rows = hydrate_post_rows(post_ids, viewer, queryset)
+    with timed_serialization():
+        return [post_row_to_representation(row) for row in rows]
@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from posts.archive import archivable_posts, archive_after_days, archive_posts, restore_posts
+from posts.models import Comment, Like, Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Move posts with no activity (created, edited, liked or commented on) for "
+        "POST_ARCHIVE_AFTER_DAYS, with their likes and comments, to the archive "
+        "tables, in short batches. "
+        "With --restore, move the given post ids back instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Override POST_ARCHIVE_AFTER_DAYS.")
+        parser.add_argument("--batch-size", type=int, default=500, help="Posts per transaction (default 500).")
+        parser.add_argument("--limit", type=int, help="Stop after this many posts.")
+        parser.add_argument("--dry-run", action="store_true", help="Only count what would be archived.")
+        parser.add_argument(
+            "--vacuum", action="store_true",
+            help="VACUUM ANALYZE the hot tables afterwards (PostgreSQL).",
+        )
+        parser.add_argument("--restore", type=int, nargs="+", metavar="POST_ID")
+
+    def handle(self, *args, days, batch_size, limit, dry_run, vacuum, restore, **options):
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive.")
+        if restore:
+            moved = restore_posts(restore)
+            self.stdout.write(self.style.SUCCESS(f"Restored {self.summary(moved)}."))
+            return
+
+        cutoff = timezone.now() - timedelta(days=archive_after_days() if days is None else days)
+        if dry_run:
+            count = archivable_posts(cutoff).count()
+            self.stdout.write(f"{count} posts untouched since {cutoff:%Y-%m-%d} would be archived.")
+            return
+
+        def progress(totals):
+            if options["verbosity"] > 1:
+                self.stdout.write(f"  {self.summary(totals)}")
+
+        moved = archive_posts(cutoff, batch_size=batch_size, limit=limit, progress=progress)
+        self.stdout.write(self.style.SUCCESS(f"Archived {self.summary(moved)}."))
+
+        if vacuum and moved and connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                for model in (Post, Like, Comment):
+                    cursor.execute(f"VACUUM ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+
+    def summary(self, moved):
+        return ", ".join(f"{moved[name]} {name}" for name in ("posts", "likes", "comments"))
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.ranking import recompute_stale_scores
+
+
+class Command(BaseCommand):
+    help = "Recompute trending/top scores for posts whose like or comment counts changed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--loop", action="store_true",
+            help="Keep running, polling for newly stale posts.",
+        )
+        parser.add_argument("--interval", type=float, default=30.0)
+
+    def handle(self, *args, batch_size, loop, interval, **options):
+        total = 0
+        while True:
+            updated = recompute_stale_scores(batch_size=batch_size)
+            total += updated
+            if updated:
+                continue
+            if not loop:
+                break
+            time.sleep(interval)
+        self.stdout.write(self.style.SUCCESS(f"Rescored {total} posts."))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_alter_like_unique_together_alter_comment_content_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'is_active', '-created_at'], name='posts_comme_post_id_6ad4a1_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_category_partial_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='posts_comme_post_id_6ad4a1_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='posts_comme_parent__6283c6_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='posts_post_created_183a3b_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_trending_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_top_idx',
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['post', '-created_at', '-id'], name='comment_active_post_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['parent', 'created_at', 'id'], name='comment_active_parent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='post_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-trending_score', '-id'], name='post_trending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-top_score', '-id'], name='post_top_idx'),
+        ),
+    ]
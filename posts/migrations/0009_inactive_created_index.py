@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_active_partial_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['-created_at', '-id'], name='post_inactive_created_idx'),
+        ),
+    ]
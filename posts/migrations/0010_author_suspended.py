@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_inactive_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='author_suspended',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='author_suspended',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_author_suspended'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='pending_deletion',
+            field=models.BooleanField(default=False),
+        ),
+    ]
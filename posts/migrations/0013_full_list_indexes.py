@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-19 20:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_archive_tables'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_active_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_trending_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_top_idx',
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-created_at', '-id'], name='post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-trending_score', '-id'], name='post_trending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-top_score', '-id'], name='post_top_idx'),
+        ),
+    ]
@@ -1,5 +1,66 @@
 from django.db import models
+from django.db.models import F
 from django.conf import settings
+from django.utils import timezone
+
+from accounts.models import Follow, Profile
+
+
+def visibility_q(user, prefix=""):
+    """
+    Q matching posts (or, with prefix="post__", comments on posts) that
+    `user` may see: active posts whose author's profile is public, or
+    followers-only and followed by `user`, plus the user's own posts,
+    hidden ones included unless they are being deleted.
+
+    It compiles to a join on the author's profile and an EXISTS probe on
+    Follow's (follower, following) unique index, so privacy costs nothing
+    per row in Python.
+    """
+    def q(**lookups):
+        return models.Q(**{prefix + key: value for key, value in lookups.items()})
+
+    active_public = q(is_active=True, author__profile__visibility=Profile.VIS_PUBLIC)
+    if user is None or not user.is_authenticated:
+        return active_public
+
+    follows = models.Exists(Follow.objects.filter(follower=user, following=models.OuterRef(prefix + "author")))
+    followers_only = q(is_active=True, author__profile__visibility=Profile.VIS_FOLLOWERS) & models.Q(follows)
+    own = q(author=user, pending_deletion=False)
+    return active_public | followers_only | own
+
+
+class PostQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(is_active=True)
+
+    def shared_with(self, user):
+        """Active posts `user` may see (visible_to minus their own hidden ones)."""
+        q = visibility_q(user)
+        if user is not None and user.is_authenticated:
+            q &= models.Q(is_active=True)
+        return self.filter(q)
+
+    def visible_to(self, user):
+        """Posts `user` may see (see visibility_q)."""
+        return self.filter(visibility_q(user))
+
+
+class PostManager(models.Manager.from_queryset(PostQuerySet)):
+    pass
+
+
+class CommentQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(is_active=True)
+
+    def visible_to(self, user):
+        """Active comments on posts the user can see."""
+        return self.active().filter(visibility_q(user, prefix="post__"))
+
+
+class CommentManager(models.Manager.from_queryset(CommentQuerySet)):
+    pass
 
 
 class Post(models.Model):
@@ -20,18 +81,63 @@ class Post(models.Model):
     image_url = models.URLField(blank=True, null=True)
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default="general")
     is_active = models.BooleanField(default=True)
+    # Hidden because the author was deactivated (adminpanel.moderation);
+    # reactivating the author restores only these rows.
+    author_suspended = models.BooleanField(default=False)
+    # Hidden and queued for chunked removal (adminpanel.deletion).
+    pending_deletion = models.BooleanField(default=False)
     like_count = models.PositiveIntegerField(default=0)
     comment_count = models.PositiveIntegerField(default=0)
 
+    # Precomputed ranking (see posts.ranking). Counter writes set score_stale
+    # and `manage.py recompute_post_scores` refreshes only those rows.
+    top_score = models.PositiveIntegerField(default=0)
+    trending_score = models.FloatField(default=0.0)
+    score_stale = models.BooleanField(default=True)
+
+    objects = PostManager()
+
     class Meta:
+        # The main list and feed filter through visible_to(), whose
+        # "or the viewer's own posts" branch includes hidden rows, so no
+        # is_active partial index can serve them: their three sort orders
+        # keep full indexes. Views that query active rows separately from
+        # the viewer's own hidden ones (category feed, admin queue) use the
+        # partial indexes below.
         indexes = [
-            models.Index(fields=["-created_at"]),
+            models.Index(fields=["-created_at", "-id"], name="post_created_idx"),
             models.Index(fields=["author", "-created_at"]),
+            models.Index(fields=["-trending_score", "-id"], name="post_trending_idx"),
+            models.Index(fields=["-top_score", "-id"], name="post_top_idx"),
+            models.Index(fields=["id"], condition=models.Q(score_stale=True), name="post_score_stale_idx"),
+            # Category feed: active posts only, plus the author's own hidden posts
+            # looked up separately (see posts.views.CategoryFeedView).
+            models.Index(
+                fields=["category", "-created_at", "-id"],
+                condition=models.Q(is_active=True), name="post_active_category_idx",
+            ),
+            models.Index(
+                fields=["author", "category", "-created_at", "-id"],
+                condition=models.Q(is_active=False), name="post_inactive_author_cat_idx",
+            ),
+            # Admin moderation queue of hidden posts (adminpanel.views.PostListView).
+            models.Index(fields=["-created_at", "-id"], condition=models.Q(is_active=False), name="post_inactive_created_idx"),
         ]
 
     def __str__(self) -> str:
         return f"{self.author_id} | {self.content[:24]}"
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.score_stale:
+            # Score new posts up front so they rank by recency straight away
+            # instead of sitting at zero until recompute_post_scores runs.
+            from .ranking import score_fields
+
+            self.created_at = self.created_at or timezone.now()
+            for field, value in score_fields(self).items():
+                setattr(self, field, value)
+        super().save(*args, **kwargs)
+
 
 class Like(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="likes")
@@ -46,11 +152,96 @@ class Like(models.Model):
 
 
 class Comment(models.Model):
+    # Replies form a tree under each top-level comment. `path` is a
+    # materialized path of zero-padded ids ("0000000042/0000000057/"), so a
+    # whole subtree is one indexed prefix scan.
+    MAX_DEPTH = 20
+
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="comments")
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="comments")
+    parent = models.ForeignKey(
+        "self", null=True, blank=True, on_delete=models.CASCADE, related_name="replies",
+    )
+    path = models.CharField(max_length=255, blank=True, db_index=True)
+    depth = models.PositiveSmallIntegerField(default=0)
+    reply_count = models.PositiveIntegerField(default=0)
     content = models.CharField(max_length=280)
     created_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
+    author_suspended = models.BooleanField(default=False)
+
+    objects = CommentManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["post", "-created_at", "-id"], condition=models.Q(is_active=True), name="comment_active_post_idx"),
+            models.Index(fields=["parent", "created_at", "id"], condition=models.Q(is_active=True), name="comment_active_parent_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.author_id} on {self.post_id}: {self.content[:24]}"
+
+    def save(self, *args, **kwargs):
+        creating = self._state.adding
+        if creating and self.parent_id:
+            self.depth = self.parent.depth + 1
+        super().save(*args, **kwargs)
+
+        if creating and not self.path:
+            prefix = self.parent.path if self.parent_id else ""
+            self.path = f"{prefix}{self.pk:010d}/"
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+            if self.parent_id:
+                Comment.objects.filter(pk=self.parent_id).update(reply_count=F("reply_count") + 1)
+
+
+# ---- Archive (posts.archive) ----
+# Cold posts move here with their likes and comments, keeping their ids.
+# Same columns as the hot tables, but only primary key and foreign key
+# indexes: archived rows are read by id, never listed or ranked.
+
+class ArchivedPost(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    content = models.TextField(max_length=280)
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="archived_posts")
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    image_url = models.URLField(blank=True, null=True)
+    category = models.CharField(max_length=20, choices=Post.CATEGORY_CHOICES, default="general")
+    is_active = models.BooleanField(default=True)
+    author_suspended = models.BooleanField(default=False)
+    pending_deletion = models.BooleanField(default=False)
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    top_score = models.PositiveIntegerField(default=0)
+    trending_score = models.FloatField(default=0.0)
+    score_stale = models.BooleanField(default=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = PostManager()
 
     def __str__(self) -> str:
-        return f"{self.author_id} on {self.post_id}: {self.content[:24]}"
\ No newline at end of file
+        return f"{self.author_id} | {self.content[:24]} (archived)"
+
+
+class ArchivedLike(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    post = models.ForeignKey(ArchivedPost, on_delete=models.CASCADE, related_name="likes")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="archived_post_likes")
+    created_at = models.DateTimeField()
+
+
+class ArchivedComment(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    post = models.ForeignKey(ArchivedPost, on_delete=models.CASCADE, related_name="comments")
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="archived_comments")
+    parent = models.ForeignKey("self", null=True, blank=True, on_delete=models.CASCADE, related_name="replies")
+    path = models.CharField(max_length=255, blank=True)
+    depth = models.PositiveSmallIntegerField(default=0)
+    reply_count = models.PositiveIntegerField(default=0)
+    content = models.CharField(max_length=280)
+    created_at = models.DateTimeField()
+    is_active = models.BooleanField(default=True)
+    author_suspended = models.BooleanField(default=False)
+
+    objects = CommentManager()
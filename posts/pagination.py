@@ -1,7 +1,41 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+from datetime import datetime
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 class FeedPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 50
 
+
+class CommentCursorPagination(CursorPagination):
+    """Keyset pagination over the partial (post, -created_at, -id) active-comment index."""
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 50
+    ordering = ("-created_at", "-id")
+
+
+class ReplyCursorPagination(CursorPagination):
+    """Replies under one comment, oldest first, over the (parent, created_at) index."""
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 50
+    ordering = ("created_at", "id")
+
+
+# Opaque (created_at, id) keyset cursors for views that merge several
+# querysets and so can't use CursorPagination directly.
+def encode_keyset_cursor(created_at, pk):
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_keyset_cursor(value):
+    try:
+        created, pk = base64.urlsafe_b64decode(value.encode()).decode().split("|")
+        return datetime.fromisoformat(created), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise NotFound("Invalid cursor")
@@ -0,0 +1,49 @@
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import transaction
+
+from .models import Post
+
+# Log-scaled engagement plus a creation-time term (the Reddit "hot" shape).
+# Age enters only through created_at, so a score never has to be recomputed
+# just because time passed -- only when the post's counters change. Being
+# TRENDING_TIME_SCALE seconds newer is worth 10x the engagement.
+COMMENT_WEIGHT = 2
+TRENDING_TIME_SCALE = 45000
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def top_score(like_count, comment_count):
+    return like_count + COMMENT_WEIGHT * comment_count
+
+
+def trending_score(like_count, comment_count, created_at):
+    engagement = top_score(like_count, comment_count)
+    order = math.log10(max(engagement, 1))
+    return round(order + (created_at - EPOCH).total_seconds() / TRENDING_TIME_SCALE, 7)
+
+
+def score_fields(post):
+    """Fresh top_score / trending_score for `post`, marked up to date."""
+    return {
+        "top_score": top_score(post.like_count, post.comment_count),
+        "trending_score": trending_score(post.like_count, post.comment_count, post.created_at),
+        "score_stale": False,
+    }
+
+
+def recompute_stale_scores(batch_size=1000):
+    """Refresh top/trending scores for one batch of stale posts. Returns rows updated."""
+    with transaction.atomic():
+        posts = list(
+            Post.objects.select_for_update(skip_locked=True)
+            .filter(score_stale=True)
+            .order_by("id")
+            .only("id", "like_count", "comment_count", "created_at")[:batch_size]
+        )
+        for post in posts:
+            for field, value in score_fields(post).items():
+                setattr(post, field, value)
+        Post.objects.bulk_update(posts, ["top_score", "trending_score", "score_stale"])
+    return len(posts)
@@ -1,10 +1,11 @@
 from rest_framework import serializers
 from .models import Post, Like, Comment
-from PIL import Image
 import io
 from django.core.exceptions import ValidationError
 from .supabase_service import upload_image
-from django.db import transaction
+from backend.lazy import lazy_import
+
+Image = lazy_import("PIL.Image")  # only needed to verify uploads
 
 
 
@@ -90,31 +91,25 @@ class PostSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         request = self.context.get("request")
-        user = request.user
         upload = validated_data.pop("upload_image", None)
 
-        
-        with transaction.atomic():
-            post = Post.objects.create(author=user, is_active=True, **validated_data)
-
-            if upload:
-                content_type = getattr(upload, "content_type", "application/octet-stream")
-                file_bytes = upload.read()
-                try:
-                    public_url = upload_image(
-                        file_bytes=file_bytes,
-                        filename=upload.name,
-                        content_type=content_type,
-                    )
-                    post.image_url = public_url
-                    post.save(update_fields=["image_url"])
-                except Exception as e:
-                    
-                    raise serializers.ValidationError(
-                        {"upload_image": f"Image upload error: {e}"}
-                    )
-
-        return post
+        # Upload before the insert: no transaction stays open across the
+        # storage call, and a failed upload leaves no post behind.
+        # AsyncPostCreateView awaits the upload itself and passes image_url.
+        if upload:
+            validated_data["image_url"] = self.upload(upload)
+        return Post.objects.create(author=request.user, is_active=True, **validated_data)
+
+    @staticmethod
+    def upload(upload):
+        try:
+            return upload_image(
+                file_bytes=upload.read(),
+                filename=upload.name,
+                content_type=getattr(upload, "content_type", "application/octet-stream"),
+            )
+        except Exception as e:
+            raise serializers.ValidationError({"upload_image": f"Image upload error: {e}"})
 
 
 
@@ -127,19 +122,7 @@ class PostSerializer(serializers.ModelSerializer):
             setattr(instance, attr, value)
 
         if upload:
-            content_type = getattr(upload, "content_type", "application/octet-stream")
-            file_bytes = upload.read()
-            try:
-                public_url = upload_image(
-                    file_bytes=file_bytes,
-                    filename=upload.name,
-                    content_type=content_type,
-                )
-                instance.image_url = public_url
-            except Exception as e:
-                raise serializers.ValidationError(
-                    {"upload_image": f"Image upload error: {e}"}
-                )
+            instance.image_url = self.upload(upload)
 
         instance.save()
         return instance
@@ -155,11 +138,33 @@ class LikeSerializer(serializers.ModelSerializer):
 
 class CommentSerializer(serializers.ModelSerializer):
     author_username = serializers.CharField(source="author.username", read_only=True)
+    author_avatar = serializers.CharField(source="author.profile.avatar_url", read_only=True)
+
+    parent = serializers.PrimaryKeyRelatedField(
+        queryset=Comment.objects.active(), required=False, allow_null=True,
+    )
 
     class Meta:
         model = Comment
-        fields = ["id", "content", "author", "author_username", "post", "created_at"]
-        read_only_fields = ["id", "author", "author_username", "post", "created_at"]
+        fields = [
+            "id", "content", "author", "author_username", "author_avatar", "post",
+            "parent", "depth", "reply_count", "created_at",
+        ]
+        read_only_fields = [
+            "id", "author", "author_username", "author_avatar", "post",
+            "depth", "reply_count", "created_at",
+        ]
+
+    def validate_parent(self, parent):
+        if parent is None:
+            return parent
+        view = self.context.get("view")
+        post_id = view.kwargs.get("post_id") if view else None
+        if post_id is not None and parent.post_id != int(post_id):
+            raise serializers.ValidationError("Parent comment belongs to a different post.")
+        if parent.depth + 1 > Comment.MAX_DEPTH:
+            raise serializers.ValidationError("Reply thread is nested too deeply.")
+        return parent
 
     def create(self, validated_data):
         request = self.context.get("request")
@@ -167,6 +172,63 @@ class CommentSerializer(serializers.ModelSerializer):
         comment = super().create(validated_data)
         
         post = comment.post
-        post.comment_count = post.comments.filter(is_active=True).count()
-        post.save(update_fields=["comment_count"])
-        return comment
\ No newline at end of file
+        post.comment_count = post.comments.active().count()
+        post.score_stale = True
+        post.save(update_fields=["comment_count", "score_stale"])
+        return comment
+
+
+# -------------------------------------------------------------------
+# FAST READ-ONLY LIST PATH
+# Builds the same dicts as PostSerializer / CommentSerializer straight from
+# .values() rows, skipping per-field ModelSerializer machinery.
+# -------------------------------------------------------------------
+
+_datetime_field = serializers.DateTimeField()
+
+POST_ROW_FIELDS = (
+    "id", "content", "author", "author__username", "author__profile__avatar_url",
+    "created_at", "updated_at", "image_url", "category", "is_active",
+    "like_count", "comment_count", "liked_by_me",
+)
+
+COMMENT_ROW_FIELDS = (
+    "id", "content", "author", "author__username", "author__profile__avatar_url",
+    "post", "parent", "depth", "reply_count", "created_at",
+)
+
+
+def post_row_to_representation(row):
+    """`row` comes from .values(*POST_ROW_FIELDS); `liked_by_me` must be annotated."""
+    to_dt = _datetime_field.to_representation
+    return {
+        "id": row["id"],
+        "content": row["content"],
+        "author": row["author"],
+        "author_username": row["author__username"],
+        "author_avatar": row["author__profile__avatar_url"],
+        "created_at": to_dt(row["created_at"]),
+        "updated_at": to_dt(row["updated_at"]),
+        "image_url": row["image_url"],
+        "image": row["image_url"],
+        "category": row["category"],
+        "is_active": row["is_active"],
+        "like_count": row["like_count"],
+        "comment_count": row["comment_count"],
+        "liked_by_me": bool(row["liked_by_me"]),
+    }
+
+
+def comment_row_to_representation(row):
+    return {
+        "id": row["id"],
+        "content": row["content"],
+        "author": row["author"],
+        "author_username": row["author__username"],
+        "author_avatar": row["author__profile__avatar_url"],
+        "post": row["post"],
+        "parent": row["parent"],
+        "depth": row["depth"],
+        "reply_count": row["reply_count"],
+        "created_at": _datetime_field.to_representation(row["created_at"]),
+    }
@@ -1,11 +1,41 @@
-from supabase import create_client
 from django.conf import settings
 from uuid import uuid4
+import asyncio
 import os
+import weakref
 
-supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
+from backend.lazy import lazy_client, lazy_import
+
+# The SDK and its client are only needed once something is uploaded.
+supabase_sdk = lazy_import("supabase")
+supabase = lazy_client(lambda: supabase_sdk.create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY))
 POSTS_BUCKET = getattr(settings, "SUPABASE_POSTS_BUCKET", "posts")
 
+# Async clients hold an httpx.AsyncClient, which is tied to the event loop it
+# was first used on; keep one per loop.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+async def get_async_client():
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = await supabase_sdk.acreate_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
+        _async_clients[loop] = client
+    return client
+
+
+async def aupload(bucket: str, key: str, data: bytes, content_type: str) -> str:
+    """Upload `data` to `bucket`/`key` without blocking the event loop; returns the public URL."""
+    client = await get_async_client()
+    storage = client.storage.from_(bucket)
+    await storage.upload(
+        path=key,
+        file=data,
+        file_options={"contentType": str(content_type or "application/octet-stream"), "upsert": "true"},
+    )
+    return await storage.get_public_url(key)
+
 def upload_image(file_bytes: bytes, filename: str, content_type: str) -> str:
     ext = os.path.splitext(filename)[1].lower()
     key = f"posts/{uuid4().hex}{ext}"
@@ -21,3 +51,12 @@ def upload_image(file_bytes: bytes, filename: str, content_type: str) -> str:
         # Re-raise so serializer can show a user-friendly message
         raise RuntimeError(f"Storage upload failed: {e}")
     return supabase.storage.from_(POSTS_BUCKET).get_public_url(key)
+
+
+async def aupload_image(file_bytes: bytes, filename: str, content_type: str) -> str:
+    """Async upload_image()."""
+    ext = os.path.splitext(filename)[1].lower()
+    try:
+        return await aupload(POSTS_BUCKET, f"posts/{uuid4().hex}{ext}", file_bytes, content_type)
+    except Exception as e:
+        raise RuntimeError(f"Storage upload failed: {e}")
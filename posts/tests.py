@@ -1,3 +1,555 @@
-from django.test import TestCase
+import base64
+import io
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from accounts.models import Follow, Profile
+from adminpanel.moderation import set_users_active
+from backend.renderers import ORJSONRenderer
+from notifications.models import Notification
+from .archive import archive_batch, archive_cutoff, archive_posts, restore_posts
+from .hydration import AUTHOR_CACHE_KEY, hydrate_posts
+from .models import ArchivedComment, ArchivedLike, ArchivedPost, Comment, Like, Post
+from .ranking import COMMENT_WEIGHT, TRENDING_TIME_SCALE, recompute_stale_scores, top_score, trending_score
+from .serializers import PostSerializer
+from .views import POST_SORTS, FeedView, PostListCreateView, category_posts
+
+User = get_user_model()
+
+
+class CategoryFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user("alice", "alice@example.com", "pw-12345678", is_active=True)
+        cls.bob = User.objects.create_user("bob", "bob@example.com", "pw-12345678", is_active=True)
+        cls.visible = Post.objects.create(author=cls.bob, content="visible", category="question")
+        cls.hidden_mine = Post.objects.create(
+            author=cls.alice, content="mine", category="question", is_active=False,
+        )
+        cls.hidden_other = Post.objects.create(
+            author=cls.bob, content="theirs", category="question", is_active=False,
+        )
+        Post.objects.create(author=cls.bob, content="other category", category="general")
+
+    def explain(self, qs):
+        if connection.vendor == "postgresql":
+            # Tiny test tables would otherwise always be seq-scanned.
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return qs.explain()
+
+    def test_active_category_lookup_uses_partial_index(self):
+        plan = self.explain(category_posts("question"))
+        self.assertIn("post_active_category_idx", plan)
+
+    def list_plan(self, view_class, sort):
+        view = view_class()
+        view.request = view.initialize_request(APIRequestFactory().get("/", {"sort": sort}))
+        view.request.user = self.alice
+        return self.explain(view.get_queryset().values_list("id", flat=True)[:10])
+
+    def test_post_list_walks_a_full_sort_index(self):
+        # visible_to() includes the viewer's hidden posts, so no is_active
+        # partial index can serve it.
+        sort_indexes = {"latest": "post_created_idx", "trending": "post_trending_idx", "top": "post_top_idx"}
+        for sort, index in sort_indexes.items():
+            plan = self.list_plan(PostListCreateView, sort)
+            with self.subTest(sort=sort):
+                self.assertIn(index, plan)
+                self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_feed_never_scans_the_posts_table(self):
+        # Either a sort index walk or per-followed-author index lookups,
+        # depending on table statistics.
+        for sort in POST_SORTS:
+            plan = self.list_plan(FeedView, sort)
+            with self.subTest(sort=sort):
+                self.assertNotRegex(plan, r"SCAN posts_post(?! USING)|Seq Scan on posts_post")
+
+    def test_own_inactive_lookup_uses_partial_index(self):
+        plan = self.explain(category_posts("question", author=self.alice, active=False))
+        self.assertIn("post_inactive_author_cat_idx", plan)
+
+    def test_feed_merges_own_inactive_posts(self):
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        response = client.get("/api/posts/category/question/")
+
+        self.assertEqual(response.status_code, 200)
+        ids = [row["id"] for row in response.data["results"]]
+        self.assertEqual(ids, [self.hidden_mine.id, self.visible.id])
+
+    def test_feed_pages_with_cursor(self):
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        first = client.get("/api/posts/category/question/?page_size=1")
+        second = client.get(first.data["next"])
+
+        self.assertEqual([r["id"] for r in first.data["results"]], [self.hidden_mine.id])
+        self.assertEqual([r["id"] for r in second.data["results"]], [self.visible.id])
+        self.assertIsNone(second.data["next"])
+
+
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("pager", "pg@example.com", "pw-12345678", is_active=True)
+        cls.post = Post.objects.create(author=cls.user, content="discuss")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def comment(self, content):
+        return Comment.objects.create(post=self.post, author=self.user, content=content)
+
+    def test_cursor_pages_are_stable_under_inserts(self):
+        first_batch = [self.comment(f"c{i}") for i in range(5)]
+        url = f"/api/posts/{self.post.pk}/comments/?page_size=2"
+        page = self.client.get(url).data
+        seen = [c["id"] for c in page["results"]]
+        self.comment("newer than the cursor")
+        while page["next"]:
+            page = self.client.get(page["next"]).data
+            seen += [c["id"] for c in page["results"]]
+        self.assertEqual(seen, [c.pk for c in reversed(first_batch)])
+
+    def test_hidden_comments_are_skipped(self):
+        shown = self.comment("shown")
+        hidden = self.comment("hidden")
+        Comment.objects.filter(pk=hidden.pk).update(is_active=False)
+        results = self.client.get(f"/api/posts/{self.post.pk}/comments/").data["results"]
+        self.assertEqual([c["id"] for c in results], [shown.pk])
+
+
+class CommentThreadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("threader", "th@example.com", "pw-12345678", is_active=True)
+        cls.post = Post.objects.create(author=cls.user, content="discuss")
+        cls.other_post = Post.objects.create(author=cls.user, content="elsewhere")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def comment(self, content, parent=None, post=None):
+        return Comment.objects.create(post=post or self.post, author=self.user, content=content, parent=parent)
+
+    def reply(self, parent, post=None):
+        return self.client.post(
+            f"/api/posts/{(post or self.post).pk}/comments/", {"content": "re", "parent": parent.pk}, format="json",
+        )
+
+    def test_reply_validation(self):
+        top = self.comment("top")
+        self.assertEqual(self.reply(top).status_code, 201)
+
+        elsewhere = self.comment("other post", post=self.other_post)
+        response = self.reply(elsewhere)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("parent", response.data)
+
+        Comment.objects.filter(pk=top.pk).update(depth=Comment.MAX_DEPTH)
+        response = self.reply(Comment.objects.get(pk=top.pk))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("parent", response.data)
+
+    def test_thread_is_depth_first(self):
+        root = self.comment("root")
+        a = self.comment("a", parent=root)
+        b = self.comment("b", parent=root)
+        a1 = self.comment("a1", parent=a)
+        a1x = self.comment("a1x", parent=a1)
+        thread = self.client.get(f"/api/posts/comments/{root.pk}/thread/").json()
+        self.assertEqual([c["id"] for c in thread], [root.pk, a.pk, a1.pk, a1x.pk, b.pk])
+        self.assertEqual([c["depth"] for c in thread], [0, 1, 2, 3, 1])
+
+    def test_deleting_a_comment_hides_its_replies(self):
+        root = self.comment("root")
+        a = self.comment("a", parent=root)
+        a1 = self.comment("a1", parent=a)
+        b = self.comment("b", parent=root)
+        self.assertEqual(self.client.delete(f"/api/posts/comments/{a.pk}/").status_code, 204)
+
+        thread = self.client.get(f"/api/posts/comments/{root.pk}/thread/").json()
+        self.assertEqual([c["id"] for c in thread], [root.pk, b.pk])
+        self.assertFalse(Comment.objects.get(pk=a1.pk).is_active)
+        self.assertEqual(Comment.objects.get(pk=root.pk).reply_count, 1)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).comment_count, 2)
+
+    def test_thread_skips_replies_under_hidden_comments(self):
+        root = self.comment("root")
+        a = self.comment("a", parent=root)
+        self.comment("a1", parent=a)
+        Comment.objects.filter(pk=a.pk).update(is_active=False)  # e.g. author suspended
+        thread = self.client.get(f"/api/posts/comments/{root.pk}/thread/").json()
+        self.assertEqual([c["id"] for c in thread], [root.pk])
+
+    def test_replies_under_hidden_comment_are_not_found(self):
+        root = self.comment("root")
+        self.comment("a", parent=root)
+        url = f"/api/posts/comments/{root.pk}/replies/"
+        self.assertEqual(len(self.client.get(url).json()["results"]), 1)
+        Comment.objects.filter(pk=root.pk).update(is_active=False)  # e.g. author suspended
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class RankingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("ranker", "rk@example.com", "pw-12345678", is_active=True)
+
+    def test_score_formula(self):
+        self.assertEqual(top_score(3, 2), 3 + 2 * COMMENT_WEIGHT)
+        created = timezone.now()
+        # Ten times the engagement is worth TRENDING_TIME_SCALE seconds of recency.
+        self.assertAlmostEqual(
+            trending_score(100, 0, created),
+            trending_score(10, 0, created + timedelta(seconds=TRENDING_TIME_SCALE)),
+        )
+        self.assertEqual(trending_score(0, 0, created), trending_score(1, 0, created))
+
+    def test_new_posts_are_scored_on_create(self):
+        older = Post.objects.create(author=self.user, content="older")
+        newer = Post.objects.create(author=self.user, content="newer")
+        self.assertFalse(Post.objects.filter(score_stale=True).exists())
+        self.assertGreaterEqual(newer.trending_score, older.trending_score)  # ties fall back to -id
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        ids = [p["id"] for p in client.get("/api/posts/?sort=trending").data["results"]]
+        self.assertEqual(ids, [newer.pk, older.pk])
+
+    def test_recompute_touches_stale_posts_only(self):
+        fresh = Post.objects.create(author=self.user, content="fresh")
+        liked = Post.objects.create(author=self.user, content="liked")
+        Post.objects.filter(pk=fresh.pk).update(like_count=50)  # counter moved without marking stale
+        Post.objects.filter(pk=liked.pk).update(like_count=5, comment_count=1, score_stale=True)
+
+        self.assertEqual(recompute_stale_scores(), 1)
+        fresh.refresh_from_db()
+        liked.refresh_from_db()
+        self.assertEqual(fresh.top_score, 0)
+        self.assertEqual((liked.top_score, liked.score_stale), (5 + COMMENT_WEIGHT, False))
+        self.assertAlmostEqual(liked.trending_score, trending_score(5, 1, liked.created_at), places=6)
+        self.assertEqual(recompute_stale_scores(), 0)
+
+
+class AuthorCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("cached_author", "ca@example.com", "pw-12345678", is_active=True)
+        cls.post = Post.objects.create(author=cls.author, content="hello")
+
+    def setUp(self):
+        cache.clear()
+
+    def author_fields(self):
+        row = hydrate_posts([self.post.pk], None)[0]
+        return row["author_username"], row["author_avatar"]
+
+    def test_disabled_by_default_without_a_shared_cache(self):
+        self.author_fields()
+        self.assertIsNone(cache.get(AUTHOR_CACHE_KEY % self.author.pk))
+
+    @override_settings(POST_AUTHOR_CACHE_TIMEOUT=300)
+    def test_profile_and_user_saves_invalidate(self):
+        self.assertEqual(self.author_fields(), ("cached_author", None))
+        with self.assertNumQueries(1):  # posts only; author from cache
+            self.author_fields()
+
+        profile = Profile.objects.get(user=self.author)
+        profile.avatar_url = "https://cdn.example.com/new.png"
+        async_to_sync(profile.asave)()  # as the async avatar upload does
+        self.assertEqual(self.author_fields(), ("cached_author", "https://cdn.example.com/new.png"))
+
+        self.author.username = "renamed_author"
+        self.author.save()
+        self.assertEqual(self.author_fields()[0], "renamed_author")
+
+
+class FastPathOutputTests(TestCase):
+    def test_row_path_renders_like_post_serializer(self):
+        author = User.objects.create_user("fast_author", "fa@example.com", "pw-12345678", is_active=True)
+        viewer = User.objects.create_user("fast_viewer", "fv@example.com", "pw-12345678", is_active=True)
+        Profile.objects.filter(user=author).update(avatar_url="https://cdn.example.com/a.png")
+        post = Post.objects.create(author=author, content="caf\u00e9", image_url="https://cdn.example.com/p.png")
+        Like.objects.create(post=post, user=viewer)
+        post.refresh_from_db()
+        request = RequestFactory().get("/api/posts/")
+        request.user = viewer
+
+        expected = JSONRenderer().render(PostSerializer(post, context={"request": request}).data)
+        cache.clear()
+        self.assertEqual(ORJSONRenderer().render(hydrate_posts([post.pk], viewer)[0]), expected)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("etag_author", "ea@example.com", "pw-12345678", is_active=True)
+        cls.reader = User.objects.create_user("etag_reader", "er@example.com", "pw-12345678", is_active=True)
+        Follow.objects.create(follower=cls.reader, following=cls.author)
+        cls.post = Post.objects.create(author=cls.author, content="cache me")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+        self.url = f"/api/posts/{self.post.pk}/"
+
+    def revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def change_avatar(self, url):
+        profile = Profile.objects.get(user=self.author)
+        profile.avatar_url = url
+        profile.save()
+
+    def test_matching_etag_returns_304(self):
+        for url in (self.url, "/api/posts/feed/"):
+            first = self.client.get(url)
+            self.assertEqual(first.status_code, 200)
+            response = self.revalidate(url, first["ETag"])
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.content, b"")
+            self.assertEqual(response["ETag"], first["ETag"])
+        self.assertEqual(self.revalidate(self.url, 'W/"stale"').status_code, 200)
+
+    def test_etag_changes_after_edit_like_and_profile_change(self):
+        author = APIClient()
+        author.force_authenticate(self.author)
+        changes = [
+            lambda: author.patch(self.url, {"content": "edited"}, format="json"),
+            lambda: self.client.post(f"/api/posts/{self.post.pk}/like/"),
+            lambda: self.change_avatar("https://cdn.example.com/new.png"),
+        ]
+        etag = self.client.get(self.url)["ETag"]
+        feed_etag = self.client.get("/api/posts/feed/")["ETag"]
+        for change in changes:
+            change()
+            self.assertEqual(self.revalidate(self.url, etag).status_code, 200)
+            self.assertEqual(self.revalidate("/api/posts/feed/", feed_etag).status_code, 200)
+            etag = self.client.get(self.url)["ETag"]
+            feed_etag = self.client.get("/api/posts/feed/")["ETag"]
+
+
+class PostVisibilityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = User.objects.create_user(username="viewer", email="viewer@example.com", password="x")
+        cls.authors = {}
+        for vis in (Profile.VIS_PUBLIC, Profile.VIS_FOLLOWERS, Profile.VIS_PRIVATE):
+            author = User.objects.create_user(username=f"author_{vis}", email=f"{vis}@example.com", password="x")
+            Profile.objects.filter(user=author).update(visibility=vis)
+            Post.objects.create(author=author, content=vis)
+            cls.authors[vis] = author
+        Post.objects.create(author=cls.viewer, content="mine, hidden", is_active=False)
+
+    def visible(self, user):
+        return set(Post.objects.visible_to(user).values_list("content", flat=True))
+
+    def test_anonymous_sees_public_only(self):
+        self.assertEqual(self.visible(AnonymousUser()), {"public"})
+
+    def test_followers_only_needs_follow(self):
+        self.assertEqual(self.visible(self.viewer), {"public", "mine, hidden"})
+        Follow.objects.create(follower=self.viewer, following=self.authors[Profile.VIS_FOLLOWERS])
+        Follow.objects.create(follower=self.viewer, following=self.authors[Profile.VIS_PRIVATE])
+        self.assertEqual(self.visible(self.viewer), {"public", "followers", "mine, hidden"})
+
+    def test_private_author_sees_own_posts(self):
+        self.assertEqual(self.visible(self.authors[Profile.VIS_PRIVATE]), {"public", "private"})
+
+    def test_visibility_is_one_query(self):
+        with self.assertNumQueries(1):
+            self.visible(self.viewer)
+
+
+class AsyncViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("async", "async@example.com", "pw-12345678", is_active=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_post_create_is_async_and_list_stays_sync(self):
+        response = self.client.post("/api/posts/", {"content": "async", "category": "general"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual((body["content"], body["author_username"], body["liked_by_me"]), ("async", "async", False))
+        self.assertTrue(Post.objects.filter(pk=body["id"], author=self.user).exists())
+
+        self.assertEqual(self.client.get("/api/posts/").json()["results"][0]["id"], body["id"])
+        self.assertEqual(self.client.post("/api/posts/", {"category": "general"}, format="json").status_code, 400)
+
+    def test_uploaded_image_goes_through_serializer_create(self):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new("RGB", (2, 2)).save(buffer, "PNG")
+        upload = SimpleUploadedFile("pic.png", buffer.getvalue(), content_type="image/png")
+        url = "https://cdn.example.com/posts/pic.png"
+        with mock.patch("posts.views.aupload_image", mock.AsyncMock(return_value=url)), \
+                mock.patch.object(PostSerializer, "create", autospec=True, side_effect=PostSerializer.create) as create:
+            response = self.client.post("/api/posts/", {"content": "pic", "upload_image": upload}, format="multipart")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(create.call_args.args[1]["image_url"], url)
+        self.assertEqual(Post.objects.get(pk=response.json()["id"]).image_url, url)
+
+    def test_options_still_describes_post_fields(self):
+        response = self.client.options("/api/posts/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("content", response.json()["actions"]["POST"])
+
+    def test_unauthenticated_is_rejected_like_drf_views(self):
+        response = APIClient().post("/api/posts/", {"content": "x"}, format="json")
+        self.assertEqual(response.status_code, 403)  # SessionAuthentication comes first
+        self.assertEqual(response.json(), {"detail": "Authentication credentials were not provided."})
+
+    def test_basic_and_session_auth_are_accepted(self):
+        client = APIClient()
+        credentials = base64.b64encode(b"async:pw-12345678").decode()
+        response = client.post(
+            "/api/posts/", {"content": "basic"}, format="json", HTTP_AUTHORIZATION=f"Basic {credentials}",
+        )
+        self.assertEqual(response.status_code, 201)
+
+        client = APIClient(enforce_csrf_checks=True)
+        client.login(username="async", password="pw-12345678")
+        response = client.post("/api/posts/", {"content": "session"}, format="json")
+        self.assertEqual(response.status_code, 403)
+        self.assertIn("CSRF", response.json()["detail"])
+        client.cookies["csrftoken"] = secret = "a" * 32
+        response = client.post("/api/posts/", {"content": "session"}, format="json", HTTP_X_CSRFTOKEN=secret)
+        self.assertEqual(response.status_code, 201)
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("archivist", "archivist@example.com", "pw-12345678", is_active=True)
+        cls.reader = User.objects.create_user("reader", "reader@example.com", "pw-12345678", is_active=True)
+        cls.old = Post.objects.create(author=cls.author, content="old news")
+        cls.new = Post.objects.create(author=cls.author, content="fresh")
+        long_ago = timezone.now() - timedelta(days=400)
+        Post.objects.filter(pk=cls.old.pk).update(created_at=long_ago, updated_at=long_ago)
+        Like.objects.create(post=cls.old, user=cls.reader)
+        cls.top = Comment.objects.create(post=cls.old, author=cls.reader, content="first")
+        cls.reply = Comment.objects.create(post=cls.old, author=cls.author, parent=cls.top, content="reply")
+        Post.objects.filter(pk=cls.old.pk).update(like_count=1, comment_count=2)
+        Like.objects.update(created_at=long_ago)
+        Comment.objects.update(created_at=long_ago)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def test_old_posts_move_with_likes_and_comments(self):
+        self.assertEqual(archive_posts(batch_size=1), {"posts": 1, "likes": 1, "comments": 2})
+        self.assertEqual(list(Post.objects.values_list("id", flat=True)), [self.new.pk])
+        self.assertFalse(Like.objects.exists() or Comment.objects.exists())
+        self.assertEqual(ArchivedComment.objects.get(pk=self.reply.pk).parent_id, self.top.pk)
+        self.assertTrue(Notification.objects.exists())
+        self.assertFalse(Notification.objects.exclude(post=None).exists())
+        self.assertEqual(archive_posts(), {})
+
+        self.assertEqual(restore_posts([self.old.pk]), {"posts": 1, "likes": 1, "comments": 2})
+        self.assertFalse(ArchivedPost.objects.exists() or ArchivedLike.objects.exists())
+        restored = Post.objects.get(pk=self.old.pk)
+        self.assertEqual((restored.content, restored.like_count), ("old news", 1))
+        self.assertEqual(archive_posts(), {})  # edited just now by the restore
+
+    def test_recent_like_or_comment_keeps_post_hot(self):
+        Like.objects.filter(post=self.old).update(created_at=timezone.now())
+        self.assertEqual(archive_posts(), {})
+        Like.objects.update(created_at=timezone.now() - timedelta(days=400))
+        Comment.objects.filter(pk=self.reply.pk).update(created_at=timezone.now())
+        self.assertEqual(archive_posts(), {})
+
+    def test_reads_by_id_fall_back_to_archive(self):
+        archive_posts()
+        with self.assertNumQueries(4):
+            body = self.client.get(f"/api/posts/{self.old.pk}/").json()
+        self.assertEqual((body["content"], body["liked_by_me"], body["comment_count"]), ("old news", True, 2))
+        self.assertEqual(self.client.get(f"/api/posts/{self.old.pk}/like-status/").json(), {"liked": True})
+
+        comments = self.client.get(f"/api/posts/{self.old.pk}/comments/").json()["results"]
+        self.assertEqual([c["id"] for c in comments], [self.top.pk])
+        self.assertEqual([r["id"] for r in comments[0]["replies"]], [self.reply.pk])
+        replies = self.client.get(f"/api/posts/comments/{self.top.pk}/replies/").json()["results"]
+        self.assertEqual([r["id"] for r in replies], [self.reply.pk])
+        thread = self.client.get(f"/api/posts/comments/{self.top.pk}/thread/").json()
+        self.assertEqual([c["id"] for c in thread], [self.top.pk, self.reply.pk])
+
+        self.assertEqual(self.client.get("/api/posts/99999/").status_code, 404)
+        self.assertEqual(self.client.get("/api/posts/99999/comments/").status_code, 404)
+
+    def test_write_restores_archived_post(self):
+        archive_posts()
+        response = self.client.post(f"/api/posts/{self.old.pk}/comments/", {"content": "necro"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(ArchivedPost.objects.exists())
+        self.assertEqual(Post.objects.get(pk=self.old.pk).comment_count, 3)
+
+    @override_settings(POST_RESTORE_MAX_ROWS=2)
+    def test_oversized_archived_post_is_not_restored_in_a_request(self):
+        archive_posts()
+        with self.assertLogs("posts.views", "WARNING"):
+            response = self.client.post(f"/api/posts/{self.old.pk}/comments/", {"content": "necro"}, format="json")
+        self.assertEqual(response.status_code, 409)
+        self.assertTrue(ArchivedPost.objects.filter(pk=self.old.pk).exists())
+        self.assertFalse(Comment.objects.exists())
+
+    def test_moves_skip_posts_already_moved_or_active_again(self):
+        archive_posts()
+        self.assertEqual(restore_posts([self.old.pk]), {"posts": 1, "likes": 1, "comments": 2})
+        self.assertEqual(restore_posts([self.old.pk]), {})  # a second restore finds nothing to lock
+
+        Post.objects.filter(pk=self.old.pk).update(updated_at=timezone.now() - timedelta(days=400))
+        Like.objects.filter(post=self.old).update(created_at=timezone.now())  # liked after being picked
+        self.assertEqual(archive_batch([self.old.pk], archive_cutoff()), {})
+        self.assertTrue(Post.objects.filter(pk=self.old.pk).exists())
+
+    def test_profile_post_count_matches_author_list(self):
+        archive_posts()
+        profile = self.client.get(f"/api/auth/by-username/{self.author.username}/").json()
+        posts = self.client.get(f"/api/posts/?author={self.author.pk}").json()
+        self.assertEqual(profile["posts_count"], len(posts["results"]))
+        self.assertEqual(profile["posts_count"], 1)
+
+    def test_suspending_author_hides_archived_posts(self):
+        archive_posts()
+        set_users_active([self.author.pk], active=False)
+        self.assertEqual(self.client.get(f"/api/posts/{self.old.pk}/").status_code, 404)
+        set_users_active([self.author.pk], active=True)
+        self.assertEqual(self.client.get(f"/api/posts/{self.old.pk}/").status_code, 200)
+
+
+    def test_command_dry_run_and_restore(self):
+        out = io.StringIO()
+        call_command("archive_posts", "--dry-run", stdout=out)
+        self.assertIn("1 posts untouched", out.getvalue())
+        self.assertFalse(ArchivedPost.objects.exists())
+
+        call_command("archive_posts", stdout=out)
+        self.assertIn("Archived 1 posts, 1 likes, 2 comments.", out.getvalue())
+        call_command("archive_posts", "--restore", str(self.old.pk), stdout=out)
+        self.assertIn("Restored 1 posts, 1 likes, 2 comments.", out.getvalue())
+        self.assertTrue(Post.objects.filter(pk=self.old.pk).exists())
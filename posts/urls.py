@@ -1,20 +1,26 @@
 from django.urls import path
 from .views import (
-    PostListCreateView,
+    AsyncPostCreateView,
     PostRetrieveUpdateDeleteView,
     LikePostView,
     LikeStatusView,
     CommentListCreateView,
     CommentDeleteView,
+    CommentRepliesView,
+    CommentThreadView,
     FeedView,
+    CategoryFeedView,
 )
 
 urlpatterns = [
-    path("", PostListCreateView.as_view(), name="post-list-create"),
+    path("", AsyncPostCreateView.as_view(), name="post-list-create"),
     path("<int:pk>/", PostRetrieveUpdateDeleteView.as_view(), name="post-detail"),
     path("<int:post_id>/like/", LikePostView.as_view(), name="like-post"),
     path("<int:post_id>/like-status/", LikeStatusView.as_view(), name="like-status"),
     path("<int:post_id>/comments/", CommentListCreateView.as_view(), name="comments"),
     path("comments/<int:pk>/", CommentDeleteView.as_view(), name="delete-comment"),
+    path("comments/<int:pk>/replies/", CommentRepliesView.as_view(), name="comment-replies"),
+    path("comments/<int:pk>/thread/", CommentThreadView.as_view(), name="comment-thread"),
     path("feed/", FeedView.as_view(), name="feed"),
+    path("category/<str:category>/", CategoryFeedView.as_view(), name="category-feed"),
 ]
\ No newline at end of file
@@ -1,32 +1,106 @@
+import heapq
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
 from rest_framework import generics, permissions, status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import APIException, PermissionDenied, NotFound
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.views import APIView
-from django.db.models import Q, Exists, OuterRef
+from rest_framework.utils.urls import replace_query_param
+from django.db.models import Q, Exists, OuterRef, F, Window
+from django.db.models.functions import RowNumber
 from django.shortcuts import get_object_or_404
-from .models import Post, Like, Comment
-from .serializers import PostSerializer, LikeSerializer, CommentSerializer
-from .pagination import FeedPagination
+from .archive import RestoreTooLarge, restore_if_archived
+from .models import ArchivedComment, ArchivedLike, ArchivedPost, Post, Like, Comment
+from .serializers import (
+    PostSerializer, LikeSerializer, CommentSerializer,
+    COMMENT_ROW_FIELDS,
+    post_row_to_representation, comment_row_to_representation,
+)
+from .pagination import (
+    FeedPagination, CommentCursorPagination, ReplyCursorPagination,
+    encode_keyset_cursor, decode_keyset_cursor,
+)
+from .hydration import hydrate_post_rows, hydrate_posts
+from .supabase_service import aupload_image
 from accounts.models import Follow 
+from adminpanel.deletion import schedule_post_deletions
+from backend.async_views import AsyncAPIView
+from backend.throttling import UserTokenBucketThrottle
+from backend.instrumentation import timed_serialization
+from backend.conditional import compute_etag, etag_matches, not_modified, set_validators
+
+
+logger = logging.getLogger(__name__)
+
+# ?sort= modes for post lists; trending/top read precomputed, indexed scores.
+POST_SORTS = {
+    "latest": ("-created_at", "-id"),
+    "trending": ("-trending_score", "-id"),
+    "top": ("-top_score", "-id"),
+}
+
+
+def post_sort_ordering(request):
+    return POST_SORTS.get(request.query_params.get("sort"), POST_SORTS["latest"])
+
+
+def post_row_version(row):
+    """Everything in a PostSerializer payload that can change, without serializing."""
+    return (
+        row["id"], row["updated_at"], row["like_count"], row["comment_count"], row["is_active"],
+        row["liked_by_me"], row["author__username"], row["author__profile__avatar_url"],
+    )
+
+
+class FastListMixin:
+    """
+    GET lists are built from .values() rows with a plain function
+    (`row_to_representation`) instead of a ModelSerializer per row.
+    Writes still go through `serializer_class`.
+    """
+    row_fields = ()
+    row_to_representation = None
+
+    def list_rows(self):
+        queryset = self.filter_queryset(self.get_queryset()).values(*self.row_fields)
+        page = self.paginate_queryset(queryset)
+        return (page if page is not None else list(queryset)), page is not None
+
+    def rows_response(self, rows, paginated):
+        with timed_serialization():
+            data = [self.row_to_representation(row) for row in rows]
+        return self.get_paginated_response(data) if paginated else Response(data)
+
+    def list(self, request, *args, **kwargs):
+        return self.rows_response(*self.list_rows())
+
 
+class HydratedPostListMixin(FastListMixin):
+    """
+    Post lists: the view's queryset only picks and orders ids; the page is then
+    filled in by posts.hydration in a fixed number of batched queries.
+    """
+    row_to_representation = staticmethod(post_row_to_representation)
 
-class PostListCreateView(generics.ListCreateAPIView):
+    def list_rows(self):
+        ids = self.filter_queryset(self.get_queryset()).values_list("id", flat=True)
+        page = self.paginate_queryset(ids)
+        ids = page if page is not None else list(ids)
+        return hydrate_post_rows(ids, self.request.user), page is not None
+
+
+class PostListCreateView(HydratedPostListMixin, generics.ListCreateAPIView):
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = FeedPagination
 
     def get_queryset(self):
         user = self.request.user
-        qs = Post.objects.all().order_by("-created_at")
-
-        
-        if user.is_authenticated:
-            from django.db.models import Q
-            qs = qs.filter(Q(is_active=True) | Q(author=user))
-        else:
-            qs = qs.filter(is_active=True)
+        qs = Post.objects.visible_to(user).order_by(*post_sort_ordering(self.request))
 
         author_param = self.request.query_params.get("author")
         if author_param:
@@ -54,6 +128,73 @@ class PostListCreateView(generics.ListCreateAPIView):
         serializer.save()  
 
 
+class AsyncPostCreateView(AsyncAPIView):
+    """
+    POST /api/posts/ without holding a worker thread during the image upload.
+    Validation (including the PIL check) and the insert via
+    PostSerializer.create run in a worker thread; only the upload is awaited
+    here, before the insert, so a failed upload leaves no post behind.
+    GET, HEAD and OPTIONS are served by PostListCreateView.
+    """
+    # OPTIONS too, so its metadata still describes the POST fields.
+    sync_views = dict.fromkeys(("get", "head", "options"), PostListCreateView.as_view())
+
+    async def post(self, request):
+        serializer = PostSerializer(data=request.data, context={"request": request})
+        if not await sync_to_async(serializer.is_valid)():
+            return JsonResponse(serializer.errors, status=400)
+        extra = {}
+        upload = serializer.validated_data.pop("upload_image", None)
+        if upload:
+            try:
+                extra["image_url"] = await aupload_image(
+                    file_bytes=await sync_to_async(upload.read)(),  # may be a spooled temp file
+                    filename=upload.name,
+                    content_type=getattr(upload, "content_type", "application/octet-stream"),
+                )
+            except Exception as e:
+                return JsonResponse({"upload_image": [f"Image upload error: {e}"]}, status=400)
+
+        post = await sync_to_async(serializer.save)(**extra)
+        body = await sync_to_async(hydrate_posts)([post.pk], request.user)
+        return JsonResponse(body[0], status=201)
+
+
+class ArchivedPostTooLarge(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "This post is archived and too large to restore on demand."
+    default_code = "archived_post_too_large"
+
+
+def restore_for_write(post_id, user):
+    """restore_if_archived(), with an oversized post reported as 409."""
+    try:
+        return restore_if_archived(post_id, user)
+    except RestoreTooLarge:
+        logger.warning("Archived post %s is too large to restore in a request; "
+                       "run `manage.py archive_posts --restore %s`.", post_id, post_id)
+        raise ArchivedPostTooLarge()
+
+
+def get_post_for_write(queryset, pk, user):
+    """The post for a like/comment/edit/delete; an archived post is restored first (posts.archive)."""
+    try:
+        return queryset.get(pk=pk)
+    except Post.DoesNotExist:
+        if not restore_for_write(pk, user):
+            raise NotFound("No Post matches the given query.")
+    return get_object_or_404(queryset, pk=pk)
+
+
+class ArchivedCommentsMixin:
+    """Comment reads by id that fall back to the archive tables (posts.archive)."""
+    archived = False
+
+    @property
+    def comments(self):
+        return ArchivedComment if self.archived else Comment
+
+
 class PostRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticated]
@@ -61,10 +202,28 @@ class PostRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         user = self.request.user
         
-        return Post.objects.filter(Q(is_active=True) | Q(author=user))
+        return (
+            Post.objects.visible_to(user)
+            .select_related("author__profile")
+            .annotate(liked_by_me=Exists(Like.objects.filter(post_id=OuterRef("pk"), user=user)))
+        )
 
     def get_object(self):
-        return get_object_or_404(self.get_queryset(), pk=self.kwargs["pk"])
+        return get_post_for_write(self.get_queryset(), self.kwargs["pk"], self.request.user)
+
+    def retrieve(self, request, *args, **kwargs):
+        pk, user = self.kwargs["pk"], request.user
+        rows = (
+            hydrate_post_rows([pk], user, Post.objects.visible_to(user))
+            or hydrate_post_rows([pk], user, ArchivedPost.objects.visible_to(user))
+        )
+        if not rows:
+            raise NotFound("No Post matches the given query.")
+        row = rows[0]
+        etag = compute_etag(post_row_version(row))
+        if etag_matches(request, etag):
+            return not_modified(etag, row["updated_at"])
+        return set_validators(Response(post_row_to_representation(row)), etag, row["updated_at"])
 
     def perform_update(self, serializer):
         post = self.get_object()
@@ -76,24 +235,29 @@ class PostRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
     def perform_destroy(self, instance):
         if instance.author != self.request.user:
             raise PermissionDenied("You can only delete your own post.")
-        instance.delete()
+        # Hidden now; likes/comments are removed in batches by process_deletions.
+        schedule_post_deletions([instance.pk])
 
 
 class LikePostView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = LikeSerializer
+    throttle_classes = [UserTokenBucketThrottle]
+    throttle_scope = "like"
 
     def post(self, request, post_id):
-        post = generics.get_object_or_404(Post, pk=self.kwargs["post_id"])
+        post = get_post_for_write(Post.objects.visible_to(request.user), self.kwargs["post_id"], request.user)
         like, created = Like.objects.get_or_create(post=post, user=request.user)
         if not created:
             
             like.delete()
             post.like_count = Like.objects.filter(post=post).count()
-            post.save(update_fields=["like_count"])
+            post.score_stale = True
+            post.save(update_fields=["like_count", "score_stale"])
             return Response({"detail": "Unliked", "like_count": post.like_count})
         post.like_count = Like.objects.filter(post=post).count()
-        post.save(update_fields=["like_count"])
+        post.score_stale = True
+        post.save(update_fields=["like_count", "score_stale"])
         serializer = self.get_serializer(like)
         return Response({"detail": "Liked", "like": serializer.data, "like_count": post.like_count}, status=status.HTTP_201_CREATED)
 
@@ -104,26 +268,134 @@ class LikeStatusView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, post_id):
-        post = generics.get_object_or_404(Post, pk=post_id)  # no is_active filter
-        liked = Like.objects.filter(post=post, user=request.user).exists()
+        likes = Like
+        if not Post.objects.filter(pk=post_id).exists():  # no is_active filter
+            generics.get_object_or_404(ArchivedPost, pk=post_id)
+            likes = ArchivedLike
+        liked = likes.objects.filter(post_id=post_id, user=request.user).exists()
         return Response({"liked": liked}, status=status.HTTP_200_OK)
 
 
-class CommentListCreateView(generics.ListCreateAPIView):
+class CommentListCreateView(ArchivedCommentsMixin, FastListMixin, generics.ListCreateAPIView):
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated]
+    row_fields = COMMENT_ROW_FIELDS
+    row_to_representation = staticmethod(comment_row_to_representation)
+    throttle_classes = [UserTokenBucketThrottle]   # only applies to POST
+    throttle_scope = "comment"
+
+    pagination_class = CommentCursorPagination
+
+    # Top-level comments only; each carries its first few replies, and the
+    # rest are fetched lazily from CommentRepliesView.
+    reply_preview = 3
 
     def get_queryset(self):
-        post = generics.get_object_or_404(Post, pk=self.kwargs["post_id"])
-        return post.comments.filter(is_active=True).order_by("-created_at")
+        return self.comments.objects.visible_to(self.request.user).filter(
+            post_id=self.kwargs["post_id"], parent__isnull=True,
+        )
+
+    def list(self, request, *args, **kwargs):
+        rows, paginated = self.list_rows()
+        # Any comment row already proves the post exists. An empty page needs
+        # extra lookups: on the first page, whether the post exists at all;
+        # then whether it was archived, with its comments.
+        if not rows:
+            post_id = self.kwargs["post_id"]
+            first_page = not request.query_params.get("cursor")
+            if not (first_page and Post.objects.visible_to(request.user).filter(pk=post_id).exists()):
+                if ArchivedPost.objects.visible_to(request.user).filter(pk=post_id).exists():
+                    self.archived = True
+                    rows, paginated = self.list_rows()
+                elif first_page:
+                    raise NotFound("No Post matches the given query.")
+
+        response = self.rows_response(rows, paginated)
+        results = response.data["results"] if paginated else response.data
+        previews = top_replies([r["id"] for r in results if r["reply_count"]], self.reply_preview, self.comments)
+        for item in results:
+            item["replies"] = previews.get(item["id"], [])
+        return response
 
     def perform_create(self, serializer):
-        post = generics.get_object_or_404(Post, pk=self.kwargs["post_id"])
+        post = get_post_for_write(Post.objects.visible_to(self.request.user), self.kwargs["post_id"], self.request.user)
         serializer.context["request"] = self.request
         serializer.save(post=post)
-        post.comment_count = post.comments.filter(is_active=True).count()
-        post.save(update_fields=["comment_count"])
+        post.comment_count = post.comments.active().count()
+        post.score_stale = True
+        post.save(update_fields=["comment_count", "score_stale"])
+
+
+
+def top_replies(parent_ids, limit, comments=Comment):
+    """First `limit` active replies for each parent, in one windowed query."""
+    if not parent_ids:
+        return {}
+    rows = (
+        comments.objects.active().filter(parent_id__in=parent_ids)
+        .annotate(rank=Window(RowNumber(), partition_by=[F("parent_id")], order_by=[F("created_at"), F("id")]))
+        .filter(rank__lte=limit)
+        .order_by("parent_id", "rank")
+        .values(*COMMENT_ROW_FIELDS)
+    )
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row["parent"], []).append(comment_row_to_representation(row))
+    return grouped
+
+
+class CommentRepliesView(ArchivedCommentsMixin, FastListMixin, generics.ListAPIView):
+    """
+    Direct replies to one comment, paged oldest-first. 404 when the parent
+    itself is hidden or not visible, as in CommentThreadView.
+    """
+    permission_classes = [IsAuthenticated]
+    pagination_class = ReplyCursorPagination
+    row_fields = COMMENT_ROW_FIELDS
+    row_to_representation = staticmethod(comment_row_to_representation)
 
+    def get_queryset(self):
+        return self.comments.objects.visible_to(self.request.user).filter(parent_id=self.kwargs["pk"])
+
+    def list(self, request, *args, **kwargs):
+        pk = self.kwargs["pk"]
+        if not Comment.objects.visible_to(request.user).filter(pk=pk).exists():
+            if not ArchivedComment.objects.visible_to(request.user).filter(pk=pk).exists():
+                raise NotFound("No Comment matches the given query.")
+            self.archived = True
+        return self.rows_response(*self.list_rows())
+
+
+class CommentThreadView(APIView):
+    """
+    Whole active subtree under a comment via one prefix scan on `path`.
+    Replies under a hidden comment (e.g. one whose author was suspended)
+    are left out with it.
+    """
+    permission_classes = [IsAuthenticated]
+    max_comments = 500
+
+    def get(self, request, pk):
+        # Visibility is checked on the root; the subtree shares its post.
+        comments = Comment
+        root = Comment.objects.visible_to(request.user).only("path", "post_id").filter(pk=pk).first()
+        if root is None:
+            comments = ArchivedComment
+            root = generics.get_object_or_404(
+                ArchivedComment.objects.visible_to(request.user).only("path", "post_id"), pk=pk,
+            )
+        rows = (
+            comments.objects.active().filter(post_id=root.post_id, path__startswith=root.path)
+            .order_by("path")
+            .values(*COMMENT_ROW_FIELDS)[: self.max_comments]
+        )
+        # Ordered by path, so every parent comes before its replies.
+        shown, thread = {root.pk}, []
+        for row in rows:
+            if row["id"] == root.pk or row["parent"] in shown:
+                shown.add(row["id"])
+                thread.append(comment_row_to_representation(row))
+        return Response(thread)
 
 
 class CommentDeleteView(generics.DestroyAPIView):
@@ -131,16 +403,29 @@ class CommentDeleteView(generics.DestroyAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        return generics.get_object_or_404(Comment, pk=self.kwargs["pk"], is_active=True)
+        pk = self.kwargs["pk"]
+        if not Comment.objects.active().filter(pk=pk).exists():
+            # A comment on an archived post: restore the post first.
+            post_id = ArchivedComment.objects.filter(pk=pk).values_list("post_id", flat=True).first()
+            if post_id is not None:
+                restore_for_write(post_id, self.request.user)
+        return generics.get_object_or_404(Comment.objects.active(), pk=pk)
 
     def perform_destroy(self, instance):
         if instance.author != self.request.user:
             raise PermissionDenied("You can only delete your own comment.")
-        instance.is_active = False
-        instance.save(update_fields=["is_active"])
+        # Replies go with the comment: one prefix UPDATE on `path` covers the subtree.
+        Comment.objects.active().filter(post_id=instance.post_id, path__startswith=instance.path).update(
+            is_active=False
+        )
+        if instance.parent_id:
+            Comment.objects.filter(pk=instance.parent_id, reply_count__gt=0).update(
+                reply_count=F("reply_count") - 1
+            )
         post = instance.post
-        post.comment_count = post.comments.filter(is_active=True).count()
-        post.save(update_fields=["comment_count"])
+        post.comment_count = post.comments.active().count()
+        post.score_stale = True
+        post.save(update_fields=["comment_count", "score_stale"])
 
 
 
@@ -150,7 +435,7 @@ class FeedPagination(PageNumberPagination):
     max_page_size = 50
 
 
-class FeedView(generics.ListAPIView):
+class FeedView(HydratedPostListMixin, generics.ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = PostSerializer
     pagination_class = FeedPagination
@@ -160,18 +445,9 @@ class FeedView(generics.ListAPIView):
         following_ids = Follow.objects.filter(follower=u).values_list("following_id", flat=True)
 
         qs = (
-            Post.objects
-            .filter(
-                Q(author_id__in=following_ids, is_active=True) 
-                | Q(author=u)                                   
-            )
-            .select_related("author__profile")
-            .order_by("-created_at", "-id")
-            .annotate(
-                liked_by_me=Exists(
-                    Like.objects.filter(post_id=OuterRef("pk"), user=u)
-                )
-            )
+            Post.objects.visible_to(u)
+            .filter(Q(author_id__in=following_ids) | Q(author=u))
+            .order_by(*post_sort_ordering(self.request))
         )
         return qs
 
@@ -180,4 +456,81 @@ class FeedView(generics.ListAPIView):
         ctx["request"] = self.request
         return ctx
 
+    def list(self, request, *args, **kwargs):
+        # ETag covers the page contents plus the total count (drives next/previous).
+        # Last-Modified is the creation time of the newest post on the page; it is
+        # informational only, since like/comment counters change without bumping
+        # updated_at, so 304s are decided on the ETag alone.
+        rows, paginated = self.list_rows()
+        total = self.paginator.page.paginator.count if paginated else len(rows)
+
+        etag = compute_etag(request.user.pk, total, [post_row_version(r) for r in rows])
+        newest = max(rows, key=lambda r: r["id"])["created_at"] if rows else None
+        if etag_matches(request, etag):
+            return not_modified(etag, newest)
+
+        return set_validators(self.rows_response(rows, paginated), etag, newest)
+
+
+def category_posts(category, before=None, author=None, active=True, viewer=None):
+    """
+    Newest-first posts in one category, keyset-filtered by a (created_at, id)
+    `before` cursor. Active posts are served from post_active_category_idx
+    (limited to what `viewer` may see when given); pass author + active=False
+    for that author's hidden posts (post_inactive_author_cat_idx).
+    """
+    if active:
+        qs = Post.objects.shared_with(viewer) if viewer is not None else Post.objects.active()
+    else:
+        qs = Post.objects.filter(is_active=False, pending_deletion=False)
+    qs = qs.filter(category=category)
+    if author is not None:
+        qs = qs.filter(author=author)
+    if before is not None:
+        created_at, pk = before
+        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    return qs.order_by("-created_at", "-id")
+
+
+class CategoryFeedView(generics.GenericAPIView):
+    """
+    GET /api/posts/category/<category>/?cursor=...
+
+    Active posts in a category, with the viewer's own inactive posts in that
+    category merged in from a second indexed lookup (instead of the
+    `is_active OR author` filter, which no single index can serve).
+    """
+    permission_classes = [IsAuthenticated]
+    page_size = 20
+    max_page_size = 50
 
+    def get(self, request, category):
+        if category not in dict(Post.CATEGORY_CHOICES):
+            raise NotFound("Unknown category.")
+
+        try:
+            size = min(int(request.query_params.get("page_size", self.page_size)), self.max_page_size)
+        except ValueError:
+            size = self.page_size
+        size = max(size, 1)
+        cursor = request.query_params.get("cursor")
+        before = decode_keyset_cursor(cursor) if cursor else None
+
+        active = category_posts(category, before, viewer=request.user).values_list("created_at", "id")[: size + 1]
+        own_hidden = category_posts(
+            category, before, author=request.user, active=False,
+        ).values_list("created_at", "id")[: size + 1]
+
+        keys = list(heapq.merge(active, own_hidden, reverse=True))[: size + 1]
+        has_more = len(keys) > size
+        keys = keys[:size]
+
+        next_url = None
+        if has_more:
+            next_url = replace_query_param(
+                request.build_absolute_uri(), "cursor", encode_keyset_cursor(*keys[-1]),
+            )
+        return Response({
+            "next": next_url,
+            "results": hydrate_posts([pk for _, pk in keys], request.user),
+        })